@@ -0,0 +1,268 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import time
+
+# ----------------------------------------------------------------------
+# --- MOTOR D'ALERTES SOBRE TOT L'UNIVERS (TICKERS x MARCS TEMPORALS) ---
+# ----------------------------------------------------------------------
+# Les regles són declaratives: un nom i una llista de condicions (totes s'han
+# de complir) de la forma (columna, operador, columna | número). Les columnes
+# són les de dades_diaries. Per avaluar-les es construeix un panell amb les
+# darreres files de cada sèrie (una matriu sèries x files per columna) i cada
+# condició és una sola operació vectoritzada sobre totes les sèries.
+#
+# Una regla dispara quan passa a complir-se a la darrera barra (no es complia a
+# l'anterior). L'estat desat (regla, ticker, interval) -> darrera barra alertada
+# evita repetir una alerta si es torna a avaluar la mateixa candela.
+
+OPERADORS = {
+    '>': lambda a, b: a > b,
+    '<': lambda a, b: a < b,
+    '>=': lambda a, b: a >= b,
+    '<=': lambda a, b: a <= b,
+}
+# Operadors sobre dues barres consecutives (creuaments) i sobre 'n' barres enrere (pujar / baixar)
+CREUAMENTS = ('creua_amunt', 'creua_avall', 'creua')
+TENDENCIES = ('puja', 'baixa')
+
+REGLES_DEFECTE = [
+    {'nom': 'ATR sota el Q5 (volatilitat comprimida)', 'condicions': [('ATR', '<', 'ATR_Q5')]},
+    {'nom': 'REPV_R sobre el Q90', 'condicions': [('REPV_R', '>', 'REPV_R_Q90')]},
+    {'nom': 'Slow_%D creua Slow_%ATR-D', 'condicions': [('Slow_%D', 'creua', 'Slow_%ATR-D')]},
+    {'nom': 'ADX per sobre de 25 i pujant', 'condicions': [('ADX', '>', 25), ('ADX', 'puja', 1)]},
+]
+
+# Llargada màxima d'un missatge de Telegram (un resum més llarg es parteix en diversos)
+MAX_MISSATGE = 4000
+
+def valida_regles(regles):
+    """Comprova el format de les regles. Retorna les regles amb les condicions com a tuples."""
+    valides = []
+    for regla in regles:
+        if 'nom' not in regla or not regla.get('condicions'):
+            raise ValueError(f"Regla sense 'nom' o sense 'condicions': {regla}")
+        condicions = []
+        for condicio in regla['condicions']:
+            if len(condicio) != 3:
+                raise ValueError(f"Condició mal formada a '{regla['nom']}': {condicio}")
+            esquerra, operador, dreta = condicio
+            if operador not in OPERADORS and operador not in CREUAMENTS + TENDENCIES:
+                raise ValueError(f"Operador desconegut a '{regla['nom']}': {operador}")
+            if operador in TENDENCIES and not (isinstance(dreta, int) and dreta > 0):
+                raise ValueError(f"'{operador}' necessita un nombre de barres enrere a '{regla['nom']}'")
+            condicions.append((esquerra, operador, dreta))
+        valides.append({**regla, 'condicions': condicions})
+    return valides
+
+def carrega_regles(cami):
+    """Llegeix les regles d'un fitxer JSON (mateix format que REGLES_DEFECTE)."""
+    with open(cami, encoding='utf-8') as f:
+        return valida_regles(json.load(f))
+
+def _columnes_i_files(regles):
+    """Columnes que fan servir les regles i files necessàries (barra actual, anterior i enrere)."""
+    columnes, enrere = [], 1
+    for regla in regles:
+        for esquerra, operador, dreta in regla['condicions']:
+            for columna in (esquerra, dreta) if operador not in TENDENCIES else (esquerra,):
+                if isinstance(columna, str) and columna not in columnes:
+                    columnes.append(columna)
+            enrere = max(enrere, dreta if operador in TENDENCIES else 1)
+    # Per saber si la regla "passa a complir-se" cal avaluar-la també a la barra anterior
+    return columnes, enrere + 2
+
+def construeix_panell(dades, columnes, files, cache=None):
+    """
+    Panell de les darreres 'files' barres de cada sèrie.
+
+    Args:
+        dades (dict): (ticker, interval) -> DataFrame de dades_diaries.
+        cache (dict): Si es dona, les files extretes de cada DataFrame es guarden i es
+                      reaprofiten mentre la clau apunti al mateix objecte (p. ex. les sèries
+                      del Planificador que no han tingut candela nova).
+
+    Returns:
+        tuple: (claus, darreres barres, dict columna -> np.ndarray [sèries x files]).
+               Les sèries més curtes s'omplen amb NaN per l'esquerra.
+
+    Raises:
+        ValueError: Si a alguna sèrie li falta alguna de les columnes (p. ex. una columna
+                    mal escrita a les regles o que no és a la sortida compacta).
+    """
+    claus = [clau for clau, df in dades.items() if df is not None and len(df)]
+    panell = np.full((len(claus), files, len(columnes)), np.nan)
+    darreres = []
+    posicions = {}  # columnes del DataFrame -> posicions de 'columnes'
+    for i, clau in enumerate(claus):
+        df = dades[clau]
+        if cache is not None and clau in cache and cache[clau][0] is df:
+            _, valors, darrera = cache[clau]
+        else:
+            # Les darreres files per posició i totes les columnes alhora: molt més ràpid que df[columnes]
+            clau_columnes = tuple(df.columns)
+            if clau_columnes not in posicions:
+                indexos = df.columns.get_indexer(columnes)
+                if (indexos < 0).any():
+                    desconegudes = [c for c, k in zip(columnes, indexos) if k < 0]
+                    raise ValueError(f"Columnes de les regles que no són a {clau}: {', '.join(desconegudes)}")
+                posicions[clau_columnes] = indexos
+            cua = df.iloc[-files:].to_numpy(dtype=np.float64)
+            valors = cua[:, posicions[clau_columnes]]
+            darrera = df.index[-1]
+            if cache is not None:
+                cache[clau] = (df, valors, darrera)
+        panell[i, files - len(valors):] = valors
+        darreres.append(darrera)
+    return claus, darreres, {columna: panell[:, :, j] for j, columna in enumerate(columnes)}
+
+def _avalua_condicio(panell, esquerra, operador, dreta):
+    """Condició sobre tot el panell: matriu booleana sèries x files (NaN = no es compleix)."""
+    a = panell[esquerra]
+    if operador in TENDENCIES:
+        compleix = np.zeros(a.shape, dtype=bool)
+        compleix[:, dreta:] = a[:, dreta:] > a[:, :-dreta] if operador == 'puja' else a[:, dreta:] < a[:, :-dreta]
+        return compleix
+    b = panell[dreta] if isinstance(dreta, str) else dreta
+    if operador in OPERADORS:
+        return OPERADORS[operador](a, b)
+
+    diferencia = a - b
+    amunt = np.zeros(a.shape, dtype=bool)
+    avall = np.zeros(a.shape, dtype=bool)
+    amunt[:, 1:] = (diferencia[:, 1:] > 0) & (diferencia[:, :-1] <= 0)
+    avall[:, 1:] = (diferencia[:, 1:] < 0) & (diferencia[:, :-1] >= 0)
+    return {'creua_amunt': amunt, 'creua_avall': avall, 'creua': amunt | avall}[operador]
+
+def _valor(valor):
+    return f"{valor:.4g}" if np.isfinite(valor) else 'NaN'
+
+def _detall(panell, i, esquerra, operador, dreta):
+    """Valors que mostra una condició per a la sèrie i (darrera barra; 'puja'/'baixa' també fa 'dreta' barres)."""
+    valors = [f"{esquerra} {_valor(panell[esquerra][i, -1])}"]
+    if operador in TENDENCIES:
+        valors.append(f"{esquerra}[-{dreta}] {_valor(panell[esquerra][i, -1 - dreta])}")
+    elif isinstance(dreta, str):
+        valors[0] += f" / {dreta} {_valor(panell[dreta][i, -1])}"
+    return valors
+
+
+class MotorAlertes:
+    """
+    Avalua les regles sobre totes les sèries alhora i en treu les alertes noves.
+
+    Args:
+        regles (list): Regles (vegeu REGLES_DEFECTE).
+        cami_estat (str): JSON amb les alertes ja enviades (None = només en memòria).
+    """
+
+    def __init__(self, regles=None, cami_estat='estat_alertes.json'):
+        self.regles = valida_regles(regles if regles is not None else REGLES_DEFECTE)
+        self.columnes, self.files = _columnes_i_files(self.regles)
+        self.cami_estat = cami_estat
+        self.estat = {}
+        self._cache = {}  # (ticker, interval) -> files extretes (vegeu construeix_panell)
+        if cami_estat and os.path.exists(cami_estat):
+            with open(cami_estat, encoding='utf-8') as f:
+                self.estat = json.load(f)
+
+    def _desa_estat(self):
+        if not self.cami_estat:
+            return
+        with open(self.cami_estat + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.estat, f)
+        os.replace(self.cami_estat + '.tmp', self.cami_estat)
+
+    def avalua(self, dades):
+        """
+        Alertes noves a la darrera barra de cada sèrie.
+
+        Args:
+            dades (dict): (ticker, interval) -> DataFrame de dades_diaries (p. ex. compacte).
+
+        Returns:
+            pd.DataFrame: Una fila per alerta (Regla, Ticker, Interval, Data, Detall).
+        """
+        claus, darreres, panell = construeix_panell(dades, self.columnes, self.files, self._cache)
+        alertes = []
+        for regla in self.regles:
+            compleix = np.ones((len(claus), self.files), dtype=bool)
+            for condicio in regla['condicions']:
+                compleix &= _avalua_condicio(panell, *condicio)
+            if 'intervals' in regla:
+                compleix &= np.isin([interval for _, interval in claus], regla['intervals'])[:, None]
+
+            for i in np.flatnonzero(compleix[:, -1] & ~compleix[:, -2]):
+                ticker, interval = claus[i]
+                clau_estat = f"{regla['nom']}|{ticker}|{interval}"
+                barra = str(darreres[i])
+                if self.estat.get(clau_estat) == barra:
+                    continue  # ja alertada en aquesta mateixa barra
+                self.estat[clau_estat] = barra
+                # Cada valor es mostra un sol cop encara que la columna surti a diverses condicions
+                detall = ', '.join(dict.fromkeys(valor for condicio in regla['condicions']
+                                                 for valor in _detall(panell, i, *condicio)))
+                alertes.append({'Regla': regla['nom'], 'Ticker': ticker, 'Interval': interval,
+                                'Data': darreres[i], 'Detall': detall})
+
+        if alertes:
+            self._desa_estat()
+        return pd.DataFrame(alertes, columns=['Regla', 'Ticker', 'Interval', 'Data', 'Detall'])
+
+    @staticmethod
+    def resum(alertes):
+        """
+        Text del resum: les alertes agrupades per regla, partit en missatges de com a molt
+        MAX_MISSATGE caràcters. Cap alerta es queda fora (ja consten com a enviades a l'estat);
+        una regla que no cap sencera continua al missatge següent amb el títol repetit.
+
+        Returns:
+            list: Textos dels missatges, numerats (i/n) si n'hi ha més d'un.
+        """
+        capcalera = f"🔔 ALERTES ({len(alertes)})"
+        limit = MAX_MISSATGE - len('\n(999/999)')
+        missatges, text = [], capcalera
+        for regla, grup in alertes.groupby('Regla', sort=False):
+            titol = f"\n\n▶ {regla} ({len(grup)})"
+            for i, fila in enumerate(grup.itertuples()):
+                linia = (titol if i == 0 else '') + f"\n• {fila.Ticker} {fila.Interval}: {fila.Detall}"
+                if len(text) + len(linia) > limit and text != capcalera:
+                    missatges.append(text)
+                    text = capcalera + (f"{titol} (continua)" if i > 0 else '')
+                text += linia[:limit - len(text)]
+        missatges.append(text)
+        if len(missatges) > 1:
+            missatges = [f"{text}\n({i}/{len(missatges)})" for i, text in enumerate(missatges, 1)]
+        return missatges
+
+    def envia(self, alertes):
+        """Envia el resum per Telegram (Dades_actiu_ia.envia_missatge). No fa res si no hi ha alertes."""
+        if alertes.empty:
+            return
+        import Dades_actiu_ia as ia
+        for i, text in enumerate(self.resum(alertes)):
+            if i:
+                time.sleep(1)  # Telegram limita els missatges seguits a un mateix xat
+            ia.envia_missatge(text)
+
+
+if __name__ == "__main__":
+    import sys
+    from Planificador import Planificador
+    from Watchlist import carrega_config
+
+    config = carrega_config(sys.argv[1] if len(sys.argv) > 1 else 'watchlist.json')
+    motor = MotorAlertes(carrega_regles(config['regles']) if config.get('regles') else None)
+
+    def avalua_alertes(planificador, actualitzades):
+        """Un sol resum per despertar, amb totes les sèries que té el planificador."""
+        alertes = motor.avalua({clau: planificador.indicadors(*clau) for clau in planificador.tasques})
+        print(alertes.to_string() if len(alertes) else "Cap alerta nova.")
+        motor.envia(alertes)
+
+    planificador = Planificador()
+    for ticker in config['tickers']:
+        for interval in config['intervals']:
+            planificador.registra(ticker, interval)
+    planificador.executa(despres=avalua_alertes)
@@ -0,0 +1,123 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+
+# ----------------------------------------------------------------------
+# --- ALINEACIÓ DE SÈRIES AMB CALENDARIS DIFERENTS (CRIPTO / BORSA) ---
+# ----------------------------------------------------------------------
+# Un dropna() sobre un DataFrame de cripto i accions elimina tots els caps de
+# setmana de la cripto. Aquí la regla d'alineació s'escull explícitament:
+#   'comu' -> només les marques de temps que tenen totes les sèries (sessions comunes);
+#   'asof' -> la graella d'una sèrie de referència (o una graella donada) i, per a
+#             les altres, el darrer valor conegut en aquell moment;
+#   'unio' -> totes les marques de temps i el darrer valor conegut de cada sèrie.
+# Les sèries es comparen com a vectors int64 ordenats (np.searchsorted /
+# np.unique), sense reindexar DataFrames ni fusionar-los fila a fila.
+
+MODES = ('comu', 'asof', 'unio')
+
+def _separa(series):
+    """DataFrame (una columna per sèrie, NaN = sense observació) o dict -> dict de Series sense NaN."""
+    if isinstance(series, pd.DataFrame):
+        series = {columna: series[columna] for columna in series.columns}
+    return {nom: s.dropna() for nom, s in series.items()}
+
+def _temps(index):
+    """Índex de dates -> (int64 en ns, UTC si té zona horària; zona o None)."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        return index.as_unit('ns').asi8, None
+    return index.tz_convert('UTC').as_unit('ns').asi8, index.tz
+
+def _ordena(temps, valors):
+    """Ordena per temps i, si hi ha duplicats, es queda amb l'últim valor."""
+    if len(temps) > 1 and not (np.diff(temps) > 0).all():
+        ordre = np.argsort(temps, kind='stable')
+        temps, valors = temps[ordre], valors[ordre]
+        darrers = np.append(temps[1:] != temps[:-1], True)
+        temps, valors = temps[darrers], valors[darrers]
+    return temps, valors
+
+def _a_index(graella, tz):
+    index = pd.DatetimeIndex(pd.to_datetime(graella, unit='ns', utc=tz is not None))
+    return index.tz_convert(tz) if tz is not None else index
+
+def alinea(series, mode='asof', referencia=None, tolerancia=None):
+    """
+    Alinea sèries amb calendaris diferents sobre una graella comuna.
+
+    Args:
+        series (dict | pd.DataFrame): nom -> pd.Series, o un DataFrame amb una columna per sèrie
+                                      (p. ex. yf.download(...)['Close']).
+        mode (str): 'comu', 'asof' o 'unio' (vegeu la capçalera del mòdul).
+        referencia (str | pd.DatetimeIndex): Per a 'asof', nom de la sèrie que dona la graella
+                                             o la graella mateixa. És obligatòria.
+        tolerancia (str | pd.Timedelta): Antiguitat màxima d'un valor arrossegat ('asof' i 'unio');
+                                         si és més antic, queda NaN.
+
+    Returns:
+        pd.DataFrame: Una columna per sèrie, indexat per la graella. Els valors anteriors
+                      a la primera observació de cada sèrie són NaN.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Mode d'alineació desconegut: {mode} (opcions: {', '.join(MODES)})")
+    if mode == 'asof' and referencia is None:
+        raise ValueError("El mode 'asof' necessita una 'referencia' (nom de sèrie o graella)")
+
+    series = _separa(series)
+    dades = {}
+    zones = set()
+    for nom, s in series.items():
+        temps, tz = _temps(s.index)
+        zones.add(tz is not None)
+        dades[nom] = _ordena(temps, s.to_numpy(dtype=np.float64))
+        dades[nom] += (tz,)
+    if len(zones) > 1:
+        raise ValueError("No es poden alinear índexs amb zona horària i sense zona horària alhora")
+
+    # Graella i zona horària del resultat
+    tz = next((d[2] for d in dades.values() if d[2] is not None), None)
+    if mode in ('comu', 'unio'):
+        # Una sola ordenació de totes les marques (cada sèrie ja no té duplicats)
+        graella, vegades = np.unique(np.concatenate([d[0] for d in dades.values()]), return_counts=True)
+        if mode == 'comu':
+            graella = graella[vegades == len(dades)]
+    elif isinstance(referencia, str):
+        graella, tz = dades[referencia][0], dades[referencia][2]
+    else:
+        graella, tz_referencia = _temps(referencia)
+        graella = np.unique(graella)
+        tz = tz_referencia if tz_referencia is not None else tz
+
+    limit = pd.Timedelta(tolerancia).value if tolerancia is not None else None
+    matriu = np.full((len(graella), len(dades)), np.nan, order='F')  # columnes contigües
+    for j, (temps, valors, _) in enumerate(dades.values()):
+        if len(temps) == 0:
+            continue  # sèrie sense cap observació (p. ex. un ticker deslistat): columna tota NaN
+        # Darrera observació a o abans de cada punt de la graella
+        posicions = np.searchsorted(temps, graella, side='right') - 1
+        valids = posicions >= 0
+        if limit is not None:
+            valids &= graella - temps[np.maximum(posicions, 0)] <= limit
+        matriu[valids, j] = valors[posicions[valids]]
+
+    return pd.DataFrame(matriu, index=_a_index(graella, tz), columns=list(dades), copy=False)
+
+def retorns_log(preus, mode='comu', **kwargs):
+    """
+    Retorns logarítmics de sèries alineades amb 'alinea'.
+
+    Per a betes i correlacions convé el mode 'comu': amb 'asof' els valors arrossegats
+    donen retorns zero falsos en les sessions on el mercat estava tancat.
+    """
+    alineats = alinea(preus, mode=mode, **kwargs)
+    return np.log(alineats / alineats.shift(1)).dropna()
+
+
+if __name__ == "__main__":
+    preus = yf.download(["BTC-USD", "ETH-USD", "^GSPC"], period="3mo", progress=False)["Close"]
+    print(f"Amb dropna(): {len(preus.dropna())} files")
+    for mode, referencia in (('comu', None), ('asof', 'BTC-USD'), ('unio', None)):
+        alineats = alinea(preus, mode=mode, referencia=referencia, tolerancia='4D')
+        print(f"\n=== {mode}: {len(alineats)} files ===")
+        print(alineats.tail(8).to_string())
@@ -0,0 +1,158 @@
+import numpy as np
+
+# ----------------------------------------------------------------------
+# --- ANALÍTICA EN TEMPS REAL DEL LLIBRE D'ORDRES ---
+# ----------------------------------------------------------------------
+# Totes les funcions treballen amb arrays (n, 2) de [preu, quantitat] com els que
+# retornen parseja_instantani i LlibreLocal (Llibre_ordres.py), sense DataFrames.
+
+def preu_mig(bids, asks):
+    """Mid price entre el millor bid i el millor ask (NaN si algun costat és buit)."""
+    if len(bids) == 0 or len(asks) == 0:
+        return np.nan
+    return (bids[0, 0] + asks[0, 0]) / 2
+
+def profunditat_per_cubetes(nivells, mid, mida_cubeta=None, banda_pct=None, n_cubetes=50):
+    """
+    Agrega la quantitat d'un costat en cubetes de distància al mid amb np.bincount.
+
+    Args:
+        nivells (np.ndarray): Array (n, 2) de [preu, quantitat].
+        mid (float): Preu de referència.
+        mida_cubeta (float): Amplada de la cubeta en unitats de preu.
+        banda_pct (float): Amplada de la cubeta en % del mid (si no s'indica mida_cubeta).
+        n_cubetes (int): Nombre de cubetes; els nivells més llunyans s'ignoren.
+
+    Returns:
+        np.ndarray: Quantitat per cubeta (la 0 és la més propera al mid). Tot zeros si el
+                    mid és NaN (algun costat del llibre és buit).
+    """
+    if np.isnan(mid):
+        return np.zeros(n_cubetes)
+    distancia = np.abs(nivells[:, 0] - mid)
+    if mida_cubeta is None:
+        mida_cubeta = mid * banda_pct / 100
+    idx = (distancia / mida_cubeta).astype(np.int64)
+    dins = idx < n_cubetes
+    return np.bincount(idx[dins], weights=nivells[dins, 1], minlength=n_cubetes)
+
+def detecta_murs(nivells, mitjana=None, factor=100):
+    """Retorna els nivells amb quantitat superior a 'factor' vegades la mitjana del costat."""
+    if mitjana is None:
+        mitjana = nivells[:, 1].mean()
+    return nivells[nivells[:, 1] > mitjana * factor]
+
+def desequilibri(bids, asks, bandes_pct=(0.5, 1, 5)):
+    """
+    Mètriques de desequilibri del llibre.
+
+    Returns:
+        dict: Desequilibri del millor nivell, microprice i desequilibri de
+              profunditat dins de cada banda (% al voltant del mid).
+              El desequilibri va de -1 (només asks) a 1 (només bids).
+    """
+    mid = preu_mig(bids, asks)
+    if np.isnan(mid):
+        # Amb un costat buit no hi ha millor nivell: totes les mètriques són NaN
+        return {'mid': mid, 'spread': np.nan, 'desequilibri_top': np.nan, 'microprice': np.nan,
+                **{f'desequilibri_{banda}%': np.nan for banda in bandes_pct}}
+    qb, qa = bids[0, 1], asks[0, 1]
+    resultat = {
+        'mid': mid,
+        'spread': asks[0, 0] - bids[0, 0],
+        'desequilibri_top': (qb - qa) / (qb + qa),
+        # Microprice: mitjana dels millors preus ponderada per la quantitat del costat contrari
+        'microprice': (bids[0, 0] * qa + asks[0, 0] * qb) / (qb + qa),
+    }
+
+    # Els bids estan ordenats de més alt a més baix i els asks de més baix a més alt,
+    # així que la profunditat dins d'una banda és la suma dels primers nivells
+    for banda in bandes_pct:
+        n_b = np.searchsorted(bids[::-1, 0], mid * (1 - banda / 100))
+        n_a = np.searchsorted(asks[:, 0], mid * (1 + banda / 100), side='right')
+        vol_b = bids[:len(bids) - n_b, 1].sum()
+        vol_a = asks[:n_a, 1].sum()
+        total = vol_b + vol_a
+        resultat[f'desequilibri_{banda}%'] = (vol_b - vol_a) / total if total else 0.0
+    return resultat
+
+
+class SeguimentMurs:
+    """
+    Segueix la persistència dels murs entre instantanis consecutius.
+
+    Per a cada costat guarda els preus dels murs actius, el timestamp en què van
+    aparèixer i en quants instantanis seguits s'han vist. Un mur que desapareix
+    en un instantani es deixa de seguir.
+    """
+
+    def __init__(self):
+        self.preus = {'bids': np.empty(0), 'asks': np.empty(0)}
+        self.inici = {'bids': np.empty(0, dtype=np.int64), 'asks': np.empty(0, dtype=np.int64)}
+        self.vistos = {'bids': np.empty(0, dtype=np.int64), 'asks': np.empty(0, dtype=np.int64)}
+
+    def actualitza(self, costat, murs, timestamp_ms):
+        """
+        Actualitza el seguiment amb els murs (n, 2) d'un nou instantani.
+
+        Returns:
+            np.ndarray: Array estructurat amb preu, quantitat, inici i instantanis vistos.
+        """
+        preus_nous = murs[:, 0]
+        ordre = np.argsort(self.preus[costat])
+        preus_vells = self.preus[costat][ordre]
+
+        if len(preus_vells):
+            pos = np.minimum(np.searchsorted(preus_vells, preus_nous), len(preus_vells) - 1)
+            persisteix = preus_vells[pos] == preus_nous
+        else:
+            pos = np.zeros(len(preus_nous), dtype=np.int64)
+            persisteix = np.zeros(len(preus_nous), dtype=bool)
+
+        inici = np.full(len(preus_nous), timestamp_ms, dtype=np.int64)
+        vistos = np.ones(len(preus_nous), dtype=np.int64)
+        idx_vells = ordre[pos[persisteix]]
+        inici[persisteix] = self.inici[costat][idx_vells]
+        vistos[persisteix] = self.vistos[costat][idx_vells] + 1
+
+        self.preus[costat], self.inici[costat], self.vistos[costat] = preus_nous.copy(), inici, vistos
+
+        resultat = np.empty(len(preus_nous), dtype=[('preu', 'f8'), ('quantitat', 'f8'),
+                                                     ('inici', 'i8'), ('vistos', 'i8')])
+        resultat['preu'], resultat['quantitat'] = preus_nous, murs[:, 1]
+        resultat['inici'], resultat['vistos'] = inici, vistos
+        return resultat
+
+
+class AnaliticaLlibre:
+    """
+    Capa d'analítica per instantani: cubetes de profunditat, murs persistents i
+    desequilibri. Si es passa un LlibreLocal, la mitjana per detectar murs surt de
+    les sumes corrents del llibre en lloc de recalcular-la sobre tots els nivells.
+    """
+
+    def __init__(self, llibre=None, factor_mur=100, banda_pct=0.5, n_cubetes=50,
+                 bandes_desequilibri=(0.5, 1, 5)):
+        self.llibre = llibre
+        self.factor_mur = factor_mur
+        self.banda_pct = banda_pct
+        self.n_cubetes = n_cubetes
+        self.bandes_desequilibri = bandes_desequilibri
+        self.murs = SeguimentMurs()
+
+    def processa(self, bids=None, asks=None, timestamp_ms=0):
+        """Calcula totes les mètriques d'un instantani i les retorna en un dict."""
+        if bids is None:
+            bids, asks = self.llibre.bids, self.llibre.asks
+
+        resultat = desequilibri(bids, asks, self.bandes_desequilibri)
+        mid = resultat['mid']
+
+        for costat, nivells in (('bids', bids), ('asks', asks)):
+            mitjana = self.llibre.estadistiques(costat)[1] if self.llibre is not None else None
+            murs = detecta_murs(nivells, mitjana, self.factor_mur)
+            resultat[f'murs_{costat}'] = self.murs.actualitza(costat, murs, timestamp_ms)
+            resultat[f'cubetes_{costat}'] = profunditat_per_cubetes(
+                nivells, mid, banda_pct=self.banda_pct, n_cubetes=self.n_cubetes)
+
+        return resultat
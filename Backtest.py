@@ -0,0 +1,200 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+from datetime import date, timedelta
+import Dades_actiu_aux as aux
+from Planificador import calendari_ticker, tancaments_dia, DURADA_INTERVAL
+
+# Configuració de Pandas
+pd.set_option('display.max_rows', None)
+pd.set_option('display.max_columns', None)
+
+# ----------------------------------------------------------------------
+# --- BACKTEST VECTORITZAT DE CONDICIONS SOBRE DADES_DIARIES ---
+# ----------------------------------------------------------------------
+# Tot el càlcul es fa amb arrays (temps x estratègia): no hi ha cap bucle per barra.
+
+# Barres per any (cripto 24/7) per anualitzar rendiments i Sharpe
+BARRES_ANY = {'1h': 24 * 365, '4h': 6 * 365, '1d': 365, 'diari': 365}
+
+def barres_any(interval, ticker=None):
+    """
+    Barres per any de 'interval' segons el calendari de mercat del ticker (vegeu
+    Planificador.CALENDARIS): sessions per setmana x barres per sessió. Sense ticker
+    es compta 24/7 (BARRES_ANY). Els festius no es descompten.
+    """
+    interval = '1d' if interval == 'diari' else interval
+    if ticker is None or interval not in DURADA_INTERVAL:
+        return BARRES_ANY.get(interval, 365)
+    setmana = [date(2024, 1, 1) + timedelta(days=d) for d in range(7)]  # de dilluns a diumenge
+    calendari = calendari_ticker(ticker)
+    return sum(len(tancaments_dia(calendari, interval, dia)) for dia in setmana) * 365 / 7
+
+def _valors(df, x):
+    """Una columna del DataFrame o un valor constant."""
+    if isinstance(x, str):
+        return df[x].to_numpy(dtype=np.float64)
+    return np.full(len(df), float(x))
+
+def condicio(df, columna, operador, referencia):
+    """
+    Condició booleana sobre columnes de dades_diaries.
+
+    Args:
+        columna (str): Columna a avaluar (p. ex. 'Log_Divergence_Ratio').
+        operador (str): '<', '>', '<=', '>=', 'creua_amunt' o 'creua_avall'.
+        referencia (str | float): Una altra columna (p. ex. 'LDR_Q10') o un valor (p. ex. 25).
+
+    Returns:
+        np.ndarray: Array booleà amb una posició per fila.
+    """
+    a, b = _valors(df, columna), _valors(df, referencia)
+    if operador == '<':
+        return a < b
+    if operador == '>':
+        return a > b
+    if operador == '<=':
+        return a <= b
+    if operador == '>=':
+        return a >= b
+
+    # Creuaments: a la barra anterior era a l'altre costat
+    dif = a - b
+    anterior = np.concatenate([[np.nan], dif[:-1]])
+    if operador == 'creua_amunt':
+        return (dif > 0) & (anterior <= 0)
+    if operador == 'creua_avall':
+        return (dif < 0) & (anterior >= 0)
+    raise ValueError(f"Operador desconegut: {operador}")
+
+def posicions(entrada, sortida=None, costat=1):
+    """
+    Converteix condicions en posicions (temps x estratègia).
+
+    Sense 'sortida', la posició es manté mentre la condició d'entrada és certa.
+    Amb 'sortida', s'entra quan 'entrada' és certa i es manté fins que 'sortida' ho és
+    (màquina d'estats resolta amb un forward-fill vectoritzat).
+    """
+    entrada = np.asarray(entrada, dtype=bool)
+    if entrada.ndim == 1:
+        entrada = entrada[:, None]
+    if sortida is None:
+        return entrada.astype(np.float64) * costat
+
+    sortida = np.asarray(sortida, dtype=bool)
+    if sortida.ndim == 1:
+        sortida = sortida[:, None]
+
+    estat = np.where(entrada, 1.0, np.where(sortida, 0.0, np.nan))
+    # Forward-fill per columnes: índex de l'últim valor no NaN
+    idx = np.where(~np.isnan(estat), np.arange(len(estat))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    estat = estat[idx, np.arange(estat.shape[1])]
+    return np.nan_to_num(estat, nan=0.0) * costat
+
+def backtest(close, posicio, comissio=0.001, interval='1d', noms=None, ticker=None):
+    """
+    Avalua una o més estratègies a la vegada.
+
+    La posició decidida al tancament de la barra t s'aplica al rendiment de t+1 i
+    cada canvi de posició paga 'comissio' (fracció) sobre el nominal negociat.
+    Les mètriques s'anualitzen amb barres_any(interval, ticker).
+
+    Returns:
+        tuple: (taula de mètriques, DataFrame d'equity per estratègia).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    pos = np.asarray(posicio, dtype=np.float64)
+    if pos.ndim == 1:
+        pos = pos[:, None]
+    n_estrategies = pos.shape[1]
+    noms = noms or [f'estrategia_{i}' for i in range(n_estrategies)]
+
+    rendiment = np.zeros(len(close))
+    rendiment[1:] = close[1:] / close[:-1] - 1
+
+    pos_anterior = np.vstack([np.zeros((1, n_estrategies)), pos[:-1]])
+    canvi = np.abs(pos - pos_anterior)
+    ret = pos_anterior * rendiment[:, None] - comissio * canvi
+    equity = np.cumprod(1 + ret, axis=0)
+
+    # Drawdown màxim
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    # Operacions: una nova operació comença quan la posició passa a un valor diferent de 0
+    inici = (pos != 0) & (pos != pos_anterior)
+    id_operacio = np.cumsum(inici, axis=0)
+    # El rendiment de la barra t pertany a l'operació oberta a t-1
+    id_anterior = np.vstack([np.zeros((1, n_estrategies), dtype=id_operacio.dtype), id_operacio[:-1]])
+    en_operacio = pos_anterior != 0
+    n_operacions = id_operacio[-1]
+    max_ops = int(n_operacions.max()) + 1
+    grup = (id_anterior + np.arange(n_estrategies) * max_ops)[en_operacio]
+    ret_operacio = np.bincount(grup, weights=np.log1p(ret[en_operacio]),
+                               minlength=max_ops * n_estrategies).reshape(n_estrategies, max_ops)
+    guanyadores = (ret_operacio[:, 1:] > 0).sum(axis=1)
+
+    n_any = barres_any(interval, ticker)
+    ret_mitja = ret.mean(axis=0)
+    ret_std = ret.std(axis=0, ddof=1)
+
+    metriques = pd.DataFrame({
+        'Rendiment_%': (equity[-1] - 1) * 100,
+        'Rendiment_Anual_%': ((equity[-1]) ** (n_any / len(close)) - 1) * 100,
+        'Sharpe': np.where(ret_std > 0, ret_mitja / np.where(ret_std > 0, ret_std, 1) * np.sqrt(n_any), np.nan),
+        'Max_Drawdown_%': drawdown.min(axis=0) * 100,
+        'Operacions': n_operacions,
+        'Hit_Rate_%': np.where(n_operacions > 0, guanyadores / np.maximum(n_operacions, 1) * 100, np.nan),
+        'Exposicio_%': (pos != 0).mean(axis=0) * 100,
+        'Turnover': canvi.sum(axis=0),
+        'Comissions_%': comissio * canvi.sum(axis=0) * 100,
+    }, index=noms)
+
+    return metriques, pd.DataFrame(equity, columns=noms)
+
+def backtest_condicions(df, estrategies, comissio=0.001, interval='1d', ticker=None):
+    """
+    Executa diverses estratègies definides com a condicions sobre un DataFrame de dades_diaries.
+
+    Args:
+        estrategies (dict): nom -> (entrada, sortida, costat), on entrada i sortida són
+            tuples (columna, operador, referencia) o None.
+        ticker (str): Per anualitzar amb el calendari del mercat (per defecte 24/7).
+    """
+    entrades, sortides, costats = [], [], []
+    for entrada, sortida, costat in estrategies.values():
+        entrades.append(condicio(df, *entrada))
+        sortides.append(condicio(df, *sortida) if sortida is not None else ~entrades[-1])
+        costats.append(costat)
+
+    pos = posicions(np.column_stack(entrades), np.column_stack(sortides)) * np.array(costats)
+    metriques, equity = backtest(df['Close'].to_numpy(), pos, comissio, interval, list(estrategies), ticker)
+    equity.index = df.index
+    return metriques, equity
+
+# Condicions del prompt de Dades_actiu_ia.py
+ESTRATEGIES = {
+    'LDR<Q10 (llarg)': (('Log_Divergence_Ratio', '<', 'LDR_Q10'), ('Log_Divergence_Ratio', '>', 'LDR_Q90'), 1),
+    'LDR>Q90 (curt)': (('Log_Divergence_Ratio', '>', 'LDR_Q90'), ('Log_Divergence_Ratio', '<', 'LDR_Q10'), -1),
+    'LVR>Q90 (llarg)': (('Log_Volatility_Ratio', '>', 'LVR_Q90'), ('Log_Volatility_Ratio', '<', 'LVR_Q10'), 1),
+    'LVR<Q10 (curt)': (('Log_Volatility_Ratio', '<', 'LVR_Q10'), ('Log_Volatility_Ratio', '>', 'LVR_Q90'), -1),
+    'REPV_R>Q90 (llarg)': (('REPV_R', '>', 'REPV_R_Q90'), ('REPV_R', '<', 'REPV_R_Q10'), 1),
+    'Slow_%D creua ATR-D': (('Slow_%D', 'creua_amunt', 'Slow_%ATR-D'), ('Slow_%D', 'creua_avall', 'Slow_%ATR-D'), 1),
+    '+DI creua -DI': (('+DI', 'creua_amunt', '-DI'), ('+DI', 'creua_avall', '-DI'), 1),
+}
+
+
+if __name__ == "__main__":
+    # Normalització expansiva: cada barra només depèn de les anteriors ('global' mira el futur)
+    parametres = {'normalitzacio': 'expansiva'}
+
+    for ticker in ("BTC-USD", "^IBEX"):
+        for interval, periode in (('1d', '5y'), ('1h', '2y')):
+            df = yf.download(ticker, period=periode, interval=interval, progress=False)
+            df = aux.dades_diaries(df, interval_type='diari' if interval == '1d' else interval,
+                                   parametres=parametres)
+
+            metriques, equity = backtest_condicions(df, ESTRATEGIES, comissio=0.001, interval=interval,
+                                                    ticker=ticker)
+            print(f"\n=== {ticker} {interval} ({len(df)} barres) ===")
+            print(metriques.round(2).to_string())
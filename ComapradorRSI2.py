@@ -1,6 +1,7 @@
 import yfinance as yf
 import matplotlib.pyplot as plt
 import pandas as pd
+from Inflexions import detectar_inflexio
 
 # --- Criptos de l'índex ---
 cryptos = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
@@ -31,13 +32,6 @@ par_ma = par_close.rolling(window=periode_ma).mean()
 ratio = (crypto10 / par_close).dropna()
 
 # ---- Detectar punts d'inflexió (sense SciPy) ----
-def detectar_inflexio(serie):
-    shift1 = serie.shift(1)
-    shift_1 = serie.shift(-1)
-    peaks = serie[(serie > shift1) & (serie > shift_1)]
-    troughs = serie[(serie < shift1) & (serie < shift_1)]
-    return peaks, troughs
-
 index_peaks, index_troughs = detectar_inflexio(crypto10)
 par_peaks, par_troughs = detectar_inflexio(par_close)
 
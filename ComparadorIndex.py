@@ -1,6 +1,8 @@
 import yfinance as yf
 import matplotlib.pyplot as plt
 import pandas as pd
+from Inflexions import detectar_inflexio
+from Alineacio import alinea
 
 # --- Criptos de l'índex ---
 cryptos = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
@@ -10,8 +12,11 @@ cryptos = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
 par = "^GSPC"   # 👉 pots canviar-ho per "BNB-USD", "ETH-USD", etc.
 
 # Descarregar dades (últim mes)
-data = yf.download(cryptos + [par], period="3mo").dropna()
-close_prices = data["Close"]
+data = yf.download(cryptos + [par], period="3mo")
+
+# Calendari cripto (7 dies) com a referència: si l'actiu comparat és un índex borsari,
+# es manté el seu darrer tancament els caps de setmana i festius (en lloc d'eliminar-los amb dropna)
+close_prices = alinea(data["Close"], mode='asof', referencia=cryptos[0], tolerancia='4D').dropna()
 
 # Construir Crypto10 Index (equally weighted, normalitzat a 100)
 norm = close_prices[cryptos] / close_prices[cryptos].iloc[0] * 100
@@ -34,15 +39,9 @@ par_ma = par_close_norm.rolling(window=periode_ma).mean()
 # Ràtio Index / Actiu
 ratio = (crypto10_norm / par_close_norm).dropna()
 
-def detectar_inflexio(serie, threshold=0.05):       # threshold=0.01 considera màxim/minim si hi ha 1%
-    shift1 = serie.shift(1)
-    shift_1 = serie.shift(-1)
-    peaks = serie[(serie > shift1 * (1+threshold)) & (serie > shift_1 * (1+threshold))]
-    troughs = serie[(serie < shift1 * (1-threshold)) & (serie < shift_1 * (1-threshold))]
-    return peaks, troughs
-
-index_peaks, index_troughs = detectar_inflexio(crypto10_norm)
-par_peaks, par_troughs = detectar_inflexio(par_close_norm)
+# threshold=0.01 considera màxim/minim si hi ha 1%
+index_peaks, index_troughs = detectar_inflexio(crypto10_norm, threshold=0.05)
+par_peaks, par_troughs = detectar_inflexio(par_close_norm, threshold=0.05)
 
 # ---- Crear tres subplots ----
 fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12,14), sharex=True)
@@ -1,5 +1,5 @@
-import yfinance as yf
 import matplotlib.pyplot as plt
+from Descarrega import descarrega, columna
 
 # --- Llista de criptos per l'índex ---
 cryptos = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD", 
@@ -7,16 +7,16 @@ cryptos = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
 
 par = "TRX-USD"  # cripto de comparació
 
-# --- Descarregar dades ---
-data = yf.download(cryptos, period="1y")["Close"].dropna()
-data1 = yf.download(par, period="1y")["Close"].dropna()
+# --- Descarregar dades (una sola petició per a l'índex i la cripto de comparació) ---
+dades = descarrega(list(dict.fromkeys(cryptos + [par])), interval='1d', periode='1y')
+data = columna(dades, 'Close', cryptos).dropna()
 
 # --- Construir Crypto10 Index ---
 norm = data / data.iloc[0] * 100   # normalitzar totes
 crypto10 = norm.mean(axis=1)       # mitjana simple (equally weighted)
 
 # --- Preus de la cripto de comparació ---
-par_close = data1[par]
+par_close = dades[par]['Close'].dropna()
 par_norm = par_close / par_close.iloc[0] * 100
 
 # --- Ràtio Crypto10 / comparació ---
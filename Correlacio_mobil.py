@@ -0,0 +1,200 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+from Descarrega import descarrega, columna
+from Alineacio import retorns_log
+
+# ----------------------------------------------------------------------
+# --- MATRIU DE COVARIÀNCIA / CORRELACIÓ MÒBIL INCREMENTAL ---
+# ----------------------------------------------------------------------
+# Per a un univers de N actius es mantenen les sumes de la finestra (Σx i Σxxᵀ)
+# i un buffer circular amb els darrers W retorns. Cada barra nova suma el seu
+# producte exterior i resta el de la barra que surt de la finestra: O(N²) per
+# barra en lloc de recalcular O(N²·W). Cada W barres les sumes es refan des del
+# buffer perquè l'error d'arrodoniment de sumar i restar no s'acumuli.
+# La descomposició en valors propis de la correlació dona el pes del primer
+# component principal (quina part del moviment és comuna a tot l'univers).
+
+CRYPTO10 = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
+            "SOL-USD", "DOGE-USD", "DOT-USD", "TRX-USD", "LINK-USD"]
+
+class CorrelacioMobil:
+    """
+    Covariància i correlació mòbils (mostrals, com rolling(W).cov() de pandas) d'un univers.
+
+    Args:
+        noms (list): Actius (columnes dels retorns).
+        finestra (int): Nombre de barres de la finestra (p. ex. 168 = una setmana en 1h).
+    """
+
+    def __init__(self, noms, finestra=168):
+        self.noms = list(noms)
+        self.finestra = finestra
+        n = len(self.noms)
+        self.buffer = np.zeros((finestra, n))  # darrers W retorns (circular)
+        self.posicio = 0                       # on s'escriurà la propera barra
+        self.n = 0                             # barres dins de la finestra (<= W)
+        self.suma = np.zeros(n)
+        self.suma_productes = np.zeros((n, n))
+        self.des_de_recalcul = 0
+        self.darrer_temps = None
+
+    # --- Actualització ---
+
+    def _recalcula(self):
+        """Refà les sumes des del buffer (elimina l'error acumulat)."""
+        finestra = self.buffer[:self.n] if self.n < self.finestra else self.buffer
+        self.suma = finestra.sum(axis=0)
+        self.suma_productes = finestra.T @ finestra
+        self.des_de_recalcul = 0
+
+    def afegeix(self, retorns, temps=None):
+        """
+        Afegeix una barra (vector de N retorns en l'ordre de 'noms'). Les barres amb
+        algun NaN es descarten: cal alinear-les abans (Alineacio.retorns_log).
+        """
+        x = np.asarray(retorns, dtype=np.float64)
+        if np.isnan(x).any():
+            return False
+        if self.n == self.finestra:
+            sortint = self.buffer[self.posicio]
+            self.suma -= sortint
+            self.suma_productes -= np.outer(sortint, sortint)
+        else:
+            self.n += 1
+        self.buffer[self.posicio] = x
+        self.posicio = (self.posicio + 1) % self.finestra
+        self.suma += x
+        self.suma_productes += np.outer(x, x)
+        self.des_de_recalcul += 1
+        if self.des_de_recalcul >= self.finestra:
+            self._recalcula()
+        self.darrer_temps = temps if temps is not None else self.darrer_temps
+        return True
+
+    def afegeix_lot(self, retorns):
+        """
+        Afegeix les files d'un DataFrame de retorns posteriors a la darrera afegida.
+
+        Returns:
+            int: Barres afegides.
+        """
+        retorns = retorns[self.noms]
+        if self.darrer_temps is not None:
+            retorns = retorns[retorns.index > self.darrer_temps]
+        afegides = 0
+        for temps, fila in zip(retorns.index, retorns.to_numpy(dtype=np.float64)):
+            afegides += self.afegeix(fila, temps)
+        return afegides
+
+    # --- Lectura ---
+
+    def complet(self):
+        return self.n == self.finestra
+
+    def covariancia(self):
+        """Matriu de covariància mostral de la finestra (NaN si hi ha menys de 2 barres)."""
+        if self.n < 2:
+            return pd.DataFrame(np.nan, index=self.noms, columns=self.noms)
+        cov = (self.suma_productes - np.outer(self.suma, self.suma) / self.n) / (self.n - 1)
+        return pd.DataFrame(cov, index=self.noms, columns=self.noms)
+
+    def correlacio(self):
+        """Matriu de correlació de la finestra."""
+        cov = self.covariancia().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            desviacions = np.sqrt(np.maximum(np.diag(cov), 0))
+            corr = np.clip(cov / np.outer(desviacions, desviacions), -1, 1)
+        np.fill_diagonal(corr, np.where(desviacions > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.noms, columns=self.noms)
+
+    def components(self):
+        """
+        Instantània de la descomposició en valors propis de la correlació.
+
+        Returns:
+            dict: 'valors_propis' (de més gran a més petit), 'PC1_%' (pes del primer component,
+                  λ1 / N), 'PC1' (càrregues del primer component, amb signe positiu majoritari),
+                  'Correlacio_mitjana' (mitjana fora de la diagonal) i 'temps'.
+        """
+        corr = self.correlacio().to_numpy()
+        n = len(self.noms)
+        if np.isnan(corr).any():
+            return {'valors_propis': np.full(n, np.nan), 'PC1_%': np.nan,
+                    'PC1': pd.Series(np.nan, index=self.noms), 'Correlacio_mitjana': np.nan,
+                    'temps': self.darrer_temps}
+        valors, vectors = np.linalg.eigh(corr)
+        valors, vectors = valors[::-1], vectors[:, ::-1]
+        pc1 = vectors[:, 0] * (1 if vectors[:, 0].sum() >= 0 else -1)
+        return {'valors_propis': valors, 'PC1_%': 100 * valors[0] / n,
+                'PC1': pd.Series(pc1, index=self.noms),
+                'Correlacio_mitjana': (corr.sum() - n) / (n * (n - 1)) if n > 1 else np.nan,
+                'temps': self.darrer_temps}
+
+    # --- Instantànies (per reprendre entre execucions) ---
+
+    def desa(self, cami):
+        """Desa l'estat en un .npz (escriptura atòmica)."""
+        meta = {'noms': self.noms, 'finestra': self.finestra, 'posicio': self.posicio, 'n': self.n,
+                'des_de_recalcul': self.des_de_recalcul,
+                'darrer_temps': None if self.darrer_temps is None else pd.Timestamp(self.darrer_temps).isoformat()}
+        os.makedirs(os.path.dirname(cami) or '.', exist_ok=True)
+        with open(cami + '.tmp', 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), buffer=self.buffer, suma=self.suma,
+                     suma_productes=self.suma_productes)
+        os.replace(cami + '.tmp', cami)
+
+    @classmethod
+    def carrega(cls, cami):
+        with np.load(cami) as dades:
+            meta = json.loads(str(dades['meta']))
+            motor = cls(meta['noms'], meta['finestra'])
+            motor.buffer, motor.suma, motor.suma_productes = dades['buffer'], dades['suma'], dades['suma_productes']
+        motor.posicio, motor.n, motor.des_de_recalcul = meta['posicio'], meta['n'], meta['des_de_recalcul']
+        motor.darrer_temps = None if meta['darrer_temps'] is None else pd.Timestamp(meta['darrer_temps'])
+        return motor
+
+
+def historial_components(retorns, finestra=168, cada=1, motor=None):
+    """
+    Recorre els retorns amb una CorrelacioMobil i en guarda una instantània cada 'cada' barres.
+
+    Returns:
+        pd.DataFrame: 'PC1_%', 'Correlacio_mitjana' i 'Lambda2_%' per barra (des que la finestra és plena).
+    """
+    motor = motor or CorrelacioMobil(retorns.columns, finestra)
+    files = {}
+    for i, (temps, fila) in enumerate(zip(retorns.index, retorns[motor.noms].to_numpy(dtype=np.float64))):
+        if motor.afegeix(fila, temps) and motor.complet() and i % cada == 0:
+            components = motor.components()
+            files[temps] = {'PC1_%': components['PC1_%'],
+                            'Correlacio_mitjana': components['Correlacio_mitjana'],
+                            'Lambda2_%': 100 * components['valors_propis'][1] / len(motor.noms)}
+    return pd.DataFrame.from_dict(files, orient='index')
+
+def descarrega_retorns(tickers=CRYPTO10, interval='1h', periode='3mo'):
+    """Retorns logarítmics dels tancaments, alineats a les sessions comunes."""
+    dades = descarrega(tickers, interval, periode)
+    return retorns_log(columna(dades, 'Close', tickers), mode='comu')
+
+
+if __name__ == "__main__":
+    import time
+
+    retorns = descarrega_retorns(CRYPTO10, '1h', '3mo')
+    print(f"{len(retorns)} barres de 1h per a {len(retorns.columns)} actius")
+
+    inici = time.time()
+    motor = CorrelacioMobil(retorns.columns, finestra=168)
+    historial = historial_components(retorns, motor=motor)
+    print(f"Historial de components: {1000 * (time.time() - inici):.0f} ms")
+
+    print("\n=== Correlació (darrera setmana) ===")
+    print(motor.correlacio().round(2).to_string())
+    components = motor.components()
+    print(f"\nPC1: {components['PC1_%']:.1f}% de la variància; correlació mitjana "
+          f"{components['Correlacio_mitjana']:.2f}")
+    print(components['PC1'].round(3).to_string())
+    print("\n=== Règim (pes del primer component) ===")
+    print(historial.tail(24).round(2).to_string())
@@ -0,0 +1,96 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+
+# Configuració de Pandas
+pd.set_option('display.max_rows', None)
+pd.set_option('display.max_columns', None)
+
+# --- Criptos de l'índex ---
+CRYPTOS = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
+           "SOL-USD", "DOGE-USD", "DOT-USD", "TRX-USD", "LINK-USD"]
+
+# ----------------------------------------------------------------------
+# --- FUNCIONS DE CÀLCUL ---
+# ----------------------------------------------------------------------
+
+def index_crypto10(preus, cryptos=CRYPTOS):
+    """Construeix el Crypto10 Index (equally weighted, normalitzat a 100)."""
+    dades = preus[cryptos].dropna()
+    norm = dades / dades.iloc[0] * 100
+    return norm.mean(axis=1)
+
+def classificar_tendencia(percent_diff, llindar=10):
+    """Classifica la distància a la mitjana en Alcista / Baixista / Neutre."""
+    return np.select([percent_diff > llindar, percent_diff < -llindar],
+                     ["Alcista", "Baixista"], default="Neutre")
+
+def cribratge_forca_relativa(preus, referencia=None, llindar=10):
+    """
+    Calcula la força relativa de tots els actius d'un univers contra una referència
+    en una sola passada vectoritzada.
+
+    Args:
+        preus (pd.DataFrame): Preus de tancament (temps x ticker).
+        referencia (pd.Series | str | None): Sèrie de referència, un ticker de 'preus'
+            o None per fer servir el Crypto10 Index.
+        llindar (float): % de distància a la mitjana per considerar Alcista/Baixista.
+
+    Returns:
+        pd.DataFrame: Taula ordenada per z-score de la ràtio (els més forts primer).
+    """
+    if referencia is None:
+        referencia = index_crypto10(preus)
+    elif isinstance(referencia, str):
+        referencia = preus[referencia]
+
+    preus = preus.reindex(referencia.index)
+    P = preus.to_numpy(dtype=np.float64)
+    ref = referencia.to_numpy(dtype=np.float64)[:, None]
+
+    # Darrer preu vàlid de cada actiu (els actius nous poden tenir NaN al principi)
+    darrer = preus.ffill().iloc[-1].to_numpy()
+
+    # --- Tendència de cada actiu respecte a la mitjana del període ---
+    mitjana = np.nanmean(P, axis=0)
+    percent_diff = (darrer - mitjana) / mitjana * 100
+
+    # --- Ràtio Referència / Actiu ---
+    ratio = ref / P
+    ratio_mitjana = np.nanmean(ratio, axis=0)
+    ratio_std = np.nanstd(ratio, axis=0, ddof=1)
+    ratio_darrer = ref[-1, 0] / darrer
+    ratio_z = (ratio_darrer - ratio_mitjana) / np.where(ratio_std > 0, ratio_std, np.nan)
+    ratio_diff = (ratio_darrer - ratio_mitjana) / ratio_mitjana * 100
+
+    taula = pd.DataFrame({
+        'Preu': darrer,
+        'Diff_Mitjana_%': percent_diff,
+        'Tendencia': classificar_tendencia(percent_diff, llindar),
+        'Ratio': ratio_darrer,
+        'Ratio_Diff_%': ratio_diff,
+        'Ratio_Z': ratio_z,
+        # Ràtio Referència/Actiu baixa quan l'actiu guanya força a la referència
+        'Forca_Relativa': classificar_tendencia(-ratio_diff, llindar),
+        'Barres': np.count_nonzero(~np.isnan(P), axis=0),
+    }, index=preus.columns)
+
+    taula = taula.sort_values('Ratio_Z')
+    taula['Rank'] = np.arange(1, len(taula) + 1)
+    return taula
+
+
+if __name__ == "__main__":
+    # Univers a analitzar (una sola descàrrega per a tots els actius)
+    univers = CRYPTOS + ["AVAX-USD", "LTC-USD", "BCH-USD", "XLM-USD", "UNI-USD",
+                         "ATOM-USD", "NEAR-USD", "ETC-USD", "FIL-USD", "HBAR-USD"]
+
+    preus = yf.download(univers, period="1y")["Close"].dropna(how='all')
+
+    crypto10 = index_crypto10(preus)
+    percent_diff_index = (crypto10.iloc[-1] - crypto10.mean()) / crypto10.mean() * 100
+    print(f"Tendència Crypto10: {classificar_tendencia(percent_diff_index)} "
+          f"({percent_diff_index:.2f}% respecte a la mitjana)")
+
+    taula = cribratge_forca_relativa(preus, referencia=crypto10)
+    print(taula.round(3).to_string())
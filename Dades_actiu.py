@@ -1,9 +1,10 @@
 import yfinance as yf
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 from ta.volatility import AverageTrueRange
 from ta.momentum import RSIIndicator 
+from Exportacio import exporta_magatzem
+from Dades_actiu_aux import exporta_dades, grafica
 
 # Configuració de Pandas
 pd.set_option('display.max_rows', None)
@@ -300,27 +301,12 @@ df.dropna(subset=['LDR_Q10', 'LDR_Q90'], inplace=True)
 df_raw.dropna(subset=['LVR_Q10', 'LVR_Q90', 'REPV_R_Q10', 'REPV_R_Q90'], inplace=True)
 df_raw_1.dropna(subset=['LVR_Q10', 'LVR_Q90', 'REPV_R_Q10', 'REPV_R_Q90'], inplace=True)
 
-def df_net(df):
-    df = df[['Close','Close_EMA21','Close_EMA233','Volume','SMA_55_Volume', 
-             'ATR', 'RSI','Log_Divergence_Ratio', 'Fast_%RED-K', 'REPV_R','REPV_R_Q10', 'REPV_R_Q90', # Afegits els quantils
-             'Log_Volatility_Ratio','LVR_Q10', 'LVR_Q90','RED','+DI','-DI','ADX' ]]
-    return df
-def df_net_raw(df):
-    df = df[['Close','ATR','Volume','SMA_55_Volume','Log_Volatility_Ratio', 'LVR_Q10', 'LVR_Q90',
-             'RED','REPV_R','REPV_R_Q10', 'REPV_R_Q90', # Afegits els quantils
-             'Fast_%RED-K', 'Slow_%RED-D']]
-    return df
-
+# Cada execució afegeix les files noves al magatzem columnar (vegeu Exportacio.py)
+afegides = exporta_magatzem(ticker, {'1d': df, '4h': df_raw, '1h': df_raw_1})
+print(f"Files escrites al magatzem columnar: {afegides}")
 
 nom_fitxer = 'dades_completes_dinamiques.txt'
-with open(nom_fitxer, 'w', encoding='utf-8') as f:
-    f.write('Dades del darrer tancament (Diari)\n')
-    f.write(df_net(df).tail(10).T.to_string())
-    f.write('\n\n Dades de les ultimes 24h (1h)\n')
-    f.write(df_net_raw(df_raw_1).tail(25).to_string())
-    f.write('\n\n Dades de les ultimes 24h (4h)\n')
-    f.write(df_net_raw(df_raw).tail(25).to_string())
-
+exporta_dades(nom_fitxer, df, df_raw, df_raw_1)
 print(f"Les dades completes s'han exportat a '{nom_fitxer}'.")
 
 # ----------------------------------------------------------------------
@@ -328,106 +314,9 @@ print(f"Les dades completes s'han exportat a '{nom_fitxer}'.")
 # --- ELS LLINDARS ARA SÓN DINÀMICS (ROLLING QUANTILE) ---
 # ----------------------------------------------------------------------
 
-def grafica(df_raw):
-
-    fig, axes = plt.subplots(2, 2, figsize=(18, 10), sharex=True)
-    fig.suptitle(f"Anàlisi {ticker}", fontsize=10, y=0.98)
-
-    # --- GRÀFIC 1: RÀTIO LOGARÍTMICA (VOLATILITAT) - ÚS DE LLINDARS MÒBILS (df_raw) ---
-    ax1 = axes[1, 1]
-    ax1.plot(df_raw.index, df_raw['Log_Volatility_Ratio'], color='darkgreen', linewidth=1.5)
-    ax1.set_title("4. Fricció (LVR) i Cost (Vol/Preu)", fontsize=8)
-    # ÚS DELS ROLLING QUANTILS PER A LVR
-    ax1.plot(df_raw.index, df_raw['LVR_Q10'], color='darkgreen', linestyle='--', linewidth=0.8)
-    ax1.plot(df_raw.index, df_raw['LVR_Q90'], color='darkgreen', linestyle='--', linewidth=0.8)
-    # ax1.set_ylabel("LN(Ràtio)")
-    ax1.grid(True, linestyle=':', alpha=0.8)
-    ax1.legend(['LVR'], loc='upper left')
-    ax1.tick_params(axis='y', labelcolor='darkgreen', labelsize=8)
-    ax1.tick_params(axis='x', rotation=45, labelsize=8)
-
-    # --- EIX Y DRETA: REPV_R (Magnitud, el COST) - ÚS DE LLINDARS MÒBILS (df_raw) ---
-    ax1_twin = ax1.twinx()  # Creació d'un segon Eix Y
-    # ax1_twin.set_ylabel('RF_Norm (Cost d\'Intervenció)', color='red', fontsize=12)
-    ax1_twin.plot(df_raw.index, df_raw['REPV_R'], color='red', linewidth=1.5, label='REPV_R (Cost)')
-    # ÚS DELS ROLLING QUANTILS PER A REPV_R
-    ax1_twin.plot(df_raw.index, df_raw['REPV_R_Q10'], color='red', linestyle='--', linewidth=0.8)
-    ax1_twin.plot(df_raw.index, df_raw['REPV_R_Q90'], color='red', linestyle='--', linewidth=0.8)
-    ax1_twin.tick_params(axis='y', labelcolor='red', labelsize=8)
-    ax1_twin.legend(['Cost'], loc='lower left')
-
-    # --- GRÀFIC 2: COMPONENTS NORMALITZADES (RED STOCHASTIC) ---
-    ax2 = axes[0, 1]
-    ax2.set_title("2. LDR", fontsize=8)
-    # ax2.plot(df_raw.index, df_raw['Fast_%ATR-K'], label='Rapida', color='blue', linewidth=2)
-    # ax2.plot(df_raw.index, df_raw['Slow_%ATR-D'], label='Lenta', color='green', linewidth=2)
-    ax2.plot(df_raw.index, df_raw['Log_Divergence_Ratio'], color='purple', linewidth=1.5)
-    ax2.plot(df_raw.index, df_raw['LDR_Q10'], color='purple', linestyle='--', linewidth=0.8)
-    ax2.plot(df_raw.index, df_raw['LDR_Q90'], color='purple', linestyle='--', linewidth=0.8)
-    # ax2.set_ylabel('RED', fontsize=12)
-    # ax2.axhline(y=20, color='blue', linestyle='--', linewidth=0.5)
-    # ax2.axhline(y=80, color='blue', linestyle='--', linewidth=0.5)
-    # ax2.legend(loc='upper left')
-    ax2.tick_params(axis='y', labelcolor='blue', labelsize=8)
-    ax2.grid(True, linestyle=':', alpha=0.8)
-
-    # ax2_twin = ax2.twinx()  # Creació d'un segon Eix Y
-    # ax2_twin.plot(df_raw.index, df_raw['Close_EMA8'], label='EMA 8', color='orange', linewidth=2)
-    # ax2_twin.tick_params(axis='y', labelcolor='orange', labelsize=8)
-    # ax2_twin.legend(['EMA 8'], loc='lower left')
-
-    # --- GRÀFIC 3: RÀTIO LOGARÍTMICA (DIVERGÈNCIA / OBV) - ÚS DE LLINDARS MÒBILS (df) ---
-    ax3 = axes[1, 0]
-    # ax3.axhline(y=0, color='red', linestyle='--', linewidth=1)
-    # ÚS DELS ROLLING QUANTILS PER A LDR
-    # ax3.plot(df_raw.index, df_raw['VTR_EMA'], color='purple', linewidth=1.5)
-    # ax3.plot(df_raw.index, df_raw['Fast_%RED-K'], label='Rapida', color='blue', linewidth=2)
-    ax3.plot(df_raw.index, df_raw['Slow_%D'], color='blue', linewidth=2, label='Preu')
-    ax3.plot(df_raw.index, df_raw['Slow_%ATR-D'], color='green', linewidth=2, label='ATR')
-    ax3.plot(df_raw.index, df_raw['Slow_%RED-D'], color='red', linewidth=2, label='V-ATR')
-    ax3.axhline(y=20, color='blue', linestyle='--', linewidth=0.5)
-    ax3.axhline(y=80, color='blue', linestyle='--', linewidth=0.5)
-    ax3.axhline(y=50, color='red', linestyle='--', linewidth=0.5)
-    # ax3.plot(df_raw.index, df_raw['IPE_Q10'], color='purple', linestyle='--', linewidth=0.8)
-    # ax3.plot(df_raw.index, df_raw['IPE_Q90'], color='purple', linestyle='--', linewidth=0.8)
-    ax3.set_title("3.Estocastics", fontsize=8)
-    # ax3.set_ylabel("LN(Ràtio)")
-    # ax3.set_xlabel("Data")
-    ax3.grid(True, linestyle=':', alpha=0.8)
-    ax3.legend(loc='upper left')
-    ax3.tick_params(axis='x', rotation=45, labelsize=8)
-    ax3.tick_params(axis='y', labelcolor='purple', labelsize=8)
-
-    # --- GRÀFIC 4: COMPONENTS DE PREU I TENDÈNCIA ---
-    ax4 = axes[0, 0]
-    ax4.set_ylabel('Preu', fontsize=8)
-    ax4.grid(True, linestyle='--', alpha=0.8)
-    ax4.set_title("1. Preu i EMAs", fontsize=8)
-    ax4.plot(df_raw.index, df_raw['Close'], label='Preu', color='black', alpha=0.7, linewidth=1.5)
-    ax4.plot(df_raw.index, df_raw['Close_EMA13'], label='EMA 13', color='blue', linewidth=2)
-    ax4.plot(df_raw.index, df_raw['Close_EMA233'], label='EMA 233', color='violet', linewidth=2)
-    ax4.legend(loc='upper left')
-    ax4.tick_params(axis='y', labelsize=8)
-
-    # ax4_twin = ax4.twinx()  # Creació d'un segon Eix Y
-    # ax4_twin.plot(df_raw.index, df_raw['ATR'], label='ATR', color='green', alpha=0.7, linewidth=1.5)
-    # ax4_twin.tick_params(axis='y', labelcolor='green')
-    # ax4_twin.legend(['ATR'], loc='lower left')
-    # ax4_twin.plot(df_raw.index, df_raw['ATR_Q5'], color='green', linestyle='--', linewidth=0.8)
-    # ax4_twin.plot(df_raw.index, df_raw['ATR_Q90'], color='green', linestyle='--', linewidth=0.8)
-    # ax4_twin.legend(loc='best')
-    # ax4_twin.set_ylabel('RF_Norm (Cost d\'Intervenció)', color='red', fontsize=12)
-    # ax4_twin.plot(df_raw.index, df_raw['REPV_R'], color='red', linewidth=1.5, label='REPV_R (Cost)')
-
-
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    
-    return plt.show()
-
-
 df = df.tail(90)
 df_raw = df_raw.tail(72)
 df_raw_1 = df_raw_1.tail(72)
-grafica(df)
-grafica(df_raw)
-grafica(df_raw_1)
\ No newline at end of file
+grafica(df, ticker)
+grafica(df_raw, ticker)
+grafica(df_raw_1, ticker)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+import matplotlib.pyplot as plt
 from ta.volatility import AverageTrueRange
 from ta.momentum import RSIIndicator 
 
@@ -11,13 +12,34 @@ pd.set_option('display.max_columns', None)
 # --- FUNCIONS DE CÀLCUL ---
 # ----------------------------------------------------------------------
 
-def min_max_scale_log(series):
+def min_max_scale_log(series, mode='global', finestra=250):
     """Normalitza una sèrie de dades al rang 1-100 per al càlcul logarítmic.
-    AVÍS: Aquesta normalització depèn de la finestra temporal de les dades (repintat).
+    AVÍS: Amb mode 'global' la normalització depèn de la finestra temporal de les dades (repintat).
+
+    Modes sense repintat (cada valor només depèn de les barres fins a la seva, en una passada O(n)):
+    - 'expansiva': mínim i màxim acumulats des de la primera barra.
+    - 'mobil': mínim i màxim de les darreres 'finestra' barres.
+    - 'rang': rang percentual del valor dins de les darreres 'finestra' barres.
     """
-    min_val, max_val = series.min().item(), series.max().item()
-    if max_val == min_val: return pd.Series(50.0, index=series.index)
-    return 1 + 99 * (series - min_val) / (max_val - min_val) 
+    if mode == 'global':
+        min_val, max_val = series.min().item(), series.max().item()
+        if max_val == min_val: return pd.Series(50.0, index=series.index)
+        return 1 + 99 * (series - min_val) / (max_val - min_val) 
+
+    if mode == 'expansiva':
+        min_val, max_val = series.cummin(), series.cummax()
+    elif mode == 'mobil':
+        min_val = series.rolling(window=finestra, min_periods=1).min()
+        max_val = series.rolling(window=finestra, min_periods=1).max()
+    elif mode == 'rang':
+        rang = series.rolling(window=finestra, min_periods=1).rank(pct=True)
+        # Amb una sola barra el rang és 1: la situem al mig com quan no hi ha rang
+        return (1 + 99 * rang).where(series.rolling(window=finestra, min_periods=1).count() > 1, 50.0)
+    else:
+        raise ValueError(f"Mode de normalització desconegut: {mode}")
+
+    amplada = max_val - min_val
+    return (1 + 99 * (series - min_val) / amplada.where(amplada > 0)).fillna(50.0)
 
 def calculate_obv(df):
     """Calcula l'indicador On-Balance Volume (OBV) de forma vectoritzada."""
@@ -35,19 +57,127 @@ def calculate_obv(df):
     
     return obv_series
 
-def dades_diaries(df, interval_type='diari'):
+# Paràmetres per defecte de dades_diaries (els noms de les columnes es mantenen encara que es canviïn)
+PARAMETRES_DEFECTE = {
+    'span_rapida': 5,          # Price_TR_ema8 i Volume_ema8
+    'span_ema8': 8,            # Close_EMA8
+    'span_ema13': 13,          # Close_EMA13, EMA13_Close i TR_EMA13_day
+    'span_ema21': 21,          # TR_EMA, VTR_EMA, OBV_EMA i Close_EMA21
+    'span_ema233': 233,        # Close_EMA233
+    'periode': 21,             # ATR, RSI, estocàstics i SMA_13_Volume
+    'periode_adx': 14,
+    'finestra_quantil': None,  # None = segons interval_type (250 / 72 / 288)
+    'normalitzacio': 'global', # Mode de min_max_scale_log per a LVR i LDR
+    'finestra_normalitzacio': 250,
+}
+
+# Columnes que es conserven en mode compacte (les que fan servir df_net, df_net_raw,
+# grafica, el prompt i les estratègies de Backtest.py)
+COLUMNES_COMPACTES = [
+    'Open', 'High', 'Low', 'Close', 'Volume',
+    'Close_EMA8', 'Close_EMA13', 'Close_EMA21', 'Close_EMA233',
+    'Log_Volatility_Ratio', 'm_LVR', 'Log_Divergence_Ratio', 'm_LDR', 'RED', 'm_RED',
+    'ATR', 'ATR_Q5', 'ATR_Q90', 'RSI', 'SMA_55_Volume', 'REPV_R', 'IPE',
+    'Slow_%D', 'Fast_%RED-K', 'Slow_%RED-D', 'Slow_%ATR-D', '+DI', '-DI', 'ADX',
+    'LDR_Q10', 'LDR_Q90', 'LVR_Q10', 'LVR_Q90', 'REPV_R_Q10', 'REPV_R_Q90', 'IPE_Q10', 'IPE_Q90',
+]
+
+def _memoritza(cache, clau, calcul):
+    """Retorna cache[clau] o el calcula i el desa. Sense cache simplement el calcula."""
+    if cache is None:
+        return calcul()
+    if clau not in cache:
+        cache[clau] = calcul()
+    return cache[clau]
+
+class _Columnes:
+    """
+    Columnes d'un DataFrame com a Series soltes, per al mode compacte de dades_diaries.
+
+    Admet les operacions que fa servir dades_diaries sobre el DataFrame (df[nom], df[nom] = ...,
+    len, index i dropna) però cada columna es pot alliberar quan ja no cal: només se'n guarda
+    quines files tenen NaN, perquè la neteja final elimini les mateixes files que la versió
+    completa. Les files descartades al principi o al final es treuen amb un tall (vista, sense
+    còpia); només els forats al mig obliguen a copiar.
+    """
+
+    def __init__(self, df):
+        self.columnes = {nom: df[nom] for nom in df.columns}
+        self.index = df.index
+        self.valides = np.ones(len(df), dtype=bool)  # files sense NaN a les columnes alliberades
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, nom):
+        return self.columnes[nom]
+
+    def __setitem__(self, nom, valors):
+        if not isinstance(valors, pd.Series):
+            valors = pd.Series(valors, index=self.index)
+        self.columnes[nom] = valors
+
+    def _plenes(self, noms):
+        plenes = self.valides.copy()
+        for nom in noms:
+            plenes &= self.columnes[nom].notna().to_numpy()
+        return plenes
+
+    def dropna(self, subset=None, inplace=True):
+        plenes = self._plenes(subset or list(self.columnes))
+        if subset is None:
+            self.valides[:] = True
+        if plenes.all():
+            return
+        posicions = np.flatnonzero(plenes)
+        if len(posicions) and posicions[-1] - posicions[0] + 1 == len(posicions):
+            files = slice(posicions[0], posicions[-1] + 1)
+        else:
+            files = posicions
+        self.index = self.index[files]
+        self.valides = self.valides[files]
+        self.columnes = {nom: serie.iloc[files] for nom, serie in self.columnes.items()}
+
+    def allibera(self, conserva=()):
+        """Allibera les columnes que no són a COLUMNES_COMPACTES ni a 'conserva'."""
+        for nom in [nom for nom in self.columnes if nom not in COLUMNES_COMPACTES and nom not in conserva]:
+            self.valides &= self.columnes.pop(nom).notna().to_numpy()
+
+    def resultat(self):
+        """DataFrame final en float32 (les columnes float64 es van alliberant una a una)."""
+        plenes = self._plenes(COLUMNES_COMPACTES)
+        columnes = [self.columnes.pop(nom).to_numpy(dtype=np.float32)[plenes] for nom in COLUMNES_COMPACTES]
+        # La matriu transposada és el bloc del DataFrame tal qual (sense una còpia més)
+        return pd.DataFrame(np.vstack(columnes).T, index=self.index[plenes], columns=COLUMNES_COMPACTES,
+                            copy=False)
+
+def dades_diaries(df, interval_type='diari', parametres=None, cache=None, compacte=False):
     """
     Calcula els indicadors i els llindars dinàmics per a un DataFrame.
     L'argument 'interval_type' s'utilitza per a determinar la finestra de Rolling Quantile.
     Valors possibles: 'daily', '4h', '1h'
+
+    'parametres' sobreescriu part de PARAMETRES_DEFECTE. 'cache' és un dict on es
+    guarden els resultats intermedis que no depenen dels paràmetres de la resta
+    (OBV, ATR, RSI, ADX i les EMAs de cada span); només es pot reutilitzar entre
+    crides amb les mateixes dades d'entrada (p. ex. en un escombrat de paràmetres).
+
+    Amb 'compacte' només es retornen les COLUMNES_COMPACTES en float32 (sense els
+    intermedis), per reduir la memòria quan es guarden molts tickers a la vegada. Els
+    càlculs es fan sobre columnes soltes (_Columnes), sense copiar l'entrada, i cada
+    intermedi s'allibera en acabar la secció que el fa servir.
     """
+    p = {**PARAMETRES_DEFECTE, **(parametres or {})}
     
     # Si les dades no són un MultiIndex (el cas de df_raw), no fem el droplevel
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = df.columns.droplevel(1)
 
     # df = df[:-1] 
-    df = df.copy() # Correcció per evitar el SettingWithCopyWarning
+    if compacte:
+        df = _Columnes(df[['Open', 'High', 'Low', 'Close', 'Volume']])
+    else:
+        df = df.copy() # Correcció per evitar el SettingWithCopyWarning
     
     # ----------------------------------------------------------------------
     # --- CÀLCULS DEL SISTEMA 1: VOLATILITAT (ATR / V-ATR) ---
@@ -65,14 +195,24 @@ def dades_diaries(df, interval_type='diari'):
     df['Price_TR_day'] = abs(df['High'] / df['Low'])
     df.dropna(subset=['Price_TR', 'Volume_VTR','Price_TR_day'], inplace=True)
 
+    def files():
+        # Files d'entrada actuals: la neteja temporal de NaNs en treu més o menys segons
+        # la normalització, així que la longitud i la primera data formen part de la clau
+        return (len(df), df.index[0] if len(df) else None)
+
+    def ema(columna, span):
+        return _memoritza(cache, ('ema', columna, span) + files(),
+                          lambda: df[columna].ewm(span=span, adjust=False).mean())
+
     # 1. EMAs de Volatilitat
-    df['TR_EMA'] = df['Price_TR'].ewm(span=21, adjust=False).mean()
-    df['VTR_EMA'] = df['Volume_VTR'].ewm(span=21, adjust=False).mean()
-    df['TR_EMA13_day'] = df['Price_TR_day'].ewm(span=13, adjust=False).mean()
+    df['TR_EMA'] = ema('Price_TR', p['span_ema21'])
+    df['VTR_EMA'] = ema('Volume_VTR', p['span_ema21'])
+    df['TR_EMA13_day'] = ema('Price_TR_day', p['span_ema13'])
 
     # 2. Normalització i Ràtio Logarítmica
-    df['TR_Norm_EMA'] = min_max_scale_log(df['TR_EMA'])
-    df['VTR_Norm_EMA'] = min_max_scale_log(df['VTR_EMA'])
+    normalitza = lambda serie: min_max_scale_log(serie, p['normalitzacio'], p['finestra_normalitzacio'])
+    df['TR_Norm_EMA'] = normalitza(df['TR_EMA'])
+    df['VTR_Norm_EMA'] = normalitza(df['VTR_EMA'])
     MIN_SMOOTHING_FACTOR = 0.0001
     denominator_atr = np.maximum(df['VTR_Norm_EMA'], MIN_SMOOTHING_FACTOR) 
     df['Log_Volatility_Ratio'] = np.log( denominator_atr / df['TR_Norm_EMA'])
@@ -83,17 +223,17 @@ def dades_diaries(df, interval_type='diari'):
     # --- CÀLCULS DEL SISTEMA 2: TENDÈNCIA / PRESSIÓ (Preu / OBV) ---
     # ----------------------------------------------------------------------
 
-    df['OBV'] = calculate_obv(df)
-    df['OBV_EMA'] = df['OBV'].ewm(span=21, adjust=False).mean()
+    df['OBV'] = _memoritza(cache, ('obv',) + files(), lambda: calculate_obv(df))
+    df['OBV_EMA'] = ema('OBV', p['span_ema21'])
 
-    df['Close_EMA8'] = df['Close'].ewm(span=8, adjust=False).mean()
-    df['Close_EMA13'] = df['Close'].ewm(span=13, adjust=False).mean()
-    df['Close_EMA21'] = df['Close'].ewm(span=21, adjust=False).mean()
-    df['Close_EMA233'] = df['Close'].ewm(span=233, adjust=False).mean()
+    df['Close_EMA8'] = ema('Close', p['span_ema8'])
+    df['Close_EMA13'] = ema('Close', p['span_ema13'])
+    df['Close_EMA21'] = ema('Close', p['span_ema21'])
+    df['Close_EMA233'] = ema('Close', p['span_ema233'])
 
     # 3. Normalització i Ràtio Logarítmica
-    df['Close_EMA_Norm'] = min_max_scale_log(df['Close_EMA21'])
-    df['OBV_EMA_Norm'] = min_max_scale_log(df['OBV_EMA'])  
+    df['Close_EMA_Norm'] = normalitza(df['Close_EMA21'])
+    df['OBV_EMA_Norm'] = normalitza(df['OBV_EMA'])  
     denominator_obv = df['OBV_EMA_Norm'].replace(0, 1e-9)
     df['Log_Divergence_Ratio'] = np.log( denominator_obv / df['Close_EMA_Norm'])
     df['Prev_LDR'] = df['Log_Divergence_Ratio'].shift(1)
@@ -109,6 +249,8 @@ def dades_diaries(df, interval_type='diari'):
 
     # Neteja temporal de NaNs introduïts per les EMAs
     df.dropna(inplace=True) 
+    if compacte:
+        df.allibera(conserva=('Price_TR', 'VTR_EMA'))
 
     # -----------------------------------------------------------
     # FUNCIONS DE CÀLCUL D'INDICADORS (ADX, ATR, RSI)
@@ -117,27 +259,21 @@ def dades_diaries(df, interval_type='diari'):
     def calculate_adx(df, period=14):
         """Calcula l'Average Directional Index (ADX), +DI i -DI. (ADX manual)"""
         
-        df_adx = df.copy()
+        # Només es treballa amb les sèries necessàries (sense copiar tot el DataFrame)
+        high, low, close = df['High'], df['Low'], df['Close']
+        df_adx = pd.DataFrame(index=df.index)
 
         # 1. True Range (TR)
-        df_adx['H-L'] = df_adx['High'] - df_adx['Low']
-        df_adx['H-PC'] = np.abs(df_adx['High'] - df_adx['Close'].shift(1))
-        df_adx['L-PC'] = np.abs(df_adx['Low'] - df_adx['Close'].shift(1))
+        df_adx['H-L'] = high - low
+        df_adx['H-PC'] = np.abs(high - close.shift(1))
+        df_adx['L-PC'] = np.abs(low - close.shift(1))
         df_adx['TR'] = df_adx[['H-L', 'H-PC', 'L-PC']].max(axis=1)
 
         # 2. Directional Movement (+DM i -DM)
-        df_adx['+DM'] = np.where(
-            (df_adx['High'] - df_adx['High'].shift(1) > 0) & 
-            (df_adx['High'] - df_adx['High'].shift(1) > df_adx['Low'].shift(1) - df_adx['Low']), 
-            df_adx['High'] - df_adx['High'].shift(1), 
-            0
-        )
-        df_adx['-DM'] = np.where(
-            (df_adx['Low'].shift(1) - df_adx['Low'] > 0) & 
-            (df_adx['Low'].shift(1) - df_adx['Low'] > df_adx['High'] - df_adx['High'].shift(1)), 
-            df_adx['Low'].shift(1) - df_adx['Low'], 
-            0
-        )
+        puja = high - high.shift(1)
+        baixa = low.shift(1) - low
+        df_adx['+DM'] = np.where((puja > 0) & (puja > baixa), puja, 0)
+        df_adx['-DM'] = np.where((baixa > 0) & (baixa > puja), baixa, 0)
 
         # 3. ATR, +DI i -DI (Wilder's Smoothing)
         def wilder_smooth(series, period):
@@ -160,18 +296,28 @@ def dades_diaries(df, interval_type='diari'):
         return df_adx[['+DI', '-DI', 'ADX']]
 
 
-    df['ATR'] = AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close'], window=21).average_true_range()
-    df['ATR_Q5'] = df['ATR'].rolling(window=55).quantile(0.05)
-    df['ATR_Q90'] = df['ATR'].rolling(window=55).quantile(0.90)
+    periode = p['periode']
+    df['ATR'] = _memoritza(cache, ('atr', periode) + files(), lambda: AverageTrueRange(
+        high=df['High'], low=df['Low'], close=df['Close'], window=periode).average_true_range())
+
+    depen_ratios = ('span_ema21', 'normalitzacio', 'finestra_normalitzacio')
+
+    def quantil(columna, finestra, q, depen):
+        # 'depen' són els paràmetres dels quals depèn la columna: la clau de la cache
+        return _memoritza(cache, ('q', columna, finestra, q) + tuple(p[k] for k in depen) + files(),
+                          lambda: df[columna].rolling(window=finestra).quantile(q))
+
+    df['ATR_Q5'] = quantil('ATR', 55, 0.05, ('periode',))
+    df['ATR_Q90'] = quantil('ATR', 55, 0.90, ('periode',))
     
-    df['RSI'] = RSIIndicator(close=df['Close'], window=21).rsi()
+    df['RSI'] = _memoritza(cache, ('rsi', periode) + files(), lambda: RSIIndicator(close=df['Close'], window=periode).rsi())
 
     # Càlculs de Volum i Ràtios (REPV)
-    df['EMA13_Close'] = df['Close'].ewm(span=13, adjust=False).mean()
+    df['EMA13_Close'] = ema('Close', p['span_ema13'])
     df['SMA_55_Volume'] = df['Volume'].rolling(window=55).mean()
-    df['SMA_13_Volume'] = df['Volume'].rolling(window=21).mean()
-    df['Price_TR_ema8'] = df['Price_TR'].ewm(span=5, adjust=False).mean()
-    df['Volume_ema8'] = df['Volume'].ewm(span=5, adjust=False).mean()
+    df['SMA_13_Volume'] = df['Volume'].rolling(window=periode).mean()
+    df['Price_TR_ema8'] = ema('Price_TR', p['span_rapida'])
+    df['Volume_ema8'] = ema('Volume', p['span_rapida'])
 
     # Gestionar la divisió per zero
     denominator_atr = df['ATR'].replace(0, 1e-9)
@@ -183,9 +329,11 @@ def dades_diaries(df, interval_type='diari'):
 
     denominator_repv_r = df['REPV_R'].replace(0, 1e-9)
     df['IPE'] = df['Log_Divergence_Ratio'] / denominator_repv_r
+    if compacte:
+        df.allibera(conserva=('VTR_EMA',))
 
     # OSCIL·LADOR ESTOCÀSTIC (Preu)
-    period = 21
+    period = periode
     smooth_k = 1
     smooth_d = 3
 
@@ -197,7 +345,7 @@ def dades_diaries(df, interval_type='diari'):
     df['Slow_%D'] = df['Slow_%K'].rolling(window=smooth_d).mean()
 
     # OSCIL·LADOR RED - ESTOCÀSTIC
-    period_red = 21 
+    period_red = periode
     smooth_k_red = 3
     smooth_d_red = 3
 
@@ -214,7 +362,7 @@ def dades_diaries(df, interval_type='diari'):
     df['Slow_%RED-D'] = df['Slow_%RED-K'].rolling(window=smooth_d_red).mean()
     
     # OSCIL·LADOR ATR - ESTOCÀSTIC
-    period_atr = 21 
+    period_atr = periode
     smooth_k_atr = 3  
     smooth_d_atr = 3
 
@@ -231,15 +379,24 @@ def dades_diaries(df, interval_type='diari'):
     df['Slow_%ATR-D'] = df['Slow_%ATR-K'].rolling(window=smooth_d_atr).mean()
 
 
+    # En mode compacte els intermedis que queden s'alliberen abans de l'ADX i els quantils
+    if compacte:
+        df.allibera()
+
     # Afegir l'ADX calculat al DataFrame principal
-    df = df.join(calculate_adx(df), how='left')
+    # Mateix índex: s'assignen les columnes directament en lloc de fer un join (que copia el DataFrame)
+    adx = _memoritza(cache, ('adx', p['periode_adx']) + files(), lambda: calculate_adx(df, p['periode_adx']))
+    for columna in adx.columns:
+        df[columna] = adx[columna]
     
     # ----------------------------------------------------------------------
     # --- CÀLCUL DE LLINDARS DINÀMICS (ROLLING QUANTILE) ---
     # --- Integració de la lògica de llindars dins la funció ---
     # ----------------------------------------------------------------------
 
-    if interval_type == 'diari':
+    if p['finestra_quantil'] is not None:
+        WINDOW = p['finestra_quantil']
+    elif interval_type == 'diari':
         WINDOW = 250 # Aproximadament 1 any de trading
     elif interval_type == '4h':
         WINDOW = 72 # Aproximadament 12 dies (6 candeles/dia * 12 dies)
@@ -251,18 +408,111 @@ def dades_diaries(df, interval_type='diari'):
     window = min(WINDOW, len(df))
     
     # Càlcul dels percentils
-    df['LDR_Q10'] = df['Log_Divergence_Ratio'].rolling(window=window).quantile(0.10)
-    df['LDR_Q90'] = df['Log_Divergence_Ratio'].rolling(window=window).quantile(0.90)
-    df['LVR_Q10'] = df['Log_Volatility_Ratio'].rolling(window=window).quantile(0.10)
-    df['LVR_Q90'] = df['Log_Volatility_Ratio'].rolling(window=window).quantile(0.90)
-    df['REPV_R_Q10'] = df['REPV_R'].rolling(window=window).quantile(0.10)
-    df['REPV_R_Q90'] = df['REPV_R'].rolling(window=window).quantile(0.90)
+    df['LDR_Q10'] = quantil('Log_Divergence_Ratio', window, 0.10, depen_ratios)
+    df['LDR_Q90'] = quantil('Log_Divergence_Ratio', window, 0.90, depen_ratios)
+    df['LVR_Q10'] = quantil('Log_Volatility_Ratio', window, 0.10, depen_ratios)
+    df['LVR_Q90'] = quantil('Log_Volatility_Ratio', window, 0.90, depen_ratios)
+    df['REPV_R_Q10'] = quantil('REPV_R', window, 0.10, ('periode', 'span_rapida'))
+    df['REPV_R_Q90'] = quantil('REPV_R', window, 0.90, ('periode', 'span_rapida'))
     df['IPE_Q10'] = df['IPE'].rolling(window=window).quantile(0.10)
     df['IPE_Q90'] = df['IPE'].rolling(window=window).quantile(0.90)
 
     # Neteja final de NaNs introduïts pels Rolling Windows i altres càlculs
+    if compacte:
+        return df.resultat()
     df.dropna(inplace=True) 
 
     return df
 
+# ----------------------------------------------------------------------
+# --- SORTIDES COMPARTIDES (EXPORTACIÓ I GRÀFIQUES) ---
+# ----------------------------------------------------------------------
+
+def df_net(df):
+    df = df[['Close','Close_EMA21','Close_EMA233','Volume','SMA_55_Volume', 
+             'ATR', 'RSI','Log_Divergence_Ratio', 'Fast_%RED-K', 'REPV_R','REPV_R_Q10', 'REPV_R_Q90', # Afegits els quantils
+             'Log_Volatility_Ratio','LVR_Q10', 'LVR_Q90','RED','+DI','-DI','ADX' ]]
+    return df
+
+def df_net_raw(df):
+    df = df[['Close','ATR','Volume','SMA_55_Volume','Log_Volatility_Ratio', 'LVR_Q10', 'LVR_Q90',
+             'RED','REPV_R','REPV_R_Q10', 'REPV_R_Q90', # Afegits els quantils
+             'Fast_%RED-K', 'Slow_%RED-D']]
+    return df
 
+def exporta_dades(nom_fitxer, df, df_raw, df_raw_1):
+    """Escriu les darreres files de cada marc temporal en un fitxer de text."""
+    with open(nom_fitxer, 'w', encoding='utf-8') as f:
+        f.write('Dades del darrer tancament (Diari)\n')
+        f.write(df_net(df).tail(10).T.to_string())
+        f.write('\n\n Dades de les ultimes 24h (1h)\n')
+        f.write(df_net_raw(df_raw_1).tail(25).to_string())
+        f.write('\n\n Dades de les ultimes 24h (4h)\n')
+        f.write(df_net_raw(df_raw).tail(25).to_string())
+
+def grafica(df_raw, ticker, fitxer=None):
+    """Matriu 2x2 (preu, LDR, estocàstiques i LVR/REPV_R). Si s'indica 'fitxer' es desa en lloc de mostrar-la."""
+
+    fig, axes = plt.subplots(2, 2, figsize=(18, 10), sharex=True)
+    fig.suptitle(f"Anàlisi {ticker}", fontsize=10, y=0.98)
+
+    # --- GRÀFIC 1: RÀTIO LOGARÍTMICA (VOLATILITAT) - ÚS DE LLINDARS MÒBILS (df_raw) ---
+    ax1 = axes[1, 1]
+    ax1.plot(df_raw.index, df_raw['Log_Volatility_Ratio'], color='darkgreen', linewidth=1.5)
+    ax1.set_title("4. Fricció (LVR) i Cost (Vol/Preu)", fontsize=8)
+    ax1.plot(df_raw.index, df_raw['LVR_Q10'], color='darkgreen', linestyle='--', linewidth=0.8)
+    ax1.plot(df_raw.index, df_raw['LVR_Q90'], color='darkgreen', linestyle='--', linewidth=0.8)
+    ax1.grid(True, linestyle=':', alpha=0.8)
+    ax1.legend(['LVR'], loc='upper left')
+    ax1.tick_params(axis='y', labelcolor='darkgreen', labelsize=8)
+    ax1.tick_params(axis='x', rotation=45, labelsize=8)
+
+    # --- EIX Y DRETA: REPV_R (Magnitud, el COST) - ÚS DE LLINDARS MÒBILS (df_raw) ---
+    ax1_twin = ax1.twinx()  # Creació d'un segon Eix Y
+    ax1_twin.plot(df_raw.index, df_raw['REPV_R'], color='red', linewidth=1.5, label='REPV_R (Cost)')
+    ax1_twin.plot(df_raw.index, df_raw['REPV_R_Q10'], color='red', linestyle='--', linewidth=0.8)
+    ax1_twin.plot(df_raw.index, df_raw['REPV_R_Q90'], color='red', linestyle='--', linewidth=0.8)
+    ax1_twin.tick_params(axis='y', labelcolor='red', labelsize=8)
+    ax1_twin.legend(['Cost'], loc='lower left')
+
+    # --- GRÀFIC 2: COMPONENTS NORMALITZADES (RED STOCHASTIC) ---
+    ax2 = axes[0, 1]
+    ax2.set_title("2. LDR", fontsize=8)
+    ax2.plot(df_raw.index, df_raw['Log_Divergence_Ratio'], color='purple', linewidth=1.5)
+    ax2.plot(df_raw.index, df_raw['LDR_Q10'], color='purple', linestyle='--', linewidth=0.8)
+    ax2.plot(df_raw.index, df_raw['LDR_Q90'], color='purple', linestyle='--', linewidth=0.8)
+    ax2.tick_params(axis='y', labelcolor='blue', labelsize=8)
+    ax2.grid(True, linestyle=':', alpha=0.8)
+
+    # --- GRÀFIC 3: RÀTIO LOGARÍTMICA (DIVERGÈNCIA / OBV) - ÚS DE LLINDARS MÒBILS (df) ---
+    ax3 = axes[1, 0]
+    ax3.plot(df_raw.index, df_raw['Slow_%D'], color='blue', linewidth=2, label='Preu')
+    ax3.plot(df_raw.index, df_raw['Slow_%ATR-D'], color='green', linewidth=2, label='ATR')
+    ax3.plot(df_raw.index, df_raw['Slow_%RED-D'], color='red', linewidth=2, label='V-ATR')
+    ax3.axhline(y=20, color='blue', linestyle='--', linewidth=0.5)
+    ax3.axhline(y=80, color='blue', linestyle='--', linewidth=0.5)
+    ax3.axhline(y=50, color='red', linestyle='--', linewidth=0.5)
+    ax3.set_title("3.Estocastics", fontsize=8)
+    ax3.grid(True, linestyle=':', alpha=0.8)
+    ax3.legend(loc='upper left')
+    ax3.tick_params(axis='x', rotation=45, labelsize=8)
+    ax3.tick_params(axis='y', labelcolor='purple', labelsize=8)
+
+    # --- GRÀFIC 4: COMPONENTS DE PREU I TENDÈNCIA ---
+    ax4 = axes[0, 0]
+    ax4.set_ylabel('Preu', fontsize=8)
+    ax4.grid(True, linestyle='--', alpha=0.8)
+    ax4.set_title("1. Preu i EMAs", fontsize=8)
+    ax4.plot(df_raw.index, df_raw['Close'], label='Preu', color='black', alpha=0.7, linewidth=1.5)
+    ax4.plot(df_raw.index, df_raw['Close_EMA13'], label='EMA 13', color='blue', linewidth=2)
+    ax4.plot(df_raw.index, df_raw['Close_EMA233'], label='EMA 233', color='violet', linewidth=2)
+    ax4.legend(loc='upper left')
+    ax4.tick_params(axis='y', labelsize=8)
+
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+    if fitxer is not None:
+        fig.savefig(fitxer)
+        plt.close(fig)
+        return fitxer
+    return plt.show()
@@ -1,10 +1,11 @@
-import yfinance as yf
 from google import genai
 from google.genai import types
 import os # Importem el mòdul os per accedir a les variables d'entorn
 from dotenv import load_dotenv # Importem la funció per carregar .env
 import requests
 import Dades_actiu_aux as aux
+from Descarrega import descarrega_lot
+from Qualitat_dades import informe_marcs, resum_prompt
 
 # Carrega les variables d'entorn del fitxer .env
 load_dotenv() 
@@ -21,26 +22,39 @@ def envia_missatge(text):
     # print(f"Estat de l'enviament a Telegram: {resposta.json()}")
 
 # 1. Extreure les dades de Yahoo Finance
-ticker = "^IBEX"
-
-# Descarregar les dades històriques
-df = yf.download(ticker, period="2y", interval='1d')
-df_raw_1 = yf.download(ticker, period="3mo", interval='1h')
-df_raw = yf.download(ticker, period="3mo", interval='4h')
-
-df = aux.dades_diaries(df,interval_type='diari')
-df_raw = aux.dades_diaries(df_raw,interval_type='4h')
-df_raw_1 = aux.dades_diaries(df_raw_1, interval_type='1h')
-
-df = df.tail(90)
-df_raw = df_raw.tail(72)
-df_raw_1 = df_raw_1.tail(72)
-
-# Inicialitza el client passant la clau directament.
-client = genai.Client(api_key=GEMINI_API_KEY)
-print(f"Generant informe...")  # --- 3. CONSTRUCCIÓ DEL PROMPT FINAL ---
-
-prompt = f"""
+def descarrega_dades(ticker, magatzem=None, parametres=None):
+    """
+    Descarrega les dades històriques i calcula els indicadors (Diari, 4h i 1h).
+    Amb un MagatzemIndicadors (Magatzem_indicadors.py) els indicadors ja calculats es reaprofiten.
+    'parametres' per a dades_diaries (per defecte els seus). Les descàrregues són de període
+    mòbil: amb la normalització 'global' el magatzem ho recalcula tot a cada crida, així que
+    per reaprofitar-lo cal passar un mode sense repintat ({'normalitzacio': 'expansiva'}).
+    """
+    dades = descarrega_lot([(ticker, '1d', '2y'), (ticker, '4h', '3mo'), (ticker, '1h', '3mo')])
+    df, df_raw, df_raw_1 = dades[(ticker, '1d')], dades[(ticker, '4h')], dades[(ticker, '1h')]
+
+    if magatzem is not None:
+        return (magatzem.obte(ticker, '1d', df, parametres=parametres),
+                magatzem.obte(ticker, '4h', df_raw, parametres=parametres),
+                magatzem.obte(ticker, '1h', df_raw_1, parametres=parametres))
+
+    df = aux.dades_diaries(df,interval_type='diari', parametres=parametres)
+    df_raw = aux.dades_diaries(df_raw,interval_type='4h', parametres=parametres)
+    df_raw_1 = aux.dades_diaries(df_raw_1, interval_type='1h', parametres=parametres)
+
+    return df, df_raw, df_raw_1
+
+def construeix_prompt(df, df_raw, df_raw_1, qualitat=None):
+    """
+    Construeix el prompt amb les darreres files de cada marc temporal.
+    'qualitat' és el resum de Qualitat_dades.resum_prompt (opcional).
+    """
+    bloc_qualitat = f"*** QUALITAT DE LES DADES ***\n{qualitat}\n" if qualitat else ""
+    df = df.tail(90)
+    df_raw = df_raw.tail(72)
+    df_raw_1 = df_raw_1.tail(72)
+
+    prompt = f"""
   [ROL I INSTRUCCIONS]
   **ROL:** Ets un trader especialitzat en mercats volatils amb poca liquidtat amb vocacio divulgativa.
   
@@ -74,7 +88,7 @@ Força de Volum: Indica les variacion de volum important sobretot respecte a la
 
 Direccio del Volum: Indica si es produeixen en caigudes o pujades.
 
-Abesencia de dades: Informe de la falta de dades en el marc que toqui i com dificulta el analisi.
+Abesencia de dades: Informe de la falta de dades en el marc que toqui i com dificulta el analisi. Si hi ha el bloc de qualitat de les dades, fes-lo servir (barres que falten, duplicats, volum zero, preus estancats i espelmes anomales).
 
 C. Avaluació de la Volatilitat i l'Impuls (LVR, ATR, REPV_R)
 Extrems de Volatilitat: El valor de l'ATR està per sota del seu Q5 (volatilitat mínima) o per sobre del Q90 (volatilitat màxima)? Això suggereix un potencial d'expansió o contracció imminent de la volatilitat.
@@ -107,6 +121,7 @@ El informe ha de ser de **no mes de 250 paraules** , estructurat en blocs i no u
 
 [DADES A CONTINUACIO]
 
+{bloc_qualitat}
 *** DADES 1D***
 {df}
 
@@ -116,8 +131,7 @@ El informe ha de ser de **no mes de 250 paraules** , estructurat en blocs i no u
 *** DADES DE 1H ***
 {df_raw_1}
 """
-
-
+    return prompt
 
 # Definim la configuració per a totes les crides a l'API
 configuracio_ia = types.GenerateContentConfig(
@@ -128,19 +142,34 @@ configuracio_ia = types.GenerateContentConfig(
     # stop_sequences=['.']  # Opcional: Aturar-se en un punt
 )
 
-  # 2. Fes la crida a l'API
-try:
-  response = client.models.generate_content(
-    model="gemini-2.5-flash",
-    contents=prompt,
-    config=configuracio_ia)    
+def genera_informe(df, df_raw, df_raw_1, qualitat=None):
+    """Genera l'informe amb Gemini i l'envia per Telegram. Retorna el text (o None)."""
+    # Inicialitza el client passant la clau directament.
+    client = genai.Client(api_key=GEMINI_API_KEY)
+    print(f"Generant informe...")  # --- 3. CONSTRUCCIÓ DEL PROMPT FINAL ---
+
+    prompt = construeix_prompt(df, df_raw, df_raw_1, qualitat)
+
+    # 2. Fes la crida a l'API
+    try:
+      response = client.models.generate_content(
+        model="gemini-2.5-flash",
+        contents=prompt,
+        config=configuracio_ia)    
+
+      # 3. Emmagatzema el resultat
+      # horoscops_generats[signe] = response.text
+      print(response.text)
+      envia_missatge(response.text)
+      return response.text
 
-  # 3. Emmagatzema el resultat
-  # horoscops_generats[signe] = response.text
-  print(response.text)
-  envia_missatge(response.text)
+    except Exception as e:
+      print(f"❌ ERROR. {e}")
 
-except Exception as e:
-  print(f"❌ ERROR. {e}")
 
+if __name__ == "__main__":
+    ticker = "^IBEX"
 
+    df, df_raw, df_raw_1 = descarrega_dades(ticker)
+    qualitat = resum_prompt(informe_marcs(ticker, {'1d': df, '4h': df_raw, '1h': df_raw_1}))
+    genera_informe(df, df_raw, df_raw_1, qualitat)
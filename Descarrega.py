@@ -0,0 +1,150 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+
+# ----------------------------------------------------------------------
+# --- CAPA D'ACCÉS A DADES: DESCÀRREGUES AGRUPADES PER INTERVAL ---
+# ----------------------------------------------------------------------
+# Totes les peticions (ticker, interval, període) d'una execució s'agrupen per
+# interval i es fa una sola crida a yf.download per interval, amb el període
+# més llarg demanat; després cada ticker es retalla al seu període. El resultat
+# es reparteix en un DataFrame per ticker amb columnes planes (Open, High, Low,
+# Close, Volume) sense copiar les dades: cada ticker és una vista (copy-on-write)
+# del seu bloc de columnes. Només es copia un ticker amb forats al mig (sessions
+# en què cotitzen els altres, p. ex. els caps de setmana d'una acció al costat de
+# la cripto), perquè treure aquelles files no es pot fer amb una vista.
+
+UNITATS_PERIODE = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+
+def _desplacament_periode(periode):
+    """'3mo' -> pd.DateOffset(months=3); None per a 'max'."""
+    if periode == 'max':
+        return None
+    if periode == 'ytd':
+        return pd.offsets.YearBegin(0)
+    for sufix, unitat in UNITATS_PERIODE.items():
+        if periode.endswith(sufix) and periode[:-len(sufix)].isdigit():
+            return pd.DateOffset(**{unitat: int(periode[:-len(sufix)])})
+    raise ValueError(f"Període desconegut: {periode}")
+
+def _mes_llarg(periodes):
+    """Període que cobreix tots els altres (comparant-los a partir d'avui)."""
+    if 'max' in periodes:
+        return 'max'
+    avui = pd.Timestamp.today().normalize()
+    return min(periodes, key=lambda p: avui - _desplacament_periode(p))
+
+def _retalla(df, periode, periode_descarregat):
+    """Retalla un DataFrame al seu període si s'ha descarregat amb un de més llarg."""
+    if periode == periode_descarregat or df.empty:
+        return df
+    desplacament = _desplacament_periode(periode)
+    if desplacament is None:
+        return df
+    inici = df.index[-1].normalize() - desplacament
+    return df[df.index >= inici]
+
+def normalitza_columnes(df):
+    """
+    Columnes planes (Open, High, Low, Close, Volume) a partir de les MultiIndex de yfinance.
+
+    yf.download retorna (Price, Ticker) o (Ticker, Price) segons 'group_by'; si només hi
+    ha un ticker es descarta el seu nivell. No copia les dades.
+    """
+    if not isinstance(df.columns, pd.MultiIndex):
+        return df
+    for nivell in range(df.columns.nlevels):
+        if 'Close' in df.columns.get_level_values(nivell):
+            altres = [n for n in range(df.columns.nlevels) if n != nivell]
+            if all(df.columns.get_level_values(n).nunique() == 1 for n in altres):
+                df = df.set_axis(df.columns.get_level_values(nivell), axis=1)
+            break
+    return df
+
+def separa_tickers(data, tickers):
+    """
+    Reparteix el resultat d'un yf.download de diversos tickers en {ticker: DataFrame}.
+
+    Les files buides del ticker (dies que només cotitzen els altres) es descarten
+    (vegeu _sense_files_buides). Amb copy-on-write modificar un DataFrame retornat
+    no afecta 'data'.
+    """
+    if not isinstance(data.columns, pd.MultiIndex):
+        df = _sense_files_buides(data) if len(tickers) == 1 else None
+        return {tickers[0]: df} if df is not None else {}
+
+    # Nivell de les columnes que conté els tickers
+    nivell = next(n for n in range(data.columns.nlevels)
+                  if set(tickers) & set(data.columns.get_level_values(n)))
+    presents = set(data.columns.get_level_values(nivell))
+
+    dades = {}
+    for ticker in tickers:
+        if ticker not in presents:
+            continue
+        df = _sense_files_buides(data.xs(ticker, axis=1, level=nivell))
+        if df is not None:
+            dades[ticker] = df
+    return dades
+
+def _sense_files_buides(df):
+    """
+    Treu les files sense cap valor. Les del principi i del final (abans de cotitzar,
+    després de deixar-ho) es retallen amb un tall de posicions, que és una vista; només
+    si queden forats al mig cal seleccionar les files una a una, que copia. None si no hi ha dades.
+    """
+    plenes = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+    if len(plenes) == 0:
+        return None
+    df = df.iloc[plenes[0]:plenes[-1] + 1]
+    if len(plenes) < len(df):
+        df = df.iloc[plenes - plenes[0]]
+    return df
+
+def descarrega_lot(peticions, **kwargs):
+    """
+    Descarrega un conjunt de peticions amb una sola crida a yf.download per interval.
+
+    Args:
+        peticions (iterable): Tuples (ticker, interval, periode), p. ex. ('BTC-USD', '1h', '3mo').
+        **kwargs: Arguments addicionals per a yf.download (p. ex. auto_adjust).
+
+    Returns:
+        dict: (ticker, interval) -> DataFrame OHLCV. Les peticions sense dades no hi apareixen;
+              si falla la crida d'un interval, s'informa i se segueix amb la resta.
+    """
+    per_interval = {}
+    for ticker, interval, periode in peticions:
+        per_interval.setdefault(interval, {}).setdefault(ticker, []).append(periode)
+
+    resultat = {}
+    for interval, per_ticker in per_interval.items():
+        tickers = list(per_ticker)
+        periode = _mes_llarg([p for periodes in per_ticker.values() for p in periodes])
+        try:
+            data = yf.download(tickers, period=periode, interval=interval, group_by='ticker',
+                               progress=False, **kwargs)
+        except Exception as e:
+            print(f"❌ ERROR descarregant {interval}: {e}")
+            continue
+        for ticker, df in separa_tickers(data, tickers).items():
+            # Si un ticker es demana amb diversos períodes, es retorna el més llarg
+            resultat[(ticker, interval)] = _retalla(df, _mes_llarg(per_ticker[ticker]), periode)
+    return resultat
+
+def descarrega(tickers, interval='1d', periode='1y', **kwargs):
+    """Una sola crida per a diversos tickers del mateix interval. Retorna {ticker: DataFrame}."""
+    dades = descarrega_lot(((t, interval, periode) for t in tickers), **kwargs)
+    return {ticker: df for (ticker, _), df in dades.items()}
+
+def columna(dades, nom='Close', tickers=None):
+    """DataFrame amb una columna per ticker (p. ex. els tancaments) a partir de {ticker: DataFrame}."""
+    tickers = tickers or list(dades)
+    return pd.DataFrame({ticker: dades[ticker][nom] for ticker in tickers if ticker in dades})
+
+
+if __name__ == "__main__":
+    peticions = [(t, i, p) for t in ("BTC-USD", "ETH-USD", "^IBEX")
+                 for i, p in (('1d', '2y'), ('4h', '3mo'), ('1h', '3mo'))]
+    for (ticker, interval), df in descarrega_lot(peticions).items():
+        print(f"{ticker} {interval}: {len(df)} files, {list(df.columns)}")
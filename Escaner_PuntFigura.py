@@ -0,0 +1,101 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from PuntFigura import PuntFigura, senyals, calcular_tamany_caixa, NOMS_SENYALS
+
+# Configuració de Pandas
+pd.set_option('display.max_rows', None)
+pd.set_option('display.max_columns', None)
+
+# ----------------------------------------------------------------------
+# --- ESCÀNER DE SENYALS P&F (GRAELLA DE CAIXES I REVERSALS) ---
+# ----------------------------------------------------------------------
+
+# Matriu de preus compartida pels processos (s'hereta/copia un cop per procés)
+_PREUS = {}
+
+def _inicialitza(preus, index):
+    _PREUS['preus'] = preus
+    _PREUS['index'] = index
+
+def _escaneja_ticker(tasca):
+    """Construeix tots els gràfics de la graella per a un ticker i n'extreu els senyals."""
+    col, ticker, graella = tasca
+    serie = _PREUS['preus'][:, col]
+    valids = ~np.isnan(serie)
+    close = serie[valids]
+    dates = _PREUS['index'][valids]
+    if len(close) == 0:
+        return []
+
+    files = []
+    for escala, caixa, revers in graella:
+        if caixa == 'auto':
+            caixa = calcular_tamany_caixa(close[-1])
+        pf = PuntFigura(caixa, revers, escala).afegeix(close=close)
+        s = senyals(pf)
+        columnes = pf.columnes()
+        darrera = pf.n_columnes - 1
+        for j, codi, nivell in zip(s['columna'], s['senyal'], s['caixa']):
+            files.append({
+                'Ticker': ticker,
+                'Escala': escala,
+                'Caixa': caixa,
+                'Revers': revers,
+                'Columna': int(j),
+                'Data_Columna': dates[columnes['barra'][j]],
+                'Senyal': NOMS_SENYALS[codi],
+                'Preu_Senyal': float(pf.preu(nivell)),
+                'Actiu': j == darrera,
+            })
+    return files
+
+def escaneja(preus, caixes=(0.01, 0.02, 0.03), reversals=(3,), escala='pct',
+             processos=None, nomes_actius=False):
+    """
+    Escaneja senyals de P&F per a tots els tickers i totes les combinacions de la graella.
+
+    Args:
+        preus (pd.DataFrame): Preus de tancament (temps x ticker).
+        caixes (iterable): Mides de caixa ('pct': fracció, 'abs': preu, 'auto': taula clàssica,
+                           que és un preu i per tant sempre es construeix amb escala 'abs').
+        reversals (iterable): Nombre de caixes de reversal.
+        escala (str): 'pct' o 'abs'.
+        processos (int): Processos a utilitzar (1 = sense pool).
+        nomes_actius (bool): Retorna només els senyals de la darrera columna.
+
+    Returns:
+        pd.DataFrame: Un senyal per fila.
+    """
+    # calcular_tamany_caixa dona una caixa absoluta (en preu): 'auto' no es pot fer servir en 'pct'
+    graella = [('abs' if caixa == 'auto' else escala, caixa, revers) for caixa in caixes for revers in reversals]
+    matriu = preus.to_numpy(dtype=np.float64)
+    index = preus.index.to_numpy()
+    tasques = [(i, ticker, graella) for i, ticker in enumerate(preus.columns)]
+
+    processos = processos or os.cpu_count() or 1
+    if processos == 1:
+        _inicialitza(matriu, index)
+        resultats = [_escaneja_ticker(t) for t in tasques]
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_inicialitza,
+                                 initargs=(matriu, index)) as pool:
+            resultats = list(pool.map(_escaneja_ticker, tasques))
+
+    taula = pd.DataFrame([fila for files in resultats for fila in files])
+    if nomes_actius and not taula.empty:
+        taula = taula[taula['Actiu']]
+    return taula.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    tickers = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
+               "SOL-USD", "DOGE-USD", "DOT-USD", "TRX-USD", "LINK-USD"]
+
+    # Una sola descàrrega: tots els gràfics de la graella comparteixen la mateixa matriu
+    preus = yf.download(tickers, period='1y', interval='1d')['Close']
+
+    taula = escaneja(preus, caixes=(0.01, 0.02, 0.03), reversals=(3, 5), nomes_actius=True)
+    print(taula.to_string())
@@ -0,0 +1,145 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import Dades_actiu_aux as aux
+from Descarrega import normalitza_columnes
+from Backtest import backtest_condicions, ESTRATEGIES
+
+# Configuració de Pandas
+pd.set_option('display.max_rows', None)
+pd.set_option('display.max_columns', None)
+
+# ----------------------------------------------------------------------
+# --- ESCOMBRAT DE PARÀMETRES DE DADES_DIARIES ---
+# ----------------------------------------------------------------------
+# Les dades OHLCV es publiquen un sol cop en memòria compartida i cada procés
+# hi accedeix sense còpia. Cada procés manté la seva cache de dades_diaries
+# (OBV, ATR, RSI, ADX, EMAs per span i quantils), de manera que els punts de la
+# graella que comparteixen paràmetres no es recalculen.
+
+COLUMNES_OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Ordre en què s'agrupen els punts: els paràmetres més cars primer, perquè els
+# punts consecutius (i per tant del mateix bloc) comparteixin més resultats
+ORDRE_PARAMETRES = ['periode', 'periode_adx', 'span_ema21', 'span_rapida', 'span_ema13',
+                    'span_ema8', 'span_ema233', 'finestra_quantil']
+
+def graella(**valors):
+    """
+    Producte cartesià de valors de paràmetres.
+
+    Exemple: graella(periode=[14, 21], span_ema21=[13, 21, 34]) -> 6 dicts.
+    """
+    noms = sorted(valors, key=lambda k: ORDRE_PARAMETRES.index(k) if k in ORDRE_PARAMETRES else len(ORDRE_PARAMETRES))
+    return [dict(zip(noms, combinacio)) for combinacio in itertools.product(*(valors[k] for k in noms))]
+
+# Estat de cada procés (s'omple a _inicialitza)
+_DADES = {}
+
+def _inicialitza(nom_memoria, forma, index, interval_type, estrategies, comissio, interval, ticker=None):
+    memoria = shared_memory.SharedMemory(name=nom_memoria)
+    matriu = np.ndarray(forma, dtype=np.float64, buffer=memoria.buf)
+    _DADES['memoria'] = memoria  # cal mantenir la referència viva
+    _DADES['df'] = pd.DataFrame(matriu, index=index, columns=COLUMNES_OHLCV, copy=False)
+    _DADES['cache'] = {}
+    _DADES['config'] = (interval_type, estrategies, comissio, interval, ticker)
+
+def comparteix_ohlcv(df):
+    """
+    Copia les columnes OHLCV a un bloc de memòria compartida.
+
+    Returns:
+        tuple: (memoria, forma, index). Cal tancar i alliberar (unlink) la memòria en acabar.
+    """
+    ohlcv = df[COLUMNES_OHLCV].dropna()
+    matriu = ohlcv.to_numpy(dtype=np.float64)
+    memoria = shared_memory.SharedMemory(create=True, size=max(matriu.nbytes, 1))
+    np.ndarray(matriu.shape, dtype=np.float64, buffer=memoria.buf)[:] = matriu
+    return memoria, matriu.shape, ohlcv.index
+
+def executa_en_pool(funcio, tasques, initargs, processos):
+    """Executa 'funcio' sobre les tasques amb els processos inicialitzats amb _inicialitza."""
+    if processos == 1:
+        _inicialitza(*initargs)
+        try:
+            return [funcio(t) for t in tasques]
+        finally:
+            _DADES.clear()
+    with ProcessPoolExecutor(max_workers=processos, initializer=_inicialitza,
+                             initargs=initargs) as pool:
+        return list(pool.map(funcio, tasques))
+
+def _avalua_bloc(bloc):
+    """Avalua un bloc de punts de la graella; retorna una fila per (punt, estratègia)."""
+    interval_type, estrategies, comissio, interval, ticker = _DADES['config']
+    files = []
+    for i, parametres in bloc:
+        df = aux.dades_diaries(_DADES['df'], interval_type, parametres, _DADES['cache'])
+        metriques, _ = backtest_condicions(df, estrategies, comissio, interval, ticker)
+        for estrategia, fila in metriques.iterrows():
+            files.append({'Punt': i, **parametres, 'Estrategia': estrategia, **fila.to_dict()})
+    return files
+
+def escombra(df, punts, estrategies=ESTRATEGIES, interval='1h', interval_type=None,
+             comissio=0.001, processos=None, mida_bloc=None, ticker=None, normalitzacio='expansiva'):
+    """
+    Avalua totes les estratègies per a cada punt de la graella de paràmetres.
+
+    Args:
+        df (pd.DataFrame): Dades OHLCV.
+        punts (list): Llista de dicts de paràmetres (vegeu graella()).
+        interval (str): '1h', '4h' o '1d' (per anualitzar les mètriques).
+        interval_type (str): Tipus de dades_diaries; per defecte es dedueix de 'interval'.
+        ticker (str): Per anualitzar amb el calendari del mercat (vegeu Backtest.barres_any).
+        normalitzacio (str): Mode de min_max_scale_log dels punts que no n'indiquen cap
+            (per defecte 'expansiva', sense mirar barres futures com 'global').
+        processos (int): Processos a utilitzar (1 = sense pool).
+        mida_bloc (int): Punts per tasca; per defecte uns quants blocs per procés.
+
+    Returns:
+        pd.DataFrame: Paràmetres i mètriques de cada (punt, estratègia).
+    """
+    df = normalitza_columnes(df)
+    interval_type = interval_type or ('diari' if interval == '1d' else interval)
+    punts = [{'normalitzacio': normalitzacio, **p} for p in punts]
+
+    punts = sorted(enumerate(punts), key=lambda ip: tuple(str(ip[1].get(k)) for k in ORDRE_PARAMETRES))
+    processos = processos or os.cpu_count() or 1
+    mida_bloc = mida_bloc or max(1, -(-len(punts) // (processos * 4)))
+    blocs = [punts[i:i + mida_bloc] for i in range(0, len(punts), mida_bloc)]
+
+    memoria, forma, index = comparteix_ohlcv(df)
+    try:
+        initargs = (memoria.name, forma, index, interval_type, estrategies, comissio, interval, ticker)
+        resultats = executa_en_pool(_avalua_bloc, blocs, initargs, processos)
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+    taula = pd.DataFrame([fila for files in resultats for fila in files])
+    return taula.sort_values('Punt', kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import time
+
+    ticker = "BTC-USD"
+    df = yf.download(ticker, period='730d', interval='1h', progress=False)
+
+    punts = graella(periode=[14, 21, 28],
+                    periode_adx=[14, 21],
+                    span_ema21=[13, 21, 34],
+                    span_rapida=[3, 5, 8],
+                    finestra_quantil=[144, 288, 576])
+
+    inici = time.time()
+    taula = escombra(df, punts, interval='1h', ticker=ticker)
+    print(f"{len(punts)} punts avaluats en {time.time() - inici:.0f} s")
+
+    # Millor punt per estratègia segons el Sharpe
+    millors = taula.loc[taula.groupby('Estrategia')['Sharpe'].idxmax()]
+    print(millors.round(2).to_string())
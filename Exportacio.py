@@ -0,0 +1,247 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+
+# ----------------------------------------------------------------------
+# --- MAGATZEM COLUMNAR D'INDICADORS (TICKER / INTERVAL / MES) ---
+# ----------------------------------------------------------------------
+# Cada partició és un directori <ticker>/<interval>/<AAAA-MM> amb un fitxer binari
+# per columna (valors en brut, un darrere l'altre) i un esquema.json amb les
+# columnes, els tipus i el nombre de files escrites. Afegir files és escriure al
+# final de cada fitxer; llegir és obrir-los amb np.memmap sense parsejar res.
+
+COLUMNA_TEMPS = '_temps'  # nanosegons UTC (int64)
+
+# --- Directori de columnes (una partició) ---
+
+def _cami_columna(directori, columna):
+    # Noms com '+DI' o 'Slow_%D' són vàlids com a noms de fitxer
+    return os.path.join(directori, columna.replace('/', '_') + '.bin')
+
+def llegeix_esquema(directori):
+    """Esquema d'un directori de columnes, o None si encara no existeix."""
+    cami = os.path.join(directori, 'esquema.json')
+    if not os.path.exists(cami):
+        return None
+    with open(cami, encoding='utf-8') as f:
+        return json.load(f)
+
+def _desa_esquema(directori, esquema):
+    # S'escriu a un temporal i es reanomena: l'esquema mai queda a mitges
+    temporal = os.path.join(directori, 'esquema.json.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(esquema, f)
+    os.replace(temporal, os.path.join(directori, 'esquema.json'))
+
+def _temps_utc(index):
+    """Índex de dates -> (DatetimeIndex UTC en ns, zona horària original o None)."""
+    index = pd.DatetimeIndex(index)
+    tz = str(index.tz) if index.tz is not None else None
+    utc = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+    return utc.as_unit('ns'), tz
+
+def ultim_temps(directori):
+    """Darrer timestamp (ns UTC) escrit en un directori de columnes, o None."""
+    esquema = llegeix_esquema(directori)
+    if esquema is None or esquema['files'] == 0:
+        return None
+    temps = np.memmap(_cami_columna(directori, COLUMNA_TEMPS), dtype=np.int64, mode='r')
+    return int(temps[esquema['files'] - 1])
+
+def afegeix_columnes(directori, df):
+    """
+    Afegeix totes les files de 'df' al final d'un directori de columnes.
+
+    Només es guarden les columnes numèriques. Si apareix una columna nova, les
+    files anteriors s'omplen amb NaN; si en falta alguna, les files noves porten
+    NaN en aquella columna.
+    """
+    df = df.select_dtypes(include=[np.number, 'bool'])
+    utc, tz = _temps_utc(df.index)
+
+    os.makedirs(directori, exist_ok=True)
+    esquema = llegeix_esquema(directori) or {'columnes': {COLUMNA_TEMPS: 'int64'}, 'files': 0, 'tz': tz}
+
+    # Columnes noves: es completen les files existents amb NaN (o zeros si no és float)
+    for columna in df.columns:
+        if columna not in esquema['columnes']:
+            dtype = np.dtype(df[columna].dtype)
+            dtype = dtype if dtype.kind in 'fiub' else np.dtype(np.float64)
+            if esquema['files']:
+                buit = np.full(esquema['files'], np.nan if dtype.kind == 'f' else 0, dtype=dtype)
+                buit.tofile(_cami_columna(directori, columna))
+            esquema['columnes'][columna] = dtype.str
+
+    # Primer s'escriuen les dades i després l'esquema amb el nou nombre de files:
+    # si el procés s'interromp, les files a mitges simplement no es llegeixen.
+    for columna, dtype in esquema['columnes'].items():
+        if columna == COLUMNA_TEMPS:
+            valors = utc.asi8
+        elif columna in df.columns:
+            valors = df[columna].to_numpy(dtype=np.dtype(dtype))
+        else:
+            valors = np.full(len(df), np.nan if np.dtype(dtype).kind == 'f' else 0, dtype=dtype)
+        cami = _cami_columna(directori, columna)
+        # Descarta restes d'una escriptura interrompuda abans d'afegir
+        if os.path.exists(cami):
+            with open(cami, 'r+b') as f:
+                f.truncate(esquema['files'] * np.dtype(dtype).itemsize)
+        with open(cami, 'ab') as f:
+            np.ascontiguousarray(valors).tofile(f)
+
+    esquema['files'] += len(df)
+    _desa_esquema(directori, esquema)
+
+def llegeix_columnes(directori, columnes=None):
+    """Retorna (temps, dict columna -> np.memmap, tz) d'un directori, sense copiar les dades."""
+    esquema = llegeix_esquema(directori)
+    n = esquema['files']
+    columnes = columnes or [c for c in esquema['columnes'] if c != COLUMNA_TEMPS]
+
+    def mapa(columna, dtype):
+        if n == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(_cami_columna(directori, columna), dtype=dtype, mode='r', shape=(n,))
+
+    temps = mapa(COLUMNA_TEMPS, np.int64)
+    valors = {c: mapa(c, np.dtype(esquema['columnes'][c])) if c in esquema['columnes']
+              else np.full(n, np.nan) for c in columnes}
+    return temps, valors, esquema['tz']
+
+def a_dataframe(temps, valors, tz):
+    """Construeix un DataFrame amb l'índex a la zona horària original."""
+    index = pd.DatetimeIndex(pd.to_datetime(np.asarray(temps), unit='ns', utc=True))
+    index = index.tz_convert(tz) if tz else index.tz_localize(None)
+    return pd.DataFrame(valors, index=index)
+
+
+class MagatzemColumnar:
+
+    def __init__(self, directori='dades_columnar'):
+        self.directori = directori
+
+    def _directori_serie(self, ticker, interval):
+        return os.path.join(self.directori, ticker.replace('/', '_'), interval)
+
+    def particions(self, ticker, interval):
+        """Mesos (AAAA-MM) guardats per a (ticker, interval), ordenats."""
+        directori = self._directori_serie(ticker, interval)
+        if not os.path.isdir(directori):
+            return []
+        return sorted(m for m in os.listdir(directori)
+                      if os.path.exists(os.path.join(directori, m, 'esquema.json')))
+
+    # --- Escriptura ---
+
+    def _ultim_temps(self, ticker, interval):
+        """Darrer timestamp guardat (ns UTC) i zona horària original, o (None, None)."""
+        mesos = self.particions(ticker, interval)
+        if not mesos:
+            return None, None
+        directori = os.path.join(self._directori_serie(ticker, interval), mesos[-1])
+        return ultim_temps(directori), llegeix_esquema(directori)['tz']
+
+    def ultima_data(self, ticker, interval):
+        """Darrer timestamp guardat (pd.Timestamp) o None si no hi ha res."""
+        ultim, tz = self._ultim_temps(ticker, interval)
+        if ultim is None:
+            return None
+        data = pd.Timestamp(ultim, tz='UTC')
+        return data.tz_convert(tz) if tz else data.tz_localize(None)
+
+    def afegeix(self, ticker, interval, df):
+        """
+        Afegeix les files de 'df' a partir de la darrera data guardada, repartides
+        per mesos (vegeu afegeix_columnes). La darrera fila guardada es torna a
+        escriure: la darrera barra descarregada pot estar encara oberta.
+
+        Returns:
+            int: Nombre de files escrites.
+        """
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.droplevel(1)
+
+        utc, _ = _temps_utc(df.index)
+        ultim, _ = self._ultim_temps(ticker, interval)
+        if ultim is not None:
+            noves = utc.asi8 >= ultim
+            df, utc = df[noves], utc[noves]
+            if df.empty:
+                return 0
+            # Les files des de la primera barra nova es descarten del darrer mes i es tornen a escriure
+            directori = os.path.join(self._directori_serie(ticker, interval), self.particions(ticker, interval)[-1])
+            esquema = llegeix_esquema(directori)
+            # Còpia dels temps: no es pot truncar un fitxer que té un memmap obert (Windows)
+            temps = np.array(llegeix_columnes(directori, [])[0])
+            esquema['files'] = int(np.searchsorted(temps, utc.asi8[0]))
+            _desa_esquema(directori, esquema)
+        if df.empty:
+            return 0
+
+        mesos = utc.strftime('%Y-%m')
+        for mes in pd.unique(mesos):
+            afegeix_columnes(os.path.join(self._directori_serie(ticker, interval), mes), df[mesos == mes])
+        return len(df)
+
+    # --- Lectura ---
+
+    def llegeix_particio(self, ticker, interval, mes, columnes=None):
+        """Retorna (temps, dict columna -> np.memmap, tz) d'un mes, sense copiar les dades."""
+        return llegeix_columnes(os.path.join(self._directori_serie(ticker, interval), mes), columnes)
+
+    def llegeix(self, ticker, interval, inici=None, fi=None, columnes=None):
+        """
+        Llegeix l'historial guardat com a DataFrame.
+
+        Args:
+            inici, fi (str | pd.Timestamp): Rang de dates (inclusiu); només s'obren els mesos necessaris.
+            columnes (list): Columnes a llegir (per defecte totes).
+        """
+        mesos = self.particions(ticker, interval)
+        if inici is not None:
+            mesos = [m for m in mesos if m >= pd.Timestamp(inici).strftime('%Y-%m')]
+        if fi is not None:
+            mesos = [m for m in mesos if m <= pd.Timestamp(fi).strftime('%Y-%m')]
+
+        trossos = [a_dataframe(*self.llegeix_particio(ticker, interval, mes, columnes)) for mes in mesos]
+        if not trossos:
+            return pd.DataFrame(columns=columnes or [])
+
+        df = pd.concat(trossos)
+        if inici is not None:
+            df = df[df.index >= _com_index(inici, df.index)]
+        if fi is not None:
+            df = df[df.index <= _com_index(fi, df.index)]
+        return df
+
+def _com_index(data, index):
+    """Converteix una data a la mateixa zona horària que l'índex per comparar-les."""
+    data = pd.Timestamp(data)
+    if index.tz is not None and data.tzinfo is None:
+        return data.tz_localize(index.tz)
+    if index.tz is None and data.tzinfo is not None:
+        return data.tz_convert(None)
+    return data
+
+def exporta_magatzem(ticker, marcs, magatzem=None):
+    """
+    Afegeix els indicadors calculats de cada marc temporal al magatzem columnar.
+
+    Args:
+        marcs (dict): interval -> DataFrame de dades_diaries (p. ex. {'1d': df, '4h': df_raw}).
+
+    Returns:
+        dict: interval -> files escrites.
+    """
+    magatzem = magatzem or MagatzemColumnar()
+    return {interval: magatzem.afegeix(ticker, interval, df) for interval, df in marcs.items()}
+
+
+if __name__ == "__main__":
+    magatzem = MagatzemColumnar()
+    for interval in ('1d', '4h', '1h'):
+        df = magatzem.llegeix("BTC-USD", interval, columnes=['Close', 'Log_Divergence_Ratio', 'Log_Volatility_Ratio'])
+        print(f"\n=== BTC-USD {interval}: {len(df)} files ===")
+        print(df.tail(5).to_string())
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# --- DETECCIÓ DE PUNTS D'INFLEXIÓ (MÀXIMS I MÍNIMS LOCALS) ---
+# ----------------------------------------------------------------------
+
+def _filtra_distancia(mascara, distancia_min):
+    """Elimina els pivots massa propers a l'anterior pivot acceptat (per columna).
+    Es queda sempre amb el primer pivot, igual que fa el detector en temps real.
+    """
+    if distancia_min <= 1:
+        return mascara
+
+    resultat = np.zeros_like(mascara)
+    for col in range(mascara.shape[1]):
+        posicions = np.flatnonzero(mascara[:, col])
+        darrer = -distancia_min
+        for pos in posicions:
+            if pos - darrer >= distancia_min:
+                resultat[pos, col] = True
+                darrer = pos
+    return resultat
+
+def detectar_inflexions(df, ordre=1, threshold=0.0, distancia_min=1):
+    """
+    Detecta màxims i mínims locals a totes les columnes d'una matriu (temps x ticker).
+
+    Un màxim és un valor que supera en un 'threshold' (0.01 = 1%) el màxim dels
+    'ordre' valors anteriors i dels 'ordre' valors posteriors. Un mínim és el cas
+    simètric. Els pivots del mateix tipus han d'estar separats per 'distancia_min' barres.
+
+    Tot el càlcul és lineal: els màxims/mínims de finestra es fan amb rolling.
+
+    Returns:
+        tuple: (peaks, troughs) com a DataFrames booleans amb el mateix índex i columnes.
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+
+    # Màxim/mínim dels 'ordre' valors anteriors (sense incloure la barra actual)
+    esq_max = df.rolling(window=ordre).max().shift(1)
+    esq_min = df.rolling(window=ordre).min().shift(1)
+    # Màxim/mínim dels 'ordre' valors posteriors (finestra invertida)
+    dre_max = df[::-1].rolling(window=ordre).max().shift(1)[::-1]
+    dre_min = df[::-1].rolling(window=ordre).min().shift(1)[::-1]
+
+    peaks = (df > esq_max * (1 + threshold)) & (df > dre_max * (1 + threshold))
+    troughs = (df < esq_min * (1 - threshold)) & (df < dre_min * (1 - threshold))
+
+    peaks = _filtra_distancia(peaks.to_numpy(), distancia_min)
+    troughs = _filtra_distancia(troughs.to_numpy(), distancia_min)
+
+    return (pd.DataFrame(peaks, index=df.index, columns=df.columns),
+            pd.DataFrame(troughs, index=df.index, columns=df.columns))
+
+def detectar_inflexio(serie, threshold=0.0, ordre=1, distancia_min=1):
+    """Versió per a una sola sèrie. Retorna (peaks, troughs) com a sèries de valors,
+    compatible amb l'antiga detectar_inflexio dels comparadors."""
+    serie = serie.squeeze()
+    peaks, troughs = detectar_inflexions(serie.to_frame(), ordre, threshold, distancia_min)
+    return serie[peaks.iloc[:, 0]], serie[troughs.iloc[:, 0]]
+
+
+class DetectorInflexions:
+    """
+    Detector en temps real. Rep una barra (un valor per ticker) cada cop i
+    confirma els pivots amb 'ordre' barres de retard, quan ja es coneixen els
+    valors posteriors. Dona el mateix resultat que detectar_inflexions.
+    """
+
+    def __init__(self, tickers, ordre=1, threshold=0.0, distancia_min=1):
+        self.tickers = list(tickers)
+        self.ordre = ordre
+        self.threshold = threshold
+        self.distancia_min = max(distancia_min, 1)
+
+        n = len(self.tickers)
+        self.finestra = np.full((2 * ordre + 1, n), np.nan)
+        self.index = [None] * (2 * ordre + 1)
+        self.barres = 0
+        self.darrer_peak = np.full(n, -self.distancia_min)
+        self.darrer_trough = np.full(n, -self.distancia_min)
+
+    def actualitza(self, valors, data=None):
+        """
+        Afegeix una nova barra i retorna els pivots confirmats a la barra central.
+
+        Returns:
+            tuple: (data_pivot, peaks, troughs) amb màscares booleanes per ticker,
+                   o None mentre no hi hagi prou barres.
+        """
+        valors = np.asarray(valors, dtype=np.float64)
+
+        # Desplacem la finestra una posició i hi posem la nova barra al final
+        self.finestra[:-1] = self.finestra[1:]
+        self.finestra[-1] = valors
+        self.index = self.index[1:] + [data]
+        self.barres += 1
+
+        if self.barres < 2 * self.ordre + 1:
+            return None
+
+        k = self.ordre
+        centre = self.finestra[k]
+        esquerra = self.finestra[:k]
+        dreta = self.finestra[k + 1:]
+
+        # np.max propaga els NaN, igual que rolling(), i les comparacions amb NaN són False
+        peaks = ((centre > esquerra.max(axis=0) * (1 + self.threshold)) &
+                 (centre > dreta.max(axis=0) * (1 + self.threshold)))
+        troughs = ((centre < esquerra.min(axis=0) * (1 - self.threshold)) &
+                   (centre < dreta.min(axis=0) * (1 - self.threshold)))
+
+        # Posició (0-based) de la barra central dins de la sèrie
+        pos = self.barres - 1 - k
+        peaks &= (pos - self.darrer_peak) >= self.distancia_min
+        troughs &= (pos - self.darrer_trough) >= self.distancia_min
+        self.darrer_peak[peaks] = pos
+        self.darrer_trough[troughs] = pos
+
+        return self.index[k], peaks, troughs
@@ -0,0 +1,363 @@
+import numpy as np
+import requests
+import json
+import time
+import os
+
+# ----------------------------------------------------------------------
+# --- LLIBRE D'ORDRES: INSTANTANIS EN ARRAYS I MAGATZEM EN DISC ---
+# ----------------------------------------------------------------------
+
+URL_DEPTH = "https://api.binance.com/api/v3/depth"
+# Nombre màxim de nivells per costat que retorna /depth
+LIMIT_DEPTH = 5000
+
+def descarrega_llibre(symbol, limit=LIMIT_DEPTH):
+    """Descarrega un instantani de profunditat de Binance (JSON en brut)."""
+    params = {"symbol": symbol, "limit": limit}
+    return requests.get(URL_DEPTH, params=params).json()
+
+def parseja_costat(nivells):
+    """Converteix una llista de [preu, quantitat] (strings) en un array (n, 2) float64 contigu."""
+    if len(nivells) == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.ascontiguousarray(np.array(nivells, dtype=np.float64))
+
+def parseja_instantani(data):
+    """
+    Converteix la resposta de /depth en arrays.
+
+    Returns:
+        tuple: (bids, asks, last_update_id). Bids ordenats de preu més alt a més baix,
+               asks de més baix a més alt, tal com els envia Binance.
+    """
+    return parseja_costat(data['bids']), parseja_costat(data['asks']), data.get('lastUpdateId')
+
+
+class MagatzemLlibre:
+    """
+    Buffer circular en disc (memmap) d'instantanis del llibre d'ordres.
+
+    Cada instantani ocupa una posició fixa de (2 costats x profunditat x [preu, quantitat])
+    float64; els nivells que falten s'omplen amb NaN. Quan el buffer és ple es
+    sobreescriuen els instantanis més antics, de manera que la memòria i el disc
+    no creixen encara que es mostregi durant hores.
+
+    Args:
+        profunditat (int): Nivells per costat (per defecte LIMIT_DEPTH: 2000 instantanis
+                           ocupen uns 320 MB).
+        capacitat (int): Instantanis del buffer (per defecte 2000).
+        Si el directori ja té un magatzem, sense arguments es reobre amb les seves mides.
+
+    Raises:
+        ValueError: Si es demana una profunditat o capacitat diferent de la del magatzem existent.
+    """
+
+    def __init__(self, directori, profunditat=None, capacitat=None):
+        self.directori = directori
+        os.makedirs(directori, exist_ok=True)
+        cami_meta = os.path.join(directori, 'meta.json')
+
+        if os.path.exists(cami_meta):
+            with open(cami_meta, encoding='utf-8') as f:
+                meta = json.load(f)
+            for nom, valor in (('profunditat', profunditat), ('capacitat', capacitat)):
+                if valor is not None and valor != meta[nom]:
+                    raise ValueError(f"El magatzem de {directori} té {nom}={meta[nom]}, no {valor} "
+                                     "(cal un altre directori)")
+            profunditat, capacitat = meta['profunditat'], meta['capacitat']
+            self.escrits = meta['escrits']
+            mode = 'r+'
+        else:
+            profunditat = profunditat or LIMIT_DEPTH
+            capacitat = capacitat or 2000
+            self.escrits = 0
+            mode = 'w+'
+
+        self.profunditat = profunditat
+        self.capacitat = capacitat
+        self.nivells = np.memmap(os.path.join(directori, 'nivells.dat'), dtype=np.float64,
+                                 mode=mode, shape=(capacitat, 2, profunditat, 2))
+        self.temps = np.memmap(os.path.join(directori, 'temps.dat'), dtype=np.int64,
+                               mode=mode, shape=(capacitat,))
+        self._desa_meta()
+
+    def _desa_meta(self):
+        meta = {'profunditat': self.profunditat, 'capacitat': self.capacitat, 'escrits': self.escrits}
+        with open(os.path.join(self.directori, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def __len__(self):
+        return min(self.escrits, self.capacitat)
+
+    def afegeix(self, bids, asks, timestamp_ms=None):
+        """Afegeix un instantani (arrays (n, 2)) a la següent posició del buffer."""
+        if timestamp_ms is None:
+            timestamp_ms = int(time.time() * 1000)
+
+        pos = self.escrits % self.capacitat
+        registre = self.nivells[pos]
+        registre.fill(np.nan)
+        n_bids = min(len(bids), self.profunditat)
+        n_asks = min(len(asks), self.profunditat)
+        registre[0, :n_bids] = bids[:n_bids]
+        registre[1, :n_asks] = asks[:n_asks]
+        self.temps[pos] = timestamp_ms
+
+        self.escrits += 1
+        self._desa_meta()
+
+    def flush(self):
+        self.nivells.flush()
+        self.temps.flush()
+
+    def _posicio(self, i):
+        """Posició física de l'instantani i (0 = el més antic, -1 = el més recent)."""
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("Instantani fora del buffer")
+        inici = self.escrits - n
+        return (inici + i) % self.capacitat
+
+    def instantani(self, i=-1):
+        """Retorna (timestamp_ms, bids, asks) com a vistes sense còpia del memmap."""
+        pos = self._posicio(i)
+        return int(self.temps[pos]), self.nivells[pos, 0], self.nivells[pos, 1]
+
+    def finestra(self, n=None):
+        """
+        Retorna (temps, nivells) dels darrers n instantanis en ordre cronològic.
+        Si la finestra no dona la volta al buffer són vistes sense còpia; si la dona,
+        numpy ha de concatenar els dos trossos (còpia).
+        """
+        total = len(self)
+        n = total if n is None else min(n, total)
+        if n == 0:
+            return self.temps[:0], self.nivells[:0]
+
+        inici = self._posicio(total - n)
+        fi = inici + n
+        if fi <= self.capacitat:
+            return self.temps[inici:fi], self.nivells[inici:fi]
+
+        resta = fi - self.capacitat
+        return (np.concatenate([self.temps[inici:], self.temps[:resta]]),
+                np.concatenate([self.nivells[inici:], self.nivells[:resta]]))
+
+
+def mostreja(symbol, magatzem, interval_s=5, limit=LIMIT_DEPTH, iteracions=None):
+    """Descarrega instantanis cada 'interval_s' segons i els guarda al magatzem."""
+    n = 0
+    while iteracions is None or n < iteracions:
+        inici = time.time()
+        try:
+            bids, asks, _ = parseja_instantani(descarrega_llibre(symbol, limit))
+            magatzem.afegeix(bids, asks)
+        except Exception as e:
+            print(f"❌ ERROR descarregant el llibre de {symbol}: {e}")
+        n += 1
+        time.sleep(max(0, interval_s - (time.time() - inici)))
+    magatzem.flush()
+
+
+# ----------------------------------------------------------------------
+# --- LLIBRE LOCAL MANTINGUT AMB ACTUALITZACIONS DIFERENCIALS ---
+# ----------------------------------------------------------------------
+
+class LlibreLocal:
+    """
+    Llibre d'ordres local mantingut amb els esdeveniments 'depthUpdate' de Binance.
+
+    Cada costat és un array (capacitat, 2) de [preu, quantitat] ordenat (bids de més
+    alt a més baix, asks de més baix a més alt) que s'actualitza in situ: una
+    quantitat 0 elimina el nivell i qualsevol altra el crea o el substitueix.
+
+    Seqüència (regles de Binance): es descarten els esdeveniments amb u <= lastUpdateId,
+    el primer aplicat ha de complir U <= lastUpdateId + 1 <= u i els següents
+    U == u_anterior + 1. Si hi ha un salt, es resincronitza amb 'font_instantani'.
+    """
+
+    def __init__(self, font_instantani=None, capacitat=16384):
+        self.font_instantani = font_instantani
+        self.nivells = {
+            'bids': np.empty((capacitat, 2), dtype=np.float64),
+            'asks': np.empty((capacitat, 2), dtype=np.float64),
+        }
+        self.n = {'bids': 0, 'asks': 0}
+        # Sumes corrents de (quantitat - referencia) i del seu quadrat (mitjana i desviació en
+        # O(1)). Cada n actualitzacions d'un costat es refan des dels nivells i la referència
+        # passa a ser la mitjana: l'error de sumar i restar no s'acumula i la resta de
+        # variància no cancel·la xifres.
+        self.suma = {'bids': 0.0, 'asks': 0.0}
+        self.suma2 = {'bids': 0.0, 'asks': 0.0}
+        self.referencia = {'bids': 0.0, 'asks': 0.0}
+        self.des_de_recalcul = {'bids': 0, 'asks': 0}
+        self.last_update_id = None
+        self.sincronitzat = False
+        self.salts = 0
+
+    # --- Accés (vistes sense còpia) ---
+
+    @property
+    def bids(self):
+        return self.nivells['bids'][:self.n['bids']]
+
+    @property
+    def asks(self):
+        return self.nivells['asks'][:self.n['asks']]
+
+    # --- Instantanis ---
+
+    def carrega_instantani(self, data):
+        """Reinicia el llibre a partir d'una resposta de /depth."""
+        bids, asks, last_update_id = parseja_instantani(data)
+        for costat, valors in (('bids', bids), ('asks', asks)):
+            if len(valors) > len(self.nivells[costat]):
+                self.nivells[costat] = np.empty((2 * len(valors), 2), dtype=np.float64)
+            self.nivells[costat][:len(valors)] = valors
+            self.n[costat] = len(valors)
+            self._recalcula(costat)
+        self.last_update_id = last_update_id
+        # El primer diff després de l'instantani es valida amb la regla U <= L+1 <= u
+        self.sincronitzat = False
+
+    def resincronitza(self):
+        if self.font_instantani is None:
+            raise ValueError("Salt de seqüència al llibre d'ordres i no hi ha font d'instantanis")
+        self.carrega_instantani(self.font_instantani())
+
+    # --- Actualitzacions ---
+
+    def _recalcula(self, costat):
+        """Refà les sumes d'un costat des dels nivells (elimina l'error acumulat)."""
+        quantitats = self.nivells[costat][:self.n[costat], 1]
+        self.referencia[costat] = float(quantitats.mean()) if len(quantitats) else 0.0
+        desviacions = quantitats - self.referencia[costat]
+        self.suma[costat] = float(desviacions.sum())
+        self.suma2[costat] = float((desviacions ** 2).sum())
+        self.des_de_recalcul[costat] = 0
+
+    def _posicio(self, costat, preu):
+        """Retorna (índex, trobat) del preu dins del costat ordenat."""
+        n = self.n[costat]
+        preus = self.nivells[costat][:n, 0]
+        if costat == 'asks':
+            i = int(np.searchsorted(preus, preu))
+            return i, i < n and preus[i] == preu
+        # Els bids estan en ordre descendent: busquem sobre la vista invertida
+        j = int(np.searchsorted(preus[::-1], preu))
+        trobat = j < n and preus[n - 1 - j] == preu
+        return (n - 1 - j, True) if trobat else (n - j, False)
+
+    def aplica_nivell(self, costat, preu, quantitat):
+        """Aplica un nivell (preu, nova quantitat) in situ."""
+        i, trobat = self._posicio(costat, preu)
+        n = self.n[costat]
+        arr = self.nivells[costat]
+
+        referencia = self.referencia[costat]
+        if trobat:
+            anterior = arr[i, 1]
+            self.suma[costat] -= anterior - referencia
+            self.suma2[costat] -= (anterior - referencia) ** 2
+            if quantitat == 0:
+                arr[i:n - 1] = arr[i + 1:n]
+                self.n[costat] = n - 1
+            else:
+                arr[i, 1] = quantitat
+                self.suma[costat] += quantitat - referencia
+                self.suma2[costat] += (quantitat - referencia) ** 2
+        elif quantitat != 0:
+            if n == len(arr):
+                arr = self.nivells[costat] = np.concatenate([arr, np.empty_like(arr)])
+            arr[i + 1:n + 1] = arr[i:n]
+            arr[i] = (preu, quantitat)
+            self.n[costat] = n + 1
+            self.suma[costat] += quantitat - referencia
+            self.suma2[costat] += (quantitat - referencia) ** 2
+        else:
+            return
+
+        # Refer-les costa O(n): cada n actualitzacions manté el cost amortitzat en O(1)
+        self.des_de_recalcul[costat] += 1
+        if self.des_de_recalcul[costat] >= max(self.n[costat], 1):
+            self._recalcula(costat)
+
+    def estadistiques(self, costat):
+        """Retorna (nivells, mitjana, desviació) de la quantitat d'un costat, en O(1)."""
+        n = self.n[costat]
+        if n == 0:
+            return 0, np.nan, np.nan
+        desplacament = self.suma[costat] / n
+        variancia = max(self.suma2[costat] / n - desplacament ** 2, 0.0)
+        return n, self.referencia[costat] + desplacament, np.sqrt(variancia)
+
+    def aplica_diff(self, event):
+        """
+        Aplica un esdeveniment 'depthUpdate' ({'U', 'u', 'b', 'a'}).
+
+        Returns:
+            bool: True si s'ha aplicat, False si era anterior a l'instantani.
+        """
+        if self.last_update_id is None:
+            self.resincronitza()
+
+        U, u = event['U'], event['u']
+        if u <= self.last_update_id:
+            return False
+
+        if self.sincronitzat:
+            consecutiu = U == self.last_update_id + 1
+        else:
+            consecutiu = U <= self.last_update_id + 1 <= u
+
+        if not consecutiu:
+            self.salts += 1
+            self.resincronitza()
+            if u <= self.last_update_id:
+                return False
+            if not U <= self.last_update_id + 1 <= u:
+                raise ValueError(f"Salt de seqüència no recuperable: U={U}, "
+                                 f"lastUpdateId={self.last_update_id}")
+
+        for costat, clau in (('bids', 'b'), ('asks', 'a')):
+            for preu, quantitat in parseja_costat(event[clau]):
+                self.aplica_nivell(costat, preu, quantitat)
+
+        self.last_update_id = u
+        self.sincronitzat = True
+        return True
+
+
+def reprodueix_diffs(cami, llibre=None):
+    """
+    Reprodueix una gravació local (JSON lines) sobre un LlibreLocal.
+
+    Les línies amb 'lastUpdateId' són instantanis de /depth i les altres
+    esdeveniments 'depthUpdate'. Els instantanis posteriors al primer es fan
+    servir com a font de resincronització quan hi ha un salt de seqüència.
+    """
+    with open(cami, encoding='utf-8') as f:
+        linies = [json.loads(linia) for linia in f if linia.strip()]
+
+    instantanis = [l for l in linies if 'lastUpdateId' in l]
+    diffs = [l for l in linies if 'lastUpdateId' not in l]
+
+    if llibre is None:
+        pendents = iter(instantanis[1:])
+
+        def font_instantani():
+            try:
+                return next(pendents)
+            except StopIteration:
+                raise ValueError("La gravació no té més instantanis per resincronitzar")
+
+        llibre = LlibreLocal(font_instantani=font_instantani)
+    if instantanis:
+        llibre.carrega_instantani(instantanis[0])
+
+    for event in diffs:
+        llibre.aplica_diff(event)
+    return llibre
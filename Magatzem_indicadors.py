@@ -0,0 +1,284 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+import Dades_actiu_aux as aux
+from Exportacio import afegeix_columnes, llegeix_columnes, llegeix_esquema, a_dataframe, ultim_temps, _temps_utc
+from Motor_indicadors import MotorIndicadors
+
+# ----------------------------------------------------------------------
+# --- MAGATZEM D'INDICADORS CALCULATS (FEATURE STORE) ---
+# ----------------------------------------------------------------------
+# Cada entrada guarda la sortida de dades_diaries per a (ticker, interval,
+# paràmetres, versió del codi) en un directori de columnes (vegeu Exportacio.py)
+# i un entrada.json amb el rang de barres d'entrada que cobreix; les barres
+# d'entrada (OHLCV) es guarden al subdirectori entrada/ per comparar-les amb les
+# de la propera crida. Quan arriben barres noves només es calcula la cua.
+# Amb normalització sense repintat també es guarda l'estat del motor incremental
+# (estat.npz, vegeu Motor_indicadors.py) i la cua es calcula a partir d'aquest.
+
+COLUMNES_ENTRADA = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Sumes acumulades des de la primera barra: la cua calculada amb escalfament té un
+# desplaçament constant que es corregeix amb la darrera fila guardada
+COLUMNES_ACUMULADES = ['OBV', 'OBV_EMA']
+
+# Funcions de les quals depèn la sortida: si el codi canvia, les entrades antigues no es fan servir
+VERSIO_CODI = hashlib.sha1(''.join(inspect.getsource(f) for f in (
+    aux.min_max_scale_log, aux.calculate_obv, aux._memoritza, aux.dades_diaries)).encode()).hexdigest()[:12]
+
+def escalfament(parametres):
+    """
+    Barres anteriors necessàries per recalcular la cua sense diferències apreciables,
+    o None si la sortida depèn de tota la història.
+
+    Amb normalització 'global' tota la sèrie canvia amb cada barra nova i amb
+    'expansiva' el mínim i el màxim venen de la primera barra; amb 'mobil' i 'rang'
+    la memòria és finita: ~10 spans per a les EMAs (error < 1e-8) més les finestres.
+    """
+    if parametres['normalitzacio'] in ('global', 'expansiva'):
+        return None
+    span = max(parametres['span_ema233'], parametres['span_ema21'], 3 * parametres['periode'],
+               3 * parametres['periode_adx'])
+    finestra_quantil = parametres['finestra_quantil'] or 288
+    return 10 * span + parametres['finestra_normalitzacio'] + finestra_quantil + 55
+
+
+class MagatzemIndicadors:
+    """
+    Feature store de dades_diaries amb desallotjament LRU per pressupost de disc.
+
+    obte() retorna sempre el mateix que dades_diaries sobre les mateixes barres,
+    però reaprofita el que ja està guardat:
+    - barres idèntiques (o un rang dins del guardat): es llegeix directament del disc (memmap);
+    - barres noves amb estat del motor guardat: només es calculen les barres noves;
+    - barres noves amb memòria finita: només es calcula la cua (amb escalfament);
+    - barres noves amb normalització 'expansiva': es calcula tot però només s'afegeix la cua;
+    - altrament (dades revisades, normalització 'global' amb barres noves o una altra
+      finestra, dades que comencen abans de l'entrada): es recalcula l'entrada.
+    """
+
+    def __init__(self, directori='magatzem_indicadors', pressupost_mb=500):
+        self.directori = directori
+        self.pressupost = pressupost_mb * 1024 * 1024
+        os.makedirs(directori, exist_ok=True)
+
+    # --- Claus i metadades ---
+
+    def clau(self, ticker, interval, interval_type, parametres=None):
+        """Retorna (clau de l'entrada, paràmetres complets)."""
+        parametres = {**aux.PARAMETRES_DEFECTE, **(parametres or {})}
+        descripcio = json.dumps({'ticker': ticker, 'interval': interval, 'interval_type': interval_type,
+                                 'parametres': parametres, 'versio': VERSIO_CODI}, sort_keys=True)
+        return hashlib.sha1(descripcio.encode()).hexdigest()[:16], parametres
+
+    def _meta(self, clau):
+        cami = os.path.join(self.directori, clau, 'entrada.json')
+        if not os.path.exists(cami):
+            return None
+        with open(cami, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _desa_meta(self, clau, meta):
+        temporal = os.path.join(self.directori, clau, 'entrada.json.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temporal, os.path.join(self.directori, clau, 'entrada.json'))
+
+    # --- API ---
+
+    def obte(self, ticker, interval, df, interval_type=None, parametres=None, columnes=None):
+        """
+        Indicadors de dades_diaries per a les barres 'df' (OHLCV).
+
+        Si 'df' comença més tard que l'entrada guardada (descàrregues amb un període mòbil,
+        p. ex. '2y') i la normalització no és 'global', es reaprofita el rang en comú: les
+        files es retornen des de la primera barra de 'df' però calculades amb tota la
+        història guardada, que és el que veuria el motor incremental.
+
+        Args:
+            interval_type (str): Tipus per a dades_diaries (per defecte 'diari' si interval és '1d').
+            columnes (list): Columnes a retornar (per defecte totes).
+        """
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.droplevel(1)
+        df = df.dropna(subset=COLUMNES_ENTRADA)
+        interval_type = interval_type or ('diari' if interval == '1d' else interval)
+        clau, parametres = self.clau(ticker, interval, interval_type, parametres)
+        directori = os.path.join(self.directori, clau)
+        meta = self._meta(clau)
+
+        utc, _ = _temps_utc(df.index)
+        temps = utc.asi8
+        calcula = lambda dades: aux.dades_diaries(dades, interval_type, parametres)
+
+        n_coberts = self._coberts(clau, meta, df, temps)
+        if n_coberts is not None:
+            mateix_inici = temps[0] == meta['inici']
+            nou = None
+            motor = self._motor(clau, meta) if n_coberts < len(df) else None
+            if n_coberts == len(df):
+                pass  # barres idèntiques: només es llegeix
+            elif motor is not None:
+                # Es reprèn l'estat guardat: només es calculen les barres noves
+                nou = motor.actualitza(df.iloc[n_coberts:])
+            else:
+                # Barres noves: s'afegeix només la cua de la sortida
+                n_escalfament = escalfament(parametres)
+                if n_escalfament is not None and (mateix_inici or n_coberts >= n_escalfament):
+                    nou = calcula(df.iloc[max(0, n_coberts - n_escalfament):])
+                elif parametres['normalitzacio'] == 'expansiva' and mateix_inici:
+                    nou = calcula(df)
+                # Altrament ('global', o 'expansiva' sense la primera barra) cal recalcular-ho tot
+                if nou is not None:
+                    ultim = ultim_temps(directori)
+                    temps_nou = _temps_utc(nou.index)[0].asi8
+                    if n_escalfament is not None and ultim in temps_nou:
+                        _, guardats, _ = llegeix_columnes(directori, COLUMNES_ACUMULADES)
+                        fila = int(np.searchsorted(temps_nou, ultim))
+                        nou = nou.copy()
+                        for columna in COLUMNES_ACUMULADES:
+                            nou[columna] += guardats[columna][-1] - nou[columna].iloc[fila]
+                    nou = nou[temps_nou > (ultim if ultim is not None else -1)]
+
+            if n_coberts == len(df) or nou is not None:
+                if nou is not None:
+                    afegeix_columnes(directori, nou)
+                    if motor is not None:
+                        motor.desa(os.path.join(directori, 'estat.npz'))
+                    self._afegeix_entrada(clau, df.iloc[n_coberts:])
+                    meta.update(fi=int(temps[-1]))
+                meta = self._actualitza(clau, meta)
+                return self._llegeix(clau, columnes, temps[0])
+
+        # Entrada nova o invàlida: es recalcula tot
+        shutil.rmtree(directori, ignore_errors=True)
+        if parametres['normalitzacio'] == 'global':
+            afegeix_columnes(directori, calcula(df))
+        else:
+            motor = MotorIndicadors(interval_type, parametres)
+            afegeix_columnes(directori, motor.actualitza(df))
+            motor.desa(os.path.join(directori, 'estat.npz'))
+        self._afegeix_entrada(clau, df)
+        meta = {'ticker': ticker, 'interval': interval, 'interval_type': interval_type,
+                'parametres': parametres, 'versio': VERSIO_CODI,
+                'inici': int(temps[0]), 'fi': int(temps[-1])}
+        self._actualitza(clau, meta)
+        return self._llegeix(clau, columnes)
+
+    def _coberts(self, clau, meta, df, temps):
+        """
+        Nombre de barres de 'df' (des de la primera) que l'entrada ja cobreix, o None si no
+        es pot reaprofitar: 'df' comença fora del rang guardat, no arriba a meta['fi'], les
+        barres en comú no són idèntiques (dades revisades) o, amb normalització 'global',
+        no comença a la mateixa barra (la finestra diferent repinta tota la sèrie).
+        """
+        if meta is None or not meta['inici'] <= temps[0] <= meta['fi'] or meta['fi'] not in temps:
+            return None
+        if temps[0] != meta['inici'] and meta['parametres']['normalitzacio'] == 'global':
+            return None
+        directori = os.path.join(self.directori, clau, 'entrada')
+        if llegeix_esquema(directori) is None:
+            return None
+        temps_guardats, guardades, _ = llegeix_columnes(directori, COLUMNES_ENTRADA)
+        desde = int(np.searchsorted(temps_guardats, temps[0]))
+        fins = int(np.searchsorted(temps_guardats, meta['fi'], side='right'))
+        n_coberts = int(np.searchsorted(temps, meta['fi'], side='right'))
+        if fins - desde != n_coberts or not np.array_equal(temps_guardats[desde:fins], temps[:n_coberts]):
+            return None
+        valors = df[COLUMNES_ENTRADA].iloc[:n_coberts]
+        for columna in COLUMNES_ENTRADA:
+            if not np.array_equal(guardades[columna][desde:fins], valors[columna].to_numpy(dtype=np.float64)):
+                return None
+        return n_coberts
+
+    def _afegeix_entrada(self, clau, df):
+        """Guarda les barres d'entrada (OHLCV) per poder comparar el rang en comú amb les properes."""
+        directori = os.path.join(self.directori, clau, 'entrada')
+        ultim = ultim_temps(directori)
+        if ultim is not None:
+            df = df[_temps_utc(df.index)[0].asi8 > ultim]
+        afegeix_columnes(directori, df[COLUMNES_ENTRADA].astype(np.float64))
+
+    def _motor(self, clau, meta):
+        """Motor incremental guardat amb l'entrada si està al dia (fins a meta['fi']), o None."""
+        cami = os.path.join(self.directori, clau, 'estat.npz')
+        if not os.path.exists(cami):
+            return None
+        try:
+            motor = MotorIndicadors.carrega(cami)
+        except ValueError:
+            return None  # instantània d'una altra versió del motor
+        return motor if motor.darrer_temps == meta['fi'] else None
+
+    def columnes(self, ticker, interval, interval_type=None, parametres=None, columnes=None):
+        """Columnes guardades com a np.memmap (sense calcular res). Retorna (temps, dict, tz) o None."""
+        interval_type = interval_type or ('diari' if interval == '1d' else interval)
+        clau, _ = self.clau(ticker, interval, interval_type, parametres)
+        if self._meta(clau) is None:
+            return None
+        return llegeix_columnes(os.path.join(self.directori, clau), columnes)
+
+    def _llegeix(self, clau, columnes=None, inici=None):
+        """Sortida guardada (a partir de la barra 'inici', en ns UTC, si s'indica)."""
+        temps, valors, tz = llegeix_columnes(os.path.join(self.directori, clau), columnes)
+        if inici is not None:
+            desde = int(np.searchsorted(temps, inici))
+            temps, valors = temps[desde:], {c: v[desde:] for c, v in valors.items()}
+        return a_dataframe(temps, valors, tz)
+
+    # --- LRU ---
+
+    def _actualitza(self, clau, meta):
+        directori = os.path.join(self.directori, clau)
+        meta['darrer_acces'] = time.time()
+        meta['bytes'] = sum(os.path.getsize(os.path.join(arrel, f))
+                            for arrel, _, fitxers in os.walk(directori) for f in fitxers)
+        self._desa_meta(clau, meta)
+        self.neteja(conserva=clau)
+        return meta
+
+    def entrades(self):
+        """Taula de les entrades guardades (una fila per entrada)."""
+        files = []
+        for clau in os.listdir(self.directori):
+            meta = self._meta(clau)
+            if meta is not None:
+                files.append({'Clau': clau, 'Ticker': meta['ticker'], 'Interval': meta['interval'],
+                              'Inici': pd.Timestamp(meta['inici'], tz='UTC'),
+                              'Fi': pd.Timestamp(meta['fi'], tz='UTC'),
+                              'MB': meta['bytes'] / 1024 / 1024,
+                              'Darrer_Acces': pd.Timestamp(meta['darrer_acces'], unit='s'),
+                              'Versio': meta['versio']})
+        return pd.DataFrame(files)
+
+    def neteja(self, conserva=None):
+        """Esborra les entrades menys usades recentment fins a quedar dins del pressupost."""
+        entrades = [(clau, self._meta(clau)) for clau in os.listdir(self.directori)]
+        entrades = sorted(((m['darrer_acces'], m['bytes'], clau) for clau, m in entrades if m is not None))
+        total = sum(b for _, b, _ in entrades)
+        for _, mida, clau in entrades:
+            if total <= self.pressupost:
+                break
+            if clau == conserva:
+                continue
+            shutil.rmtree(os.path.join(self.directori, clau), ignore_errors=True)
+            total -= mida
+
+
+if __name__ == "__main__":
+    import yfinance as yf
+
+    magatzem = MagatzemIndicadors()
+    ticker = "BTC-USD"
+    for interval, periode in (('1d', '2y'), ('4h', '3mo'), ('1h', '3mo')):
+        df = yf.download(ticker, period=periode, interval=interval, progress=False)
+        inici = time.time()
+        indicadors = magatzem.obte(ticker, interval, df, parametres={'normalitzacio': 'mobil'})
+        print(f"{ticker} {interval}: {len(indicadors)} files en {time.time() - inici:.2f} s")
+    print(magatzem.entrades().to_string())
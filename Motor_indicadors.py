@@ -0,0 +1,356 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import inspect
+import json
+import os
+import Dades_actiu_aux as aux
+from Exportacio import _temps_utc
+from Descarrega import normalitza_columnes
+
+# ----------------------------------------------------------------------
+# --- MOTOR INCREMENTAL D'INDICADORS AMB ESTAT SERIALITZABLE ---
+# ----------------------------------------------------------------------
+# Calcula les mateixes columnes que dades_diaries barra a barra a partir d'un
+# estat: acumuladors de les EMAs i dels suavitzats de Wilder (ATR, RSI, ADX),
+# el total de l'OBV, els darrers valors per als desplaçaments i els buffers de
+# les finestres mòbils (mínims/màxims, mitjanes, quantils i normalització).
+# L'estat es pot desar en un .npz i, en reprendre'l amb les barres noves, només
+# es calculen aquestes barres.
+#
+# Només admet les normalitzacions sense repintat ('expansiva', 'mobil', 'rang'):
+# amb 'global' cada barra nova canvia tota la història i no hi ha estat finit.
+
+COLUMNES_ENTRADA = ['Open', 'High', 'Low', 'Close', 'Volume']
+MINIM_SUAVITZAT = 0.0001  # MIN_SMOOTHING_FACTOR de dades_diaries
+
+# Columnes de sortida, en el mateix ordre que dades_diaries
+COLUMNES_SORTIDA = COLUMNES_ENTRADA + [
+    'Prev Close', 'Price_TR', 'Prev Volume', 'Volume_VTR', 'Price_TR_day',
+    'TR_EMA', 'VTR_EMA', 'TR_EMA13_day', 'TR_Norm_EMA', 'VTR_Norm_EMA', 'Log_Volatility_Ratio', 'Prev_LVR', 'm_LVR',
+    'OBV', 'OBV_EMA', 'Close_EMA8', 'Close_EMA13', 'Close_EMA21', 'Close_EMA233', 'Close_EMA_Norm', 'OBV_EMA_Norm',
+    'Log_Divergence_Ratio', 'Prev_LDR', 'm_LDR', 'RED', 'Prev_RED', 'm_RED',
+    'ATR', 'ATR_Q5', 'ATR_Q90', 'RSI', 'EMA13_Close', 'SMA_55_Volume', 'SMA_13_Volume', 'Price_TR_ema8', 'Volume_ema8',
+    'REPV', 'REPV_a', 'REPV_R', 'IPE', 'Low_8', 'High_8', 'Fast_%K', 'Slow_%K', 'Slow_%D',
+    'Low_RED', 'High_RED', 'Fast_%RED-K', 'Slow_%RED-K', 'Slow_%RED-D',
+    'Low_ATR', 'High_ATR', 'Fast_%ATR-K', 'Slow_%ATR-K', 'Slow_%ATR-D', '+DI', '-DI', 'ADX',
+    'LDR_Q10', 'LDR_Q90', 'LVR_Q10', 'LVR_Q90', 'REPV_R_Q10', 'REPV_R_Q90', 'IPE_Q10', 'IPE_Q90',
+]
+
+def _no_zero(x):
+    """Equivalent a .replace(0, 1e-9) de dades_diaries."""
+    return np.where(x == 0, 1e-9, x)
+
+def _desplaca(anterior, x):
+    """x desplaçat una posició, amb 'anterior' (NaN si no n'hi ha) al davant."""
+    return np.concatenate(([anterior], x[:-1])) if len(x) else x
+
+def _finestra_quantil(interval_type, parametres):
+    """Mateixa finestra de quantils que dades_diaries (abans de limitar-la a la mida de les dades)."""
+    if parametres['finestra_quantil'] is not None:
+        return parametres['finestra_quantil']
+    return {'diari': 250, '4h': 72, '1h': 288}.get(interval_type, 72)
+
+
+class MotorIndicadors:
+    """
+    Versió incremental de dades_diaries per a un ticker i un interval.
+
+    actualitza(df) rep barres OHLCV posteriors a les ja processades i retorna les
+    files noves amb les mateixes columnes i valors que dades_diaries sobre tota la
+    història (les mitjanes mòbils poden diferir en l'arrodoniment, < 1e-9 relatiu).
+    """
+
+    def __init__(self, interval_type='diari', parametres=None, compacte=False):
+        parametres = {**aux.PARAMETRES_DEFECTE, 'normalitzacio': 'expansiva', **(parametres or {})}
+        if parametres['normalitzacio'] == 'global':
+            raise ValueError("La normalització 'global' repinta tota la història: "
+                             "el motor incremental només admet 'expansiva', 'mobil' o 'rang'")
+        self.interval_type = interval_type
+        self.parametres = parametres
+        self.compacte = compacte
+        self.escalars = {}   # nom -> float (acumuladors i darrers valors)
+        self.finestres = {}  # nom -> np.ndarray (darrers valors de cada finestra mòbil)
+        self.darrer_temps = None  # ns UTC de la darrera barra processada
+
+    # --- Blocs de càlcul amb estat ---
+
+    def _e(self, nom):
+        return self.escalars.get(nom, np.nan)
+
+    def _ema(self, nom, x, span=None, alpha=None):
+        """EMA (adjust=False) que continua des del darrer valor guardat."""
+        anterior = self._e(nom)
+        serie = pd.Series(x if np.isnan(anterior) else np.concatenate(([anterior], x)))
+        y = serie.ewm(span=span, alpha=alpha, adjust=False).mean().to_numpy()
+        y = y if np.isnan(anterior) else y[1:]
+        if len(y):
+            self.escalars[nom] = y[-1]
+        return y
+
+    def _finestra(self, nom, x, mida, *funcions):
+        """
+        Aplica funcions de pandas (rolling) sobre el buffer + x i guarda les darreres
+        'mida' - 1 observacions per a la propera crida.
+        """
+        buffer = self.finestres.get(nom, np.empty(0))
+        tot = np.concatenate((buffer, x))
+        serie = pd.Series(tot)
+        resultats = [f(serie).to_numpy()[len(buffer):] for f in funcions]
+        self.finestres[nom] = tot[max(0, len(tot) - (mida - 1)):]
+        return resultats if len(resultats) > 1 else resultats[0]
+
+    def _normalitza(self, nom, x):
+        """min_max_scale_log sense repintat, continuant des de l'estat."""
+        p = self.parametres
+        if p['normalitzacio'] == 'expansiva':
+            # El mínim i el màxim acumulats fan de buffer
+            buffer = self.finestres.get(nom, np.empty(0))
+            tot = np.concatenate((buffer, x))
+            y = aux.min_max_scale_log(pd.Series(tot), 'expansiva').to_numpy()[len(buffer):]
+            if len(tot):
+                self.finestres[nom] = np.array([np.nanmin(tot), np.nanmax(tot)])
+            return y
+        return self._finestra(nom, x, p['finestra_normalitzacio'],
+                              lambda s: aux.min_max_scale_log(s, p['normalitzacio'], p['finestra_normalitzacio']))
+
+    def _atr(self, tr):
+        """ATR de la llibreria ta: zeros fins a 'periode' - 1, mitjana inicial i després Wilder."""
+        periode = self.parametres['periode']
+        n = int(self.escalars.get('n_etapa2', 0))
+        atr = np.zeros(len(tr))
+        anterior = self._e('ATR')
+        for i in range(len(tr)):
+            posicio = n + i
+            if posicio < periode - 1:
+                self.finestres['TR_inicial'] = np.append(self.finestres.get('TR_inicial', np.empty(0)), tr[i])
+            elif posicio == periode - 1:
+                inicials = np.append(self.finestres.pop('TR_inicial', np.empty(0)), tr[i])
+                atr[i] = pd.Series(inicials[0:periode]).mean()
+            else:
+                atr[i] = (anterior * (periode - 1) + tr[i]) / float(periode)
+            anterior = atr[i]
+        if len(tr):
+            self.escalars['ATR'] = anterior
+        return atr
+
+    # --- API ---
+
+    @np.errstate(divide='ignore', invalid='ignore')
+    def actualitza(self, df):
+        """
+        Processa les barres de 'df' posteriors a la darrera processada.
+
+        Returns:
+            pd.DataFrame: Files noves (les mateixes que afegiria dades_diaries sobre tota la història).
+        """
+        df = normalitza_columnes(df)[COLUMNES_ENTRADA]
+        utc, _ = _temps_utc(df.index)
+        if self.darrer_temps is not None:
+            noves = utc.asi8 > self.darrer_temps
+            df, utc = df[noves], utc[noves]
+        if df.empty:
+            return self._buit()
+        p = self.parametres
+        o, h, l, c, v = (df[col].to_numpy(dtype=np.float64) for col in ('Open', 'High', 'Low', 'Close', 'Volume'))
+
+        # 1. Volatilitat (sobre totes les barres; la primera de la història no té anterior)
+        columnes = {'Open': o, 'High': h, 'Low': l, 'Close': c, 'Volume': v}
+        columnes['Prev Close'] = _desplaca(self._e('close'), c)
+        columnes['Price_TR'] = np.abs(c - columnes['Prev Close'])
+        columnes['Prev Volume'] = _desplaca(self._e('volum'), v)
+        columnes['Volume_VTR'] = np.abs(v / _no_zero(columnes['Prev Volume']))
+        columnes['Price_TR_day'] = np.abs(h / l)
+        self.escalars['close'], self.escalars['volum'] = c[-1], v[-1]
+
+        etapa1 = ~(np.isnan(columnes['Price_TR']) | np.isnan(columnes['Volume_VTR']) |
+                   np.isnan(columnes['Price_TR_day']))
+        index = df.index[etapa1]
+        columnes = {k: x[etapa1] for k, x in columnes.items()}
+        c1, v1 = columnes['Close'], columnes['Volume']
+
+        columnes['TR_EMA'] = self._ema('TR_EMA', columnes['Price_TR'], span=p['span_ema21'])
+        columnes['VTR_EMA'] = self._ema('VTR_EMA', columnes['Volume_VTR'], span=p['span_ema21'])
+        columnes['TR_EMA13_day'] = self._ema('TR_EMA13_day', columnes['Price_TR_day'], span=p['span_ema13'])
+        columnes['TR_Norm_EMA'] = self._normalitza('TR_Norm_EMA', columnes['TR_EMA'])
+        columnes['VTR_Norm_EMA'] = self._normalitza('VTR_Norm_EMA', columnes['VTR_EMA'])
+        columnes['Log_Volatility_Ratio'] = np.log(np.maximum(columnes['VTR_Norm_EMA'], MINIM_SUAVITZAT) /
+                                                  columnes['TR_Norm_EMA'])
+        columnes['Prev_LVR'] = _desplaca(self._e('LVR'), columnes['Log_Volatility_Ratio'])
+        columnes['m_LVR'] = columnes['Log_Volatility_Ratio'] - columnes['Prev_LVR']
+
+        # 2. Tendència / pressió: OBV (la primera barra de l'etapa compta com a canvi 0)
+        direccio = np.sign(np.nan_to_num(c1 - _desplaca(self._e('close_obv'), c1)))
+        obv = np.cumsum(np.concatenate(([self.escalars.get('OBV', 0.0)], v1 * direccio)))[1:]
+        columnes['OBV'] = obv
+        columnes['OBV_EMA'] = self._ema('OBV_EMA', obv, span=p['span_ema21'])
+        columnes['Close_EMA8'] = self._ema('Close_EMA8', c1, span=p['span_ema8'])
+        columnes['Close_EMA13'] = self._ema('Close_EMA13', c1, span=p['span_ema13'])
+        columnes['Close_EMA21'] = self._ema('Close_EMA21', c1, span=p['span_ema21'])
+        columnes['Close_EMA233'] = self._ema('Close_EMA233', c1, span=p['span_ema233'])
+        columnes['Close_EMA_Norm'] = self._normalitza('Close_EMA_Norm', columnes['Close_EMA21'])
+        columnes['OBV_EMA_Norm'] = self._normalitza('OBV_EMA_Norm', columnes['OBV_EMA'])
+        columnes['Log_Divergence_Ratio'] = np.log(_no_zero(columnes['OBV_EMA_Norm']) / columnes['Close_EMA_Norm'])
+        columnes['Prev_LDR'] = _desplaca(self._e('LDR'), columnes['Log_Divergence_Ratio'])
+        columnes['m_LDR'] = columnes['Log_Divergence_Ratio'] - columnes['Prev_LDR']
+        columnes['RED'] = np.abs(columnes['Log_Divergence_Ratio']) / np.abs(columnes['Log_Volatility_Ratio'])
+        columnes['Prev_RED'] = _desplaca(self._e('RED'), columnes['RED'])
+        columnes['m_RED'] = columnes['RED'] - columnes['Prev_RED']
+        if len(c1):
+            self.escalars['close_obv'], self.escalars['OBV'] = c1[-1], obv[-1]
+            self.escalars['LVR'] = columnes['Log_Volatility_Ratio'][-1]
+            self.escalars['LDR'] = columnes['Log_Divergence_Ratio'][-1]
+            self.escalars['RED'] = columnes['RED'][-1]
+
+        # Neteja temporal de NaNs: la resta d'indicadors només veu aquestes files
+        etapa2 = ~np.isnan(np.column_stack(list(columnes.values()))).any(axis=1)
+        index = index[etapa2]
+        columnes = {k: x[etapa2] for k, x in columnes.items()}
+        h2, l2, c2, v2 = columnes['High'], columnes['Low'], columnes['Close'], columnes['Volume']
+        periode, n2 = p['periode'], int(self.escalars.get('n_etapa2', 0))
+
+        # ATR i quantils de l'ATR
+        tancament_anterior = _desplaca(self._e('close2'), c2)
+        tr = np.fmax(np.fmax(h2 - l2, np.abs(h2 - tancament_anterior)), np.abs(l2 - tancament_anterior))
+        columnes['ATR'] = atr = self._atr(tr)
+        columnes['ATR_Q5'], columnes['ATR_Q90'] = self._finestra(
+            'ATR_Q', atr, 55, lambda s: s.rolling(55).quantile(0.05), lambda s: s.rolling(55).quantile(0.90))
+
+        # RSI (ta): mitjanes de Wilder de pujades i baixades, NaN fins a 'periode' observacions
+        diferencia = c2 - tancament_anterior
+        pujades = np.where(diferencia > 0, diferencia, 0.0)
+        baixades = -np.where(diferencia < 0, diferencia, 0.0)
+        mitja_pujades = self._ema('RSI_pujades', pujades, alpha=1 / periode)
+        mitja_baixades = self._ema('RSI_baixades', baixades, alpha=1 / periode)
+        rsi = np.where(mitja_baixades == 0, 100, 100 - (100 / (1 + mitja_pujades / mitja_baixades)))
+        rsi[n2 + np.arange(len(c2)) + 1 < periode] = np.nan
+        columnes['RSI'] = rsi
+
+        # Volum i ràtios (REPV)
+        columnes['EMA13_Close'] = self._ema('EMA13_Close', c2, span=p['span_ema13'])
+        columnes['SMA_55_Volume'], columnes['SMA_13_Volume'] = self._finestra(
+            'Volume', v2, max(55, periode), lambda s: s.rolling(55).mean(), lambda s: s.rolling(periode).mean())
+        columnes['Price_TR_ema8'] = self._ema('Price_TR_ema8', columnes['Price_TR'], span=p['span_rapida'])
+        columnes['Volume_ema8'] = self._ema('Volume_ema8', v2, span=p['span_rapida'])
+        columnes['REPV'] = columnes['SMA_13_Volume'] / _no_zero(atr)
+        columnes['REPV_a'] = _no_zero(columnes['Volume_ema8']) / _no_zero(columnes['Price_TR_ema8'])
+        columnes['REPV_R'] = columnes['REPV_a'] / _no_zero(columnes['REPV'])
+        columnes['IPE'] = columnes['Log_Divergence_Ratio'] / _no_zero(columnes['REPV_R'])
+
+        # Estocàstic del preu
+        columnes['Low_8'] = self._finestra('Low', l2, periode, lambda s: s.rolling(periode).min())
+        columnes['High_8'] = self._finestra('High', h2, periode, lambda s: s.rolling(periode).max())
+        columnes['Fast_%K'] = 100 * ((c2 - columnes['Low_8']) / _no_zero(columnes['High_8'] - columnes['Low_8']))
+        columnes['Slow_%K'] = self._finestra('Fast_%K', columnes['Fast_%K'], 1, lambda s: s.rolling(1).mean())
+        columnes['Slow_%D'] = self._finestra('Slow_%K', columnes['Slow_%K'], 3, lambda s: s.rolling(3).mean())
+
+        # Estocàstics del VTR_EMA (RED) i de l'ATR
+        for font, sufix in (('VTR_EMA', 'RED'), ('ATR', 'ATR')):
+            x = columnes[font]
+            minim = self._finestra(f'Low_{sufix}', x, periode, lambda s: s.rolling(periode).min())
+            maxim = self._finestra(f'High_{sufix}', x, periode, lambda s: s.rolling(periode).max())
+            rang = maxim - minim
+            columnes[f'Low_{sufix}'], columnes[f'High_{sufix}'] = minim, maxim
+            columnes[f'Fast_%{sufix}-K'] = np.where(rang > 0, 100 * ((x - minim) / rang), 50)
+            columnes[f'Slow_%{sufix}-K'] = self._finestra(f'Fast_%{sufix}-K', columnes[f'Fast_%{sufix}-K'], 3,
+                                                          lambda s: s.rolling(3).mean())
+            columnes[f'Slow_%{sufix}-D'] = self._finestra(f'Slow_%{sufix}-K', columnes[f'Slow_%{sufix}-K'], 3,
+                                                          lambda s: s.rolling(3).mean())
+
+        # ADX (suavitzat de Wilder)
+        periode_adx = p['periode_adx']
+        puja = h2 - _desplaca(self._e('high2'), h2)
+        baixa = _desplaca(self._e('low2'), l2) - l2
+        mes_dm = np.where((puja > 0) & (puja > baixa), puja, 0)
+        menys_dm = np.where((baixa > 0) & (baixa > puja), baixa, 0)
+        atr_adx = _no_zero(self._ema('ATR_ADX', tr, alpha=1 / periode_adx))
+        mes_di = 100 * (self._ema('+DM', mes_dm.astype(np.float64), alpha=1 / periode_adx) / atr_adx)
+        menys_di = 100 * (self._ema('-DM', menys_dm.astype(np.float64), alpha=1 / periode_adx) / atr_adx)
+        suma_di = mes_di + menys_di
+        dx = np.where(suma_di > 0, 100 * (np.abs(mes_di - menys_di) / suma_di), 0)
+        columnes['+DI'], columnes['-DI'] = mes_di, menys_di
+        columnes['ADX'] = self._ema('ADX', dx.astype(np.float64), alpha=1 / periode_adx)
+
+        # Llindars dinàmics (quantils mòbils)
+        n2 += len(c2)
+        finestra = min(_finestra_quantil(self.interval_type, p), n2)
+        mida = _finestra_quantil(self.interval_type, p)
+        for font, nom in (('Log_Divergence_Ratio', 'LDR'), ('Log_Volatility_Ratio', 'LVR'),
+                          ('REPV_R', 'REPV_R'), ('IPE', 'IPE')):
+            columnes[f'{nom}_Q10'], columnes[f'{nom}_Q90'] = self._finestra(
+                f'{nom}_Q', columnes[font], mida,
+                lambda s: s.rolling(finestra).quantile(0.10), lambda s: s.rolling(finestra).quantile(0.90))
+
+        if len(c2):
+            self.escalars['close2'], self.escalars['high2'], self.escalars['low2'] = c2[-1], h2[-1], l2[-1]
+        self.escalars['n_etapa2'] = n2
+        self.darrer_temps = int(utc.asi8[-1])
+
+        # Neteja final: només les files sense cap NaN
+        resultat = pd.DataFrame(columnes, index=index)
+        resultat = resultat[resultat.notna().all(axis=1)]
+        if self.compacte:
+            return resultat[aux.COLUMNES_COMPACTES].astype(np.float32)
+        return resultat
+
+    def _buit(self):
+        columnes = aux.COLUMNES_COMPACTES if self.compacte else COLUMNES_SORTIDA
+        return pd.DataFrame({c: np.empty(0, np.float32 if self.compacte else np.float64) for c in columnes})
+
+    # --- Instantànies ---
+
+    def desa(self, cami):
+        """Desa l'estat en un fitxer .npz (escriptura atòmica)."""
+        meta = {'interval_type': self.interval_type, 'parametres': self.parametres,
+                'compacte': self.compacte, 'darrer_temps': self.darrer_temps, 'versio': VERSIO_MOTOR}
+        arrays = {'meta': np.array(json.dumps(meta))}
+        arrays.update({f'e_{nom}': np.array(valor, dtype=np.float64) for nom, valor in self.escalars.items()})
+        arrays.update({f'f_{nom}': valors for nom, valors in self.finestres.items()})
+        os.makedirs(os.path.dirname(cami) or '.', exist_ok=True)
+        with open(cami + '.tmp', 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(cami + '.tmp', cami)
+
+    @classmethod
+    def carrega(cls, cami):
+        """Reprèn un motor desat amb desa(). Error si és d'una altra versió del codi."""
+        with np.load(cami) as dades:
+            meta = json.loads(str(dades['meta']))
+            if meta['versio'] != VERSIO_MOTOR:
+                raise ValueError(f"Instantània d'una altra versió del motor: {cami}")
+            motor = cls(meta['interval_type'], meta['parametres'], meta['compacte'])
+            motor.darrer_temps = meta['darrer_temps']
+            for clau in dades.files:
+                if clau.startswith('e_'):
+                    motor.escalars[clau[2:]] = float(dades[clau])
+                elif clau.startswith('f_'):
+                    motor.finestres[clau[2:]] = dades[clau]
+        return motor
+
+
+# Codi del qual depèn l'estat: una instantània d'una altra versió no es reprèn
+VERSIO_MOTOR = hashlib.sha1(''.join(inspect.getsource(f) for f in (
+    _no_zero, _desplaca, _finestra_quantil, MotorIndicadors, aux.min_max_scale_log)).encode()).hexdigest()[:12]
+
+
+if __name__ == "__main__":
+    import time
+    import yfinance as yf
+
+    parametres = {'normalitzacio': 'mobil'}
+    df = yf.download("BTC-USD", period="2y", interval="1h", progress=False)
+    nou, historic = df.iloc[-24:], df.iloc[:-24]
+
+    inici = time.time()
+    motor = MotorIndicadors('1h', parametres)
+    motor.actualitza(historic)
+    motor.desa('estat_indicadors/BTC-USD_1h.npz')
+    print(f"Història completa: {1000 * (time.time() - inici):.0f} ms")
+
+    inici = time.time()
+    motor = MotorIndicadors.carrega('estat_indicadors/BTC-USD_1h.npz')
+    files = motor.actualitza(df)
+    print(f"Represa + {len(nou)} barres noves: {1000 * (time.time() - inici):.0f} ms")
+
+    referencia = aux.dades_diaries(df.copy(), '1h', parametres).loc[files.index]
+    print(f"Diferència màxima amb dades_diaries: {(files - referencia).abs().max().max():.2e}")
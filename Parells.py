@@ -0,0 +1,194 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Configuració de Pandas
+pd.set_option('display.max_rows', None)
+pd.set_option('display.max_columns', None)
+
+# ----------------------------------------------------------------------
+# --- ESTADÍSTIQUES DE TOTS ELS PARELLS (N x (N-1) / 2) ---
+# ----------------------------------------------------------------------
+# Treballem amb la ràtio logarítmica s_ij = log(P_i) - log(P_j). Totes les
+# estadístiques del parell es poden obtenir de sumes creuades entre actius,
+# de manera que cada bloc de parells és un producte de matrius (T x b) i mai
+# no cal materialitzar les T x N x N sèries de ràtios.
+# Els actius no tenen per què cobrir el mateix període (llistats nous): cada
+# parell es calcula només sobre les files on tots dos tenen preu. Les sèries es
+# guarden amb 0 on no hi ha dades i una màscara, i les sumes de cada parell sobre
+# les files comunes són productes amb la màscara de l'altre actiu.
+
+# Dades compartides pels processos (s'inicialitzen un cop per procés)
+_DADES = {}
+
+def _inicialitza(dades):
+    _DADES.clear()
+    _DADES.update(dades)
+
+def _centra(valors, mascara):
+    """Resta la mitjana de cada columna (sobre les files amb dades) i posa 0 a la resta."""
+    n = np.maximum(mascara.sum(axis=0), 1)
+    mitjana = np.where(mascara, valors, 0).sum(axis=0) / n
+    return np.where(mascara, valors - mitjana, 0), mitjana
+
+def _prepara(preus, finestra_corr):
+    """Calcula les matrius centrades i les màscares que necessiten tots els blocs."""
+    L = np.log(preus.to_numpy(dtype=np.float64))
+    W = ~np.isnan(L)
+
+    # Nivells (per mitjana, desviació i z-score actual)
+    Lc, mitjana = _centra(L, W)
+
+    # Regressió AR(1) del diferencial: Δs_t = a + b * s_(t-1) (parells de barres consecutives amb dades)
+    V = W[1:] & W[:-1]
+    Dc, _ = _centra(np.diff(L, axis=0), V)
+    Xc, _ = _centra(L[:-1], V)
+
+    # Retorns de la finestra mòbil (correlació recent)
+    Vr = V[-finestra_corr:]
+    Rc, _ = _centra(np.diff(L, axis=0)[-finestra_corr:], Vr)
+
+    f = lambda m: m.astype(np.float64)
+    return {
+        'mitjana': mitjana,
+        'darrer': L[-1],  # NaN si l'actiu no té preu a la darrera fila
+        'L': (Lc, Lc, Lc * Lc, f(W)),
+        'AR': (Dc, Xc, Dc * Xc, f(V)),
+        'X': (Xc, Xc, Xc * Xc, f(V)),
+        'R': (Rc, Rc, Rc * Rc, f(Vr)),
+    }
+
+def _sumes(dades, A, B):
+    """
+    Sumes sobre les files comunes de cada parell (i del bloc A, j del bloc B) per a
+    dues sèries a i b amb la mateixa màscara m (matrius b x b).
+    """
+    a, b, ab, m = dades
+    return {
+        'n': m[:, A].T @ m[:, B],
+        'a_i': a[:, A].T @ m[:, B], 'a_j': m[:, A].T @ a[:, B],
+        'b_i': b[:, A].T @ m[:, B], 'b_j': m[:, A].T @ b[:, B],
+        'ab_ii': ab[:, A].T @ m[:, B], 'ab_jj': m[:, A].T @ ab[:, B],
+        'ab_ij': a[:, A].T @ b[:, B], 'ab_ji': b[:, A].T @ a[:, B],
+    }
+
+def _cov_diferencies(s):
+    """Covariància mostral de (a_i - a_j) i (b_i - b_j) sobre les files comunes."""
+    suma_u, suma_v = s['a_i'] - s['a_j'], s['b_i'] - s['b_j']
+    suma_uv = s['ab_ii'] - s['ab_ij'] - s['ab_ji'] + s['ab_jj']
+    return (suma_uv - suma_u * suma_v / s['n']) / (s['n'] - 1)
+
+def _calcula_bloc(bloc):
+    """Estadístiques dels parells (i, j) amb i al bloc A, j al bloc B i i < j."""
+    a0, a1, b0, b1, top, min_barres = bloc
+    d = _DADES
+    A, B = slice(a0, a1), slice(b0, b1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Mitjana, desviació i z-score actual de la ràtio logarítmica
+        s_L = _sumes(d['L'], A, B)
+        barres = s_L['n']
+        mitjana = d['mitjana'][A, None] - d['mitjana'][None, B] + (s_L['a_i'] - s_L['a_j']) / barres
+        std = np.sqrt(np.maximum(_cov_diferencies(s_L), 0))
+        actual = d['darrer'][A, None] - d['darrer'][None, B]
+        z = (actual - mitjana) / std
+
+        # Half-life: b = cov(Δs, s_lag) / var(s_lag), HL = -ln(2) / ln(1 + b)
+        beta = _cov_diferencies(_sumes(d['AR'], A, B)) / _cov_diferencies(_sumes(d['X'], A, B))
+        half_life = np.where((beta < 0) & (beta > -1), -np.log(2) / np.log1p(beta), np.inf)
+
+        # Correlació dels retorns de la finestra recent (files comunes dins de la finestra)
+        s_R = _sumes(d['R'], A, B)
+        n_R = s_R['n']
+        cov = s_R['ab_ij'] - s_R['a_i'] * s_R['b_j'] / n_R
+        var_i = s_R['ab_ii'] - s_R['a_i'] ** 2 / n_R
+        var_j = s_R['ab_jj'] - s_R['a_j'] ** 2 / n_R
+        corr = np.where(n_R > 2, cov / np.sqrt(var_i * var_j), np.nan)
+
+    # Parells amb poca història en comú: sense estadístiques
+    curts = barres < min_barres
+    for valors in (mitjana, std, z, half_life, corr):
+        valors[curts] = np.nan
+
+    # Només parells i < j
+    ii, jj = np.meshgrid(np.arange(a0, a1), np.arange(b0, b1), indexing='ij')
+    mascara = ii < jj
+    if top is not None and mascara.sum() > top:
+        # Retallem el bloc per mantenir la memòria acotada
+        puntuacio = np.where(mascara & np.isfinite(z), np.abs(z), -1)
+        llindar = np.partition(puntuacio.ravel(), -top)[-top]
+        mascara &= puntuacio >= llindar
+
+    return (ii[mascara], jj[mascara], actual[mascara], mitjana[mascara], std[mascara],
+            z[mascara], half_life[mascara], corr[mascara], barres[mascara])
+
+def estadistiques_parells(preus, finestra_corr=30, mida_bloc=64, processos=None, top=None,
+                          min_barres=100):
+    """
+    Calcula les estadístiques de la ràtio de tots els parells d'un univers.
+
+    Cada parell fa servir només les files on tots dos actius tenen preu, de manera
+    que un llistat recent no retalla la història dels altres parells.
+
+    Args:
+        preus (pd.DataFrame): Preus de tancament (temps x ticker), amb NaN on no n'hi ha.
+        finestra_corr (int): Barres per a la correlació recent dels retorns.
+        mida_bloc (int): Actius per bloc; la memòria de cada tasca és O(T x mida_bloc).
+        processos (int): Processos a utilitzar (1 = sense pool).
+        top (int): Si s'indica, només es retornen els 'top' parells més estirats.
+        min_barres (int): Files comunes mínimes; els parells amb menys queden sense estadístiques.
+
+    Returns:
+        pd.DataFrame: Parells ordenats per |z-score| de més a menys estirat. 'Correlacio_Recent'
+                      és un sol valor: la correlació dels retorns de les darreres 'finestra_corr'
+                      barres. 'Barres' són les files comunes del parell. Sense preu a la darrera
+                      fila, la ràtio actual i el z-score són NaN.
+    """
+    preus = preus.dropna(how='all')
+    tickers = np.asarray(preus.columns)
+    N = len(tickers)
+    dades = _prepara(preus, finestra_corr)
+
+    limits = list(range(0, N, mida_bloc)) + [N]
+    blocs = [(limits[a], limits[a + 1], limits[b], limits[b + 1], top, min_barres)
+             for a in range(len(limits) - 1) for b in range(a, len(limits) - 1)]
+
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(blocs) == 1:
+        _inicialitza(dades)
+        resultats = [_calcula_bloc(bloc) for bloc in blocs]
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_inicialitza,
+                                 initargs=(dades,)) as pool:
+            resultats = list(pool.map(_calcula_bloc, blocs))
+
+    columnes = [np.concatenate(c) for c in zip(*resultats)]
+    i, j, actual, mitjana, std, z, half_life, corr, barres = columnes
+
+    taula = pd.DataFrame({
+        'Actiu_A': tickers[i],
+        'Actiu_B': tickers[j],
+        'Ratio': np.exp(actual),
+        'Log_Ratio_Mitjana': mitjana,
+        'Log_Ratio_Std': std,
+        'Z_Score': z,
+        'Half_Life': half_life,
+        'Correlacio_Recent': corr,
+        'Barres': barres.astype(np.int64),
+    })
+    taula = taula.reindex(taula['Z_Score'].abs().sort_values(ascending=False).index)
+    if top is not None:
+        taula = taula.head(top)
+    return taula.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    univers = ["BTC-USD", "ETH-USD", "BNB-USD", "XRP-USD", "ADA-USD",
+               "SOL-USD", "DOGE-USD", "DOT-USD", "TRX-USD", "LINK-USD",
+               "AVAX-USD", "LTC-USD", "BCH-USD", "XLM-USD", "UNI-USD"]
+
+    preus = yf.download(univers, period="1y")["Close"]
+    parells = estadistiques_parells(preus, top=20)
+    print(parells.round(3).to_string())
@@ -0,0 +1,240 @@
+import pandas as pd
+import numpy as np
+import os
+from Planificador import CALENDARIS, calendari_ticker
+from Exportacio import afegeix_columnes, llegeix_columnes, llegeix_esquema, ultim_temps, _desa_esquema, \
+    _temps_utc, _com_index
+from Descarrega import descarrega_lot, _desplacament_periode
+
+# ----------------------------------------------------------------------
+# --- PIRÀMIDE DE CANDELES (1H -> 4H / 1D / 1W) ---
+# ----------------------------------------------------------------------
+# Per a cada ticker es guarden un sol cop les barres de la resolució base (1h)
+# en un directori de columnes (vegeu Exportacio.py) i els nivells agregats en un
+# .npz per nivell. Les candeles agregades segueixen el calendari del ticker
+# (Planificador.CALENDARIS): les de 4h comencen a l'obertura de la sessió, les
+# diàries van per data local i les setmanals comencen en dilluns.
+# En afegir barres noves només es recalcula des de la darrera candela agregada
+# (l'única que pot estar incompleta).
+
+NIVELLS = ('4h', '1d', '1w')
+COLUMNES = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+HORA = pd.Timedelta(hours=1).value
+DIA = pd.Timedelta(days=1).value
+DURADA_NIVELL = {'4h': pd.Timedelta(hours=4).value, '1d': DIA, '1w': 7 * DIA}
+
+def claus_candela(temps, nivell, calendari):
+    """
+    Inici (ns, hora local del calendari) de la candela de 'nivell' a la qual pertany cada barra.
+
+    Args:
+        temps (np.ndarray): Temps de les barres base en ns UTC.
+    """
+    cal = CALENDARIS[calendari]
+    local = pd.to_datetime(temps, unit='ns', utc=True).tz_convert(cal['tz']).tz_localize(None)
+    local = local.as_unit('ns').asi8
+    dia = local - local % DIA
+    if nivell == '1d':
+        return dia
+    if nivell == '1w':
+        # 1970-01-01 va ser dijous: es desplaça perquè les setmanes comencin en dilluns
+        return dia - (dia // DIA + 3) % 7 * DIA
+    obertura = (cal['obertura'][0] * 60 + cal['obertura'][1]) * 60 * 10**9
+    durada = DURADA_NIVELL[nivell]
+    return dia + obertura + (local - dia - obertura) // durada * durada
+
+def agrega(temps, valors, nivell, calendari):
+    """
+    Agrega barres base (ordenades) en candeles de 'nivell' amb np.ufunc.reduceat.
+
+    Args:
+        valors (dict): Columna -> np.ndarray (Open, High, Low, Close, Volume).
+
+    Returns:
+        dict: 'temps' (inici local de cada candela, ns), columnes OHLCV i 'Barres' (barres base agregades).
+    """
+    if len(temps) == 0:
+        return {'temps': np.empty(0, np.int64), **{c: np.empty(0) for c in COLUMNES},
+                'Barres': np.empty(0, np.int64)}
+    claus = claus_candela(temps, nivell, calendari)
+    inicis = np.flatnonzero(np.concatenate(([True], claus[1:] != claus[:-1])))
+    finals = np.append(inicis[1:], len(claus))
+    return {
+        'temps': claus[inicis],
+        'Open': np.asarray(valors['Open'])[inicis],
+        'High': np.maximum.reduceat(valors['High'], inicis),
+        'Low': np.minimum.reduceat(valors['Low'], inicis),
+        'Close': np.asarray(valors['Close'])[finals - 1],
+        'Volume': np.add.reduceat(valors['Volume'], inicis),
+        'Barres': finals - inicis,
+    }
+
+
+class PiramideCandeles:
+    """
+    Magatzem local de candeles: una sola resolució base per ticker i nivells agregats
+    precalculats. obte() retorna qualsevol interval i període sense tornar a descarregar.
+    """
+
+    def __init__(self, directori='piramide_candeles', base='1h'):
+        self.directori = directori
+        self.base = base
+        self._nivells = {}  # (ticker, nivell) -> dict d'arrays (cache en memòria)
+
+    def _directori_ticker(self, ticker):
+        return os.path.join(self.directori, ticker.replace('/', '_'))
+
+    def _directori_base(self, ticker):
+        return os.path.join(self._directori_ticker(ticker), self.base)
+
+    # --- Nivells agregats ---
+
+    def _cami_nivell(self, ticker, nivell):
+        return os.path.join(self._directori_ticker(ticker), f'{nivell}.npz')
+
+    def _nivell(self, ticker, nivell):
+        clau = (ticker, nivell)
+        if clau not in self._nivells:
+            cami = self._cami_nivell(ticker, nivell)
+            if not os.path.exists(cami):
+                return None
+            with np.load(cami) as dades:
+                self._nivells[clau] = {k: dades[k] for k in dades.files}
+        return self._nivells[clau]
+
+    def _desa_nivell(self, ticker, nivell, dades):
+        # S'escriu a un temporal i es reanomena: el fitxer mai queda a mitges
+        cami = self._cami_nivell(ticker, nivell)
+        with open(cami + '.tmp', 'wb') as f:
+            np.savez(f, **dades)
+        os.replace(cami + '.tmp', cami)
+        self._nivells[(ticker, nivell)] = dades
+
+    def _actualitza_nivells(self, ticker, des_de):
+        """Recalcula cada nivell a partir de la candela que conté la barra base 'des_de' (ns UTC)."""
+        calendari = calendari_ticker(ticker)
+        temps, valors, _ = llegeix_columnes(self._directori_base(ticker), COLUMNES)
+        for nivell in NIVELLS:
+            anterior = self._nivell(ticker, nivell)
+            if anterior is None or len(anterior['temps']) == 0:
+                self._desa_nivell(ticker, nivell, agrega(temps, valors, nivell, calendari))
+                continue
+            # Es conserven les candeles anteriors a la de 'des_de' i es recalcula la resta. Les
+            # claus només es calculen per a les barres base que poden caure en aquella candela.
+            clau = claus_candela(np.array([des_de]), nivell, calendari)[0]
+            conservades = int(np.searchsorted(anterior['temps'], clau))
+            marge = int(np.searchsorted(temps, des_de - DURADA_NIVELL[nivell] - 2 * HORA))
+            inici = marge + int(np.searchsorted(claus_candela(temps[marge:], nivell, calendari), clau))
+            nou = agrega(temps[inici:], {c: v[inici:] for c, v in valors.items()}, nivell, calendari)
+            self._desa_nivell(ticker, nivell, {k: np.concatenate((anterior[k][:conservades], nou[k]))
+                                               for k in anterior})
+
+    # --- Escriptura ---
+
+    def afegeix(self, ticker, df):
+        """
+        Afegeix barres de la resolució base i actualitza els nivells agregats.
+
+        Les barres a partir de la darrera guardada la substitueixen (la darrera barra
+        descarregada pot estar encara oberta).
+
+        Returns:
+            int: Nombre de barres base escrites.
+        """
+        df = df[COLUMNES].dropna()
+        if df.empty:
+            return 0
+        utc, _ = _temps_utc(df.index)
+        temps_nous = utc.asi8
+
+        directori = self._directori_base(ticker)
+        esquema = llegeix_esquema(directori)
+        if esquema is not None and esquema['files']:
+            # Còpia dels temps: no es pot truncar un fitxer que té un memmap obert (Windows)
+            temps = np.array(llegeix_columnes(directori, [])[0])
+            noves = temps_nous >= temps[-1]
+            df, temps_nous = df[noves], temps_nous[noves]
+            if df.empty:
+                return 0
+            # Les files des de la primera barra nova es descarten i es tornen a escriure
+            esquema['files'] = int(np.searchsorted(temps, temps_nous[0]))
+            _desa_esquema(directori, esquema)
+
+        afegeix_columnes(directori, df)
+        self._actualitza_nivells(ticker, int(temps_nous[0]))
+        return len(df)
+
+    def actualitza(self, ticker, periode_inicial='730d'):
+        """
+        Descarrega les barres base noves (tota la història inicial la primera vegada)
+        i les afegeix. Retorna el nombre de barres escrites.
+        """
+        esquema = llegeix_esquema(self._directori_base(ticker))
+        if esquema is None or esquema['files'] == 0:
+            periode = periode_inicial
+        else:
+            ultim = pd.Timestamp(ultim_temps(self._directori_base(ticker)), tz='UTC')
+            dies = (pd.Timestamp.now(tz='UTC') - ultim).days
+            periode = f'{dies + 2}d'
+        dades = descarrega_lot([(ticker, self.base, periode)])
+        if (ticker, self.base) not in dades:
+            return 0
+        return self.afegeix(ticker, dades[(ticker, self.base)])
+
+    # --- Lectura ---
+
+    def obte(self, ticker, interval='1d', periode=None, inici=None, fi=None, incompleta=True):
+        """
+        Candeles OHLCV d'un ticker a qualsevol nivell, des del disc.
+
+        Args:
+            interval (str): La resolució base o un de NIVELLS.
+            periode (str): Període cap enrere des de la darrera candela ('3mo', '2y'...).
+            inici, fi (str | pd.Timestamp): Rang de dates (inclusiu), en hora local del ticker.
+            incompleta (bool): Si és fals, es descarta la darrera candela si encara no ha acabat.
+
+        Returns:
+            pd.DataFrame: OHLCV (i 'Barres' als nivells agregats) amb índex en la zona horària del ticker.
+        """
+        tz = CALENDARIS[calendari_ticker(ticker)]['tz']
+        if interval == self.base:
+            temps, valors, _ = llegeix_columnes(self._directori_base(ticker), COLUMNES)
+            index = pd.to_datetime(np.asarray(temps), unit='ns', utc=True).tz_convert(tz)
+        elif interval in NIVELLS:
+            dades = self._nivell(ticker, interval)
+            if dades is None:
+                raise KeyError(f"No hi ha candeles guardades per a {ticker}")
+            valors = {c: dades[c] for c in COLUMNES + ['Barres']}
+            index = pd.to_datetime(dades['temps'], unit='ns').tz_localize(tz, ambiguous='NaT',
+                                                                          nonexistent='shift_forward')
+        else:
+            raise ValueError(f"Interval no disponible: {interval} (base {self.base}, nivells {NIVELLS})")
+
+        df = pd.DataFrame(valors, index=index)
+        if not incompleta and interval in NIVELLS and len(df):
+            fi_candela = index[-1].tz_localize(None) + pd.Timedelta(DURADA_NIVELL[interval], 'ns')
+            if fi_candela > pd.Timestamp.now(tz=tz).tz_localize(None):
+                df = df.iloc[:-1]
+        if periode is not None and len(df):
+            desplacament = _desplacament_periode(periode)
+            if desplacament is not None:
+                df = df[df.index >= df.index[-1].normalize() - desplacament]
+        if inici is not None:
+            df = df[df.index >= _com_index(inici, df.index)]
+        if fi is not None:
+            df = df[df.index <= _com_index(fi, df.index)]
+        return df
+
+
+if __name__ == "__main__":
+    import time
+
+    piramide = PiramideCandeles()
+    for ticker in ("BTC-USD", "^IBEX"):
+        print(f"{ticker}: {piramide.actualitza(ticker)} barres base noves")
+        for interval in ('1h',) + NIVELLS:
+            inici = time.time()
+            df = piramide.obte(ticker, interval, periode='3mo')
+            print(f"  {interval}: {len(df)} candeles en {1000 * (time.time() - inici):.1f} ms")
+        print(piramide.obte(ticker, '1d').tail(5).to_string())
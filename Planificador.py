@@ -0,0 +1,281 @@
+import yfinance as yf
+import pandas as pd
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import Dades_actiu_aux as aux
+from Descarrega import normalitza_columnes
+from Motor_indicadors import MotorIndicadors
+
+# ----------------------------------------------------------------------
+# --- PLANIFICADOR ALINEAT AMB EL TANCAMENT DE LES CANDELES ---
+# ----------------------------------------------------------------------
+
+# Calendaris de mercat: zona horària, sessió (hora local) i dies hàbils (0 = dilluns).
+# No inclouen festius: un dia festiu simplement no porta barres noves i no dispara res.
+CALENDARIS = {
+    'crypto': {'tz': 'UTC', 'obertura': (0, 0), 'tancament': (24, 0), 'dies': range(7)},
+    'XMAD': {'tz': 'Europe/Madrid', 'obertura': (9, 0), 'tancament': (17, 30), 'dies': range(5)},
+    'XNYS': {'tz': 'America/New_York', 'obertura': (9, 30), 'tancament': (16, 0), 'dies': range(5)},
+}
+
+DURADA_INTERVAL = {
+    '1h': timedelta(hours=1),
+    '4h': timedelta(hours=4),
+    '1d': timedelta(days=1),
+}
+
+# Història inicial que es descarrega per a cada interval (com als scripts Dades_actiu)
+PERIODE_INICIAL = {'1d': '2y', '4h': '3mo', '1h': '3mo'}
+TIPUS_INTERVAL = {'1d': 'diari', '4h': '4h', '1h': '1h'}
+
+# Marge perquè Yahoo publiqui la candela tancada
+MARGE_PUBLICACIO = timedelta(minutes=2)
+
+# Si passat el marge la candela encara no hi és, es torna a provar amb espera exponencial
+# (1, 2, 4... minuts fins a REINTENT_MAXIM) en lloc d'esperar tot un interval
+REINTENT_INICIAL = timedelta(minutes=1)
+REINTENT_MAXIM = timedelta(minutes=30)
+MAX_REINTENTS = 6
+
+# Paràmetres de dades_diaries per defecte: sense repintat, així cada candela nova només
+# passa pel motor incremental (Motor_indicadors.py) en lloc de recalcular tota la història
+PARAMETRES_PLANIFICADOR = {'normalitzacio': 'expansiva'}
+
+def calendari_ticker(ticker):
+    """Assigna un calendari de mercat a partir del ticker de Yahoo."""
+    if ticker.endswith('-USD') or ticker.endswith('-USDT') or ticker.endswith('-EUR'):
+        return 'crypto'
+    if ticker in ('^IBEX',) or ticker.endswith('.MC'):
+        return 'XMAD'
+    return 'XNYS'
+
+def tancaments_dia(calendari, interval, dia):
+    """Llista (UTC) dels tancaments de candela d'un dia local del calendari."""
+    cal = CALENDARIS[calendari]
+    if dia.weekday() not in cal['dies']:
+        return []
+
+    tz = ZoneInfo(cal['tz'])
+    obertura = datetime(dia.year, dia.month, dia.day, tzinfo=tz) + \
+        timedelta(hours=cal['obertura'][0], minutes=cal['obertura'][1])
+    tancament = datetime(dia.year, dia.month, dia.day, tzinfo=tz) + \
+        timedelta(hours=cal['tancament'][0], minutes=cal['tancament'][1])
+
+    if interval == '1d':
+        return [tancament.astimezone(timezone.utc)]
+
+    # Les candeles intradia comencen a l'obertura; l'última es talla al tancament
+    durada = DURADA_INTERVAL[interval]
+    tancaments = []
+    t = obertura + durada
+    while t < tancament:
+        tancaments.append(t.astimezone(timezone.utc))
+        t += durada
+    tancaments.append(tancament.astimezone(timezone.utc))
+    return tancaments
+
+def proper_tancament(ticker, interval, ara=None):
+    """Proper tancament de candela (UTC) estrictament posterior a 'ara'."""
+    ara = ara or datetime.now(timezone.utc)
+    calendari = calendari_ticker(ticker)
+    tz = ZoneInfo(CALENDARIS[calendari]['tz'])
+    dia = ara.astimezone(tz).date()
+    for offset in range(8):
+        for t in tancaments_dia(calendari, interval, dia + timedelta(days=offset)):
+            if t > ara:
+                return t
+    raise ValueError(f"No s'ha trobat cap tancament per a {ticker} {interval}")
+
+def reintent(ticker, interval, ara, reintents):
+    """
+    Proper intent després d'un despertar sense candela nova. Mai va més enllà del proper
+    tancament i, passats MAX_REINTENTS (p. ex. un festiu, sense sessió), s'hi espera.
+
+    Returns:
+        tuple: (datetime UTC del proper intent, reintents acumulats; 0 si és el proper tancament).
+    """
+    tancament = proper_tancament(ticker, interval, ara) + MARGE_PUBLICACIO
+    if reintents >= MAX_REINTENTS:
+        return tancament, 0
+    intent = ara + min(REINTENT_INICIAL * 2 ** reintents, REINTENT_MAXIM)
+    if intent >= tancament:
+        return tancament, 0
+    return intent, reintents + 1
+
+def candela_oberta(ticker, interval, inici):
+    """Cert si la candela que comença a 'inici' (pd.Timestamp) encara no ha tancat."""
+    if inici.tzinfo is None:
+        inici = inici.tz_localize(CALENDARIS[calendari_ticker(ticker)]['tz'])
+    return proper_tancament(ticker, interval, inici.to_pydatetime()) > datetime.now(timezone.utc)
+
+
+class Planificador:
+    """
+    Dimoni que es desperta al tancament de cada candela (1h/4h/1d) de cada ticker,
+    descarrega només les barres noves, actualitza els indicadors i crida els
+    callbacks registrats per a aquell marc temporal.
+
+    Cada callback rep (planificador, ticker, interval) i pot llegir les dades de
+    qualsevol marc amb 'indicadors(ticker, interval)'.
+
+    Args:
+        parametres (dict): Paràmetres de dades_diaries (per defecte PARAMETRES_PLANIFICADOR).
+            Amb normalització 'global' cada candela nova recalcula tota la història.
+    """
+
+    def __init__(self, parametres=None):
+        self.tasques = {}        # (ticker, interval) -> llista de callbacks
+        self.candeles = {}       # (ticker, interval) -> DataFrame OHLCV de candeles tancades
+        self._indicadors = {}    # (ticker, interval) -> DataFrame de dades_diaries
+        self._motors = {}        # (ticker, interval) -> MotorIndicadors (sense repintat)
+        self.propers = {}        # (ticker, interval) -> proper despertar (UTC)
+        self.reintents = {}      # (ticker, interval) -> despertars seguits sense candela nova
+        self.parametres = {**PARAMETRES_PLANIFICADOR, **(parametres or {})}
+
+    def registra(self, ticker, interval, callback=None):
+        clau = (ticker, interval)
+        self.tasques.setdefault(clau, [])
+        if callback is not None:
+            self.tasques[clau].append(callback)
+
+    # --- Dades ---
+
+    def _descarrega(self, ticker, interval):
+        """Descarrega les barres noves (o tota la història inicial la primera vegada)."""
+        clau = (ticker, interval)
+        anteriors = self.candeles.get(clau)
+
+        if anteriors is None or anteriors.empty:
+            noves = yf.download(ticker, period=PERIODE_INICIAL[interval], interval=interval,
+                                progress=False)
+        else:
+            noves = yf.download(ticker, start=anteriors.index[-1].to_pydatetime(),
+                                interval=interval, progress=False)
+
+        noves = normalitza_columnes(noves).dropna()
+
+        # Descartem la darrera candela si encara està oberta (només ho pot estar l'última)
+        if not noves.empty and candela_oberta(ticker, interval, noves.index[-1]):
+            noves = noves.iloc[:-1]
+        return anteriors, noves
+
+    def actualitza(self, ticker, interval):
+        """
+        Incorpora les barres noves. Retorna True si hi ha alguna candela tancada nova
+        (i per tant s'han recalculat els indicadors).
+        """
+        clau = (ticker, interval)
+        anteriors, noves = self._descarrega(ticker, interval)
+
+        if anteriors is not None and not noves.empty:
+            noves = noves[noves.index > anteriors.index[-1]]
+        if noves.empty:
+            return False
+
+        candeles = noves if anteriors is None else pd.concat([anteriors, noves])
+        self.candeles[clau] = candeles
+        if self.parametres['normalitzacio'] == 'global':
+            self._indicadors[clau] = aux.dades_diaries(candeles, TIPUS_INTERVAL[interval], self.parametres)
+        elif clau not in self._motors:
+            self._motors[clau] = MotorIndicadors(TIPUS_INTERVAL[interval], self.parametres)
+            self._indicadors[clau] = self._motors[clau].actualitza(candeles)
+        else:
+            # Només les candeles noves: el motor continua des de l'estat de la darrera
+            self._indicadors[clau] = pd.concat([self._indicadors[clau], self._motors[clau].actualitza(noves)])
+        return True
+
+    def indicadors(self, ticker, interval):
+        """Indicadors calculats de (ticker, interval); els descarrega si no hi són."""
+        clau = (ticker, interval)
+        if clau not in self._indicadors:
+            self.actualitza(ticker, interval)
+        return self._indicadors.get(clau)
+
+    # --- Bucle ---
+
+    def executa_tasca(self, ticker, interval):
+        """
+        Actualitza una tasca i, si hi ha barres noves, crida els seus callbacks.
+        Retorna True si hi havia alguna candela tancada nova.
+        """
+        try:
+            if not self.actualitza(ticker, interval):
+                print(f"{ticker} {interval}: cap candela nova, no es fa res.")
+                return False
+            for callback in self.tasques[(ticker, interval)]:
+                callback(self, ticker, interval)
+            return True
+        except Exception as e:
+            print(f"❌ ERROR a {ticker} {interval}: {e}")
+            return False
+
+    def executa(self, iteracions=None, despres=None):
+        """
+        Bucle principal: dorm fins al proper tancament i executa les tasques vençudes.
+
+        'despres' (opcional) es crida un cop per despertar, després de totes les tasques,
+        amb (planificador, llista de (ticker, interval) amb candeles noves); p. ex. per
+        avaluar alertes sobre tot l'univers i enviar-ne un sol resum.
+        """
+        ara = datetime.now(timezone.utc)
+        for ticker, interval in self.tasques:
+            self.propers[(ticker, interval)] = proper_tancament(ticker, interval, ara) + MARGE_PUBLICACIO
+
+        n = 0
+        while iteracions is None or n < iteracions:
+            despertar = min(self.propers.values())
+            espera = (despertar - datetime.now(timezone.utc)).total_seconds()
+            if espera > 0:
+                print(f"Proper despertar: {despertar:%Y-%m-%d %H:%M} UTC")
+                time.sleep(espera)
+
+            ara = datetime.now(timezone.utc)
+            actualitzades = []
+            for clau, proper in list(self.propers.items()):
+                if proper <= ara:
+                    ticker, interval = clau
+                    if self.executa_tasca(ticker, interval):
+                        actualitzades.append(clau)
+                        self.propers[clau] = proper_tancament(ticker, interval, ara) + MARGE_PUBLICACIO
+                        self.reintents[clau] = 0
+                    else:
+                        # Yahoo encara no ha publicat la candela tancada: es torna a provar aviat
+                        self.propers[clau], self.reintents[clau] = \
+                            reintent(ticker, interval, ara, self.reintents.get(clau, 0))
+            if despres is not None and actualitzades:
+                try:
+                    despres(self, actualitzades)
+                except Exception as e:
+                    print(f"❌ ERROR després del despertar: {e}")
+            n += 1
+
+
+if __name__ == "__main__":
+    import Dades_actiu_ia as ia
+    from Qualitat_dades import informe_marcs, resum_prompt
+
+    def informe(planificador, ticker):
+        """Genera l'informe de l'actiu amb els tres marcs temporals."""
+        df = planificador.indicadors(ticker, '1d')
+        df_raw = planificador.indicadors(ticker, '4h')
+        df_raw_1 = planificador.indicadors(ticker, '1h')
+        qualitat = resum_prompt(informe_marcs(ticker, {'1d': df, '4h': df_raw, '1h': df_raw_1}))
+        ia.genera_informe(df, df_raw, df_raw_1, qualitat)
+
+    def informes(planificador, actualitzades):
+        """
+        Un informe per actiu quan tanca la candela de 4h o la diària. Es fa un cop per
+        despertar: a les 00:00 UTC tanquen totes dues i no s'ha de generar dues vegades.
+        """
+        for ticker in dict.fromkeys(t for t, interval in actualitzades if interval in ('4h', '1d')):
+            try:
+                informe(planificador, ticker)
+            except Exception as e:
+                print(f"❌ ERROR a l'informe de {ticker}: {e}")
+
+    planificador = Planificador()
+    for ticker in ["BTC-USD", "^IBEX"]:
+        for interval in ('1h', '4h', '1d'):
+            planificador.registra(ticker, interval)
+    planificador.executa(despres=informes)
@@ -6,9 +6,13 @@ import matplotlib.pyplot as plt
 ticker = 'BTC-USD'
 
 # Función para obtener datos y calcular las MA de precios y volumen
-def obtenir_dades_amb_MA(ticker, ma_period):
-    # Obtener los datos históricos del último periodo
-    data = yf.Ticker(ticker).history(period=f'{ma_period*5}d')
+def obtenir_dades_amb_MA(ticker, ma_period, piramide=None):
+    # Obtener los datos históricos del último periodo (de la piràmide de candeles local si es dona)
+    if piramide is not None:
+        piramide.actualitza(ticker)
+        data = piramide.obte(ticker, '1d', periode=f'{ma_period*5}d')
+    else:
+        data = yf.Ticker(ticker).history(period=f'{ma_period*5}d')
     # Calcular la MA del precio de cierre y del volumen
     data['MA_Close'] = data['Close'].rolling(window=ma_period).mean()
     data['MA_Volume'] = data['Volume'].rolling(window=ma_period).mean()
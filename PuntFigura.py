@@ -0,0 +1,261 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+# ----------------------------------------------------------------------
+# --- MOTOR DE PUNT I FIGURA (P&F) ---
+# ----------------------------------------------------------------------
+# Els preus es converteixen a índexs de caixa (enter). Amb escala 'abs' la caixa
+# k és el preu k * caixa; amb escala 'pct' és (1 + caixa) ** k, és a dir, caixes
+# d'amplada percentual constant (escala logarítmica).
+
+EPSILON = 1e-9
+
+# Codis de senyal (vegeu senyals())
+SENYAL_DOBLE_SOSTRE = 1
+SENYAL_DOBLE_TERRA = -1
+SENYAL_TRENCA_RESISTENCIA = 2
+SENYAL_TRENCA_SUPORT = -2
+
+NOMS_SENYALS = {
+    SENYAL_DOBLE_SOSTRE: 'Doble sostre (compra)',
+    SENYAL_DOBLE_TERRA: 'Doble terra (venda)',
+    SENYAL_TRENCA_RESISTENCIA: 'Trencament resistència baixista',
+    SENYAL_TRENCA_SUPORT: 'Trencament suport alcista',
+}
+
+def calcular_tamany_caixa(preu):
+    """Mida de caixa tradicional segons el preu (taula clàssica de P&F)."""
+    if preu < 0.25: return 0.0625
+    elif preu < 1.00: return 0.125
+    elif preu < 5.00: return 0.25
+    elif preu < 20.00: return 0.50
+    elif preu < 100: return 1
+    elif preu < 200: return 2
+    elif preu < 500: return 4
+    elif preu < 1000: return 5
+    elif preu < 25000: return 50
+    else: return 500
+
+
+class PuntFigura:
+    """
+    Constructor incremental de columnes de P&F sobre arrays de NumPy.
+
+    Les columnes es guarden en arrays compactes: direcció (+1 = X, -1 = O), caixa
+    inferior, caixa superior i barra on comença la columna. Cada crida a 'afegeix'
+    continua des de l'estat anterior, així que es poden afegir preus a mesura que arriben.
+    """
+
+    def __init__(self, caixa, revers=3, escala='abs'):
+        if escala not in ('abs', 'pct'):
+            raise ValueError("L'escala ha de ser 'abs' o 'pct'")
+        self.caixa = caixa
+        self.revers = revers
+        self.escala = escala
+
+        self._direccio = np.empty(64, dtype=np.int8)
+        self._baix = np.empty(64, dtype=np.int64)
+        self._dalt = np.empty(64, dtype=np.int64)
+        self._barra = np.empty(64, dtype=np.int64)
+        self.n_columnes = 0
+        self.n_barres = 0
+        self.ancora = None
+
+    # --- Conversió preu <-> caixa ---
+
+    def _a_caixa(self, preus):
+        preus = np.asarray(preus, dtype=np.float64)
+        if self.escala == 'abs':
+            return preus / self.caixa
+        return np.log(preus) / np.log1p(self.caixa)
+
+    def preu(self, caixes):
+        """Preu corresponent a un índex (o array d'índexs) de caixa."""
+        caixes = np.asarray(caixes, dtype=np.float64)
+        if self.escala == 'abs':
+            return caixes * self.caixa
+        return np.exp(caixes * np.log1p(self.caixa))
+
+    # --- Columnes ---
+
+    def _nova_columna(self, direccio, baix, dalt, barra):
+        if self.n_columnes == len(self._direccio):
+            for nom in ('_direccio', '_baix', '_dalt', '_barra'):
+                arr = getattr(self, nom)
+                setattr(self, nom, np.concatenate([arr, np.empty_like(arr)]))
+        i = self.n_columnes
+        self._direccio[i], self._baix[i], self._dalt[i], self._barra[i] = direccio, baix, dalt, barra
+        self.n_columnes += 1
+
+    def columnes(self):
+        """Retorna les columnes com a dict d'arrays (vistes sense còpia)."""
+        n = self.n_columnes
+        return {
+            'direccio': self._direccio[:n],
+            'baix': self._baix[:n],
+            'dalt': self._dalt[:n],
+            'barra': self._barra[:n],
+        }
+
+    def afegeix(self, close=None, high=None, low=None):
+        """
+        Afegeix nous preus (mètode de tancament o high/low) i estén les columnes.
+
+        Els índexs de caixa es calculen vectoritzats. Amb el mètode de tancament només
+        es recorren les barres on l'índex de caixa canvia, que són moltes menys que el
+        total: repetir la mateixa caixa no pot estendre ni girar la columna.
+        """
+        tancament = close is not None
+        if tancament:
+            high = low = close
+        pos_dalt = np.floor(self._a_caixa(high) + EPSILON).astype(np.int64)
+        pos_baix = np.ceil(self._a_caixa(low) - EPSILON).astype(np.int64)
+
+        barra0 = self.n_barres
+        self.n_barres += len(pos_dalt)
+        if len(pos_dalt) == 0:
+            return self
+
+        # Barres on alguna caixa canvia respecte a la barra anterior. En high/low no es pot
+        # filtrar: una barra idèntica a l'anterior pot girar la columna que aquesta acaba
+        # d'estendre (el high ja no l'estén i el low pot arribar al revers)
+        canvis = np.ones(len(pos_dalt), dtype=bool)
+        if tancament:
+            canvis[1:] = (np.diff(pos_dalt) != 0) | (np.diff(pos_baix) != 0)
+
+        r = self.revers
+        for i in np.flatnonzero(canvis):
+            h, l = pos_dalt[i], pos_baix[i]
+            n = self.n_columnes
+
+            if n == 0:
+                # Encara no hi ha cap columna: esperem un moviment d'una caixa des de l'àncora
+                if self.ancora is None:
+                    self.ancora = h
+                elif h > self.ancora:
+                    self._nova_columna(1, self.ancora, h, barra0 + i)
+                elif l < self.ancora:
+                    self._nova_columna(-1, l, self.ancora, barra0 + i)
+                continue
+
+            c = n - 1
+            if self._direccio[c] == 1:
+                if h > self._dalt[c]:
+                    self._dalt[c] = h
+                elif l <= self._dalt[c] - r:
+                    self._nova_columna(-1, l, self._dalt[c] - 1, barra0 + i)
+            else:
+                if l < self._baix[c]:
+                    self._baix[c] = l
+                elif h >= self._baix[c] + r:
+                    self._nova_columna(1, self._baix[c] + 1, h, barra0 + i)
+        return self
+
+
+def construeix(close=None, high=None, low=None, caixa=None, revers=3, escala='abs'):
+    """Construeix un gràfic de P&F complet d'una sola crida."""
+    if caixa is None:
+        referencia = close if close is not None else high
+        caixa = calcular_tamany_caixa(float(np.asarray(referencia)[-1]))
+    return PuntFigura(caixa, revers, escala).afegeix(close=close, high=high, low=low)
+
+
+def senyals(pf):
+    """
+    Extreu els senyals clàssics de les columnes d'un gràfic de P&F.
+
+    - Doble sostre: una columna de X supera el màxim de la columna de X anterior.
+    - Doble terra: una columna de O perfora el mínim de la columna de O anterior.
+    - Trencament de la línia de resistència baixista (45°, des del màxim dominant).
+    - Trencament de la línia de suport alcista (45°, des del mínim dominant).
+
+    Només hi ha una línia activa, ancorada en un sol pivot: en tendència baixista la
+    resistència surt de la caixa sobre el màxim dominant (la X més alta des del darrer
+    trencament) i baixa una caixa per columna; en alcista el suport surt de la caixa sota
+    el mínim dominant i puja. Quan una columna trenca la línia la tendència gira i la nova
+    línia s'ancora al pivot contrari. La primera tendència la dona la primera reversió.
+
+    Returns:
+        dict: Arrays 'columna', 'senyal' (codi) i 'caixa' (nivell del senyal).
+    """
+    col = pf.columnes()
+    d, baix, dalt = col['direccio'], col['baix'], col['dalt']
+    n = len(d)
+    es_x, es_o = d == 1, d == -1
+
+    anterior = np.arange(n) - 2
+    te_anterior = anterior >= 0
+    ant = np.maximum(anterior, 0)
+
+    doble_sostre = es_x & te_anterior & (dalt > dalt[ant])
+    doble_terra = es_o & te_anterior & (baix < baix[ant])
+
+    # Línies de tendència: l'estat passa de columna en columna (pocs centenars de columnes)
+    trenca_res = np.zeros(n, dtype=bool)
+    trenca_sup = np.zeros(n, dtype=bool)
+    nivell_linia = np.zeros(n, dtype=np.int64)
+    tendencia = 0              # +1 alcista (suport actiu), -1 baixista (resistència activa)
+    pivot = None               # (columna, caixa) on s'ancora la línia activa
+    sostre = terra = None      # X més alta i O més baixa des del darrer trencament
+    for j in range(n):
+        if d[j] == 1:
+            if tendencia == -1:
+                linia = pivot[1] + 1 - (j - pivot[0] - 1)
+                if dalt[j] > linia:
+                    trenca_res[j], nivell_linia[j] = True, linia + 1
+                    tendencia, pivot, sostre = 1, terra, None
+            elif tendencia == 0 and terra is not None:
+                tendencia, pivot = 1, terra
+            if sostre is None or dalt[j] > sostre[1]:
+                sostre = (j, dalt[j])
+        else:
+            if tendencia == 1:
+                linia = pivot[1] - 1 + (j - pivot[0] - 1)
+                if baix[j] < linia:
+                    trenca_sup[j], nivell_linia[j] = True, linia - 1
+                    tendencia, pivot, terra = -1, sostre, None
+            elif tendencia == 0 and sostre is not None:
+                tendencia, pivot = -1, sostre
+            if terra is None or baix[j] < terra[1]:
+                terra = (j, baix[j])
+
+    columnes, codis, caixes = [], [], []
+    for codi, mascara, nivell in ((SENYAL_DOBLE_SOSTRE, doble_sostre, dalt[ant] + 1),
+                                  (SENYAL_DOBLE_TERRA, doble_terra, baix[ant] - 1),
+                                  (SENYAL_TRENCA_RESISTENCIA, trenca_res, nivell_linia),
+                                  (SENYAL_TRENCA_SUPORT, trenca_sup, nivell_linia)):
+        idx = np.flatnonzero(mascara)
+        columnes.append(idx)
+        codis.append(np.full(len(idx), codi, dtype=np.int8))
+        caixes.append(nivell[idx])
+
+    columna = np.concatenate(columnes)
+    ordre = np.argsort(columna, kind='stable')
+    return {
+        'columna': columna[ordre],
+        'senyal': np.concatenate(codis)[ordre],
+        'caixa': np.concatenate(caixes)[ordre],
+    }
+
+
+def grafica_punt_figura(pf, titol='P&F', preu_actual=None):
+    """Dibuixa les columnes (X verdes, O vermelles) amb matplotlib."""
+    col = pf.columnes()
+    fig, ax = plt.subplots(figsize=(12, 7))
+
+    for i, (d, baix, dalt) in enumerate(zip(col['direccio'], col['baix'], col['dalt'])):
+        caixes = np.arange(baix, dalt + 1)
+        ax.scatter(np.full(len(caixes), i), pf.preu(caixes),
+                   marker='x' if d == 1 else 'o', color='green' if d == 1 else 'red',
+                   facecolors='none' if d == -1 else None, s=25)
+
+    if preu_actual is not None:
+        ax.axhline(preu_actual, color='b', linestyle='--', linewidth=1)
+    if pf.escala == 'pct':
+        ax.set_yscale('log')
+    ax.set_title(titol)
+    ax.set_xlabel('Columna')
+    ax.set_ylabel('Preu')
+    ax.grid(True, linestyle=':', alpha=0.6)
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,243 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+from Planificador import CALENDARIS, DURADA_INTERVAL, calendari_ticker
+
+# Configuració de Pandas
+pd.set_option('display.max_rows', None)
+pd.set_option('display.max_columns', None)
+
+# ----------------------------------------------------------------------
+# --- ESCÀNER DE QUALITAT DE LES DADES (FORATS, DUPLICATS, ANOMALIES) ---
+# ----------------------------------------------------------------------
+# Per a cada sèrie OHLCV es compara l'índex amb la graella de barres que
+# s'esperaria segons el calendari del mercat (Planificador.CALENDARIS) i es
+# busquen duplicats, ratxes de volum zero, preus estancats i espelmes anòmales.
+# Tot es fa amb operacions vectoritzades sobre l'índex i les columnes.
+
+# |z| robust (mediana / MAD) a partir del qual una espelma es considera anòmala
+LLINDAR_OUTLIER = 10.0
+
+def _ratxes(mascara):
+    """Longituds de les ratxes de True consecutius d'una màscara booleana."""
+    vores = np.diff(np.concatenate(([0], np.asarray(mascara, dtype=np.int8), [0])))
+    return np.flatnonzero(vores == -1) - np.flatnonzero(vores == 1)
+
+def _z_robust(valors):
+    """Puntuació z robusta (mediana i MAD); NaN si la dispersió és nul·la."""
+    mediana = np.nanmedian(valors)
+    mad = np.nanmedian(np.abs(valors - mediana)) * 1.4826
+    if not mad > 0:
+        return np.full(len(valors), np.nan)
+    return (valors - mediana) / mad
+
+def _temps_locals(index, tz):
+    """
+    Índex (naive o amb zona) -> DatetimeIndex naive en hora local del calendari.
+    Un índex sense zona es considera ja en hora local (Yahoo dona així els diaris).
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        return index
+    return index.tz_convert(tz).tz_localize(None)
+
+def barres_esperades(calendari, interval, inici, fi):
+    """
+    Graella de barres esperades entre 'inici' i 'fi' segons el calendari.
+
+    Returns:
+        pd.DatetimeIndex: Dates de sessió (naive) per a '1d'; inicis de barra en UTC per a l'intradia.
+                          No inclou festius (vegeu informe_qualitat per filtrar-los).
+    """
+    cal = CALENDARIS[calendari]
+    tz = cal['tz']
+    inici = _temps_locals([inici], tz)[0]
+    fi = _temps_locals([fi], tz)[0]
+
+    dies = pd.date_range(inici.normalize(), fi.normalize(), freq='D')
+    dies = dies[np.isin(dies.dayofweek, list(cal['dies']))]
+    if interval == '1d':
+        return dies
+
+    # Les barres intradia comencen a l'obertura cada 'durada' fins al tancament
+    obertura = pd.Timedelta(hours=cal['obertura'][0], minutes=cal['obertura'][1])
+    tancament = pd.Timedelta(hours=cal['tancament'][0], minutes=cal['tancament'][1])
+    durada = pd.Timedelta(DURADA_INTERVAL[interval])
+    desplacaments = pd.timedelta_range(obertura, tancament - pd.Timedelta(1, 'ns'), freq=durada)
+
+    locals_ = pd.DatetimeIndex((dies.values[:, None] + desplacaments.values[None, :]).ravel())
+    locals_ = locals_[(locals_ >= inici) & (locals_ <= fi)]
+    # Les hores inexistents o ambigües dels canvis d'horari es descarten
+    return locals_.tz_localize(tz, ambiguous='NaT', nonexistent='NaT').dropna().tz_convert('UTC')
+
+def _claus_temps(index, calendari, interval):
+    """Índex real -> valors int64 comparables amb barres_esperades."""
+    if interval == '1d':
+        return _temps_locals(index, CALENDARIS[calendari]['tz']).normalize().as_unit('ns').asi8
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize(CALENDARIS[calendari]['tz'], ambiguous='NaT', nonexistent='NaT')
+    return index.tz_convert('UTC').as_unit('ns').asi8
+
+def analitza(df, interval, calendari, tancats=None, llindar=LLINDAR_OUTLIER):
+    """
+    Mètriques de qualitat d'una sèrie OHLCV.
+
+    Args:
+        df (pd.DataFrame): Dades OHLCV (índex de dates).
+        interval (str): '1h', '4h' o '1d'.
+        calendari (str): Clau de Planificador.CALENDARIS.
+        tancats (np.ndarray): Barres esperades (int64) que no s'han de comptar com a forats
+                              (p. ex. festius detectats amb altres tickers).
+        llindar (float): |z| robust per marcar una espelma com a anòmala.
+
+    Returns:
+        dict: Una entrada per mètrica.
+    """
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.droplevel(1)
+    if df.empty:
+        return {'Barres': 0}
+
+    obert = df['Open'].to_numpy(dtype=np.float64)
+    maxim = df['High'].to_numpy(dtype=np.float64)
+    minim = df['Low'].to_numpy(dtype=np.float64)
+    tancament = df['Close'].to_numpy(dtype=np.float64)
+    volum = df['Volume'].to_numpy(dtype=np.float64)
+
+    # 1. Forats respecte al calendari (entre la primera i la darrera barra)
+    reals = _claus_temps(df.index, calendari, interval)
+    esperades = barres_esperades(calendari, interval, df.index.min(), df.index.max())
+    esperades = esperades.as_unit('ns').asi8
+    if tancats is not None and len(tancats):
+        esperades = esperades[~np.isin(esperades, tancats)]
+    falten = ~np.isin(esperades, reals)
+    forats = _ratxes(falten)
+
+    # 2. Duplicats i barres fora del calendari
+    duplicats = int(pd.Index(reals).duplicated().sum())
+    fora_calendari = int((~np.isin(reals, esperades)).sum()) if len(esperades) else 0
+
+    # 3. Ratxes de volum zero i de preus estancats (espelma plana al mateix tancament)
+    volum_zero = _ratxes(volum == 0)
+    estancats = _ratxes((maxim == minim) & (tancament == np.concatenate(([np.nan], tancament[:-1]))))
+
+    # 4. Espelmes invàlides i anòmales (rendiment o rang extrem respecte a la mateixa sèrie)
+    nans = np.isnan(obert) | np.isnan(maxim) | np.isnan(minim) | np.isnan(tancament)
+    invalides = ~nans & ((maxim < np.maximum(obert, tancament)) | (minim > np.minimum(obert, tancament)) |
+                         (minim <= 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rendiment = np.diff(np.log(tancament), prepend=np.nan)
+        rang = np.log(maxim / minim)
+    outliers = (np.abs(_z_robust(rendiment)) > llindar) | (_z_robust(rang) > llindar)
+
+    return {
+        'Barres': len(df),
+        'Esperades': len(esperades),
+        'Falten': int(falten.sum()),
+        'Cobertura_%': 100 * (1 - falten.mean()) if len(esperades) else np.nan,
+        'Forats': len(forats),
+        'Forat_Max': int(forats.max()) if len(forats) else 0,
+        'Fora_Calendari': fora_calendari,
+        'Duplicats': duplicats,
+        'Files_NaN': int(nans.sum()),
+        'Volum_Zero': int(volum_zero.sum()),
+        'Ratxa_Volum_Zero': int(volum_zero.max()) if len(volum_zero) else 0,
+        'Estancades': int(estancats.sum()),
+        'Ratxa_Estancada': int(estancats.max()) if len(estancats) else 0,
+        'Invalides': int(invalides.sum()),
+        'Outliers': int(outliers.sum()),
+        'Primera': df.index.min(),
+        'Darrera': df.index.max(),
+    }
+
+def informe_qualitat(dades, interval, llindar=LLINDAR_OUTLIER):
+    """
+    Informe de qualitat de diversos tickers en un mateix interval.
+
+    Les barres esperades que no té cap dels tickers d'un mateix calendari (si n'hi
+    ha més d'un) es consideren tancaments del mercat (festius) i no compten com a forats.
+
+    Args:
+        dades (dict): ticker -> DataFrame OHLCV.
+
+    Returns:
+        pd.DataFrame: Una fila per ticker.
+    """
+    calendaris = {ticker: calendari_ticker(ticker) for ticker in dades}
+
+    tancats = {}
+    for calendari in set(calendaris.values()):
+        grup = [t for t, c in calendaris.items() if c == calendari and not dades[t].empty]
+        if len(grup) < 2:
+            continue
+        reals = np.concatenate([_claus_temps(dades[t].index, calendari, interval) for t in grup])
+        inici = min(dades[t].index.min() for t in grup)
+        fi = max(dades[t].index.max() for t in grup)
+        esperades = barres_esperades(calendari, interval, inici, fi).as_unit('ns').asi8
+        tancats[calendari] = esperades[~np.isin(esperades, reals)]
+
+    files = {}
+    for ticker, df in dades.items():
+        calendari = calendaris[ticker]
+        files[ticker] = {'Interval': interval, 'Calendari': calendari,
+                         'Festius_Filtrats': calendari in tancats,
+                         **analitza(df, interval, calendari, tancats.get(calendari), llindar)}
+    return pd.DataFrame.from_dict(files, orient='index')
+
+def informe_marcs(ticker, marcs, llindar=LLINDAR_OUTLIER):
+    """
+    Informe de qualitat d'un ticker en diversos marcs temporals.
+
+    Args:
+        marcs (dict): interval -> DataFrame amb OHLCV (dades en brut o sortida de dades_diaries).
+
+    Returns:
+        pd.DataFrame: Una fila per interval.
+    """
+    calendari = calendari_ticker(ticker)
+    return pd.DataFrame.from_dict(
+        {interval: {'Ticker': ticker, 'Calendari': calendari, 'Festius_Filtrats': False,
+                    **analitza(df, interval, calendari, llindar=llindar)}
+         for interval, df in marcs.items()}, orient='index')
+
+def resum_prompt(informe):
+    """Resum breu (una línia per fila de l'informe) per afegir al prompt de Dades_actiu_ia."""
+    linies = []
+    for nom, fila in informe.iterrows():
+        if not fila.get('Barres'):
+            linies.append(f"{nom}: sense dades.")
+            continue
+        incidencies = []
+        if fila['Falten']:
+            festius = '' if fila['Festius_Filtrats'] or fila['Calendari'] == 'crypto' else ', pot incloure festius'
+            incidencies.append(f"falten {fila['Falten']} barres de {fila['Esperades']} "
+                               f"(cobertura {fila['Cobertura_%']:.1f}%, forat màxim {fila['Forat_Max']}{festius})")
+        if fila['Duplicats']:
+            incidencies.append(f"{fila['Duplicats']} barres duplicades")
+        if fila['Files_NaN']:
+            incidencies.append(f"{fila['Files_NaN']} barres amb preus buits")
+        if fila['Volum_Zero']:
+            incidencies.append(f"{fila['Volum_Zero']} barres amb volum zero (ratxa màxima {fila['Ratxa_Volum_Zero']})")
+        if fila['Estancades']:
+            incidencies.append(f"{fila['Estancades']} barres amb el preu estancat "
+                               f"(ratxa màxima {fila['Ratxa_Estancada']})")
+        if fila['Invalides']:
+            incidencies.append(f"{fila['Invalides']} espelmes incoherents (High/Low)")
+        if fila['Outliers']:
+            incidencies.append(f"{fila['Outliers']} espelmes anòmales")
+        linies.append(f"{nom}: " + ('; '.join(incidencies) if incidencies else 'sense incidències') +
+                      f". Darrera barra: {fila['Darrera']}.")
+    return '\n'.join(linies)
+
+
+if __name__ == "__main__":
+    tickers = ["BTC-USD", "ETH-USD", "^IBEX", "^GSPC"]
+    for interval, periode in (('1d', '2y'), ('4h', '3mo'), ('1h', '3mo')):
+        data = yf.download(tickers, period=periode, interval=interval, group_by='ticker', progress=False)
+        dades = {ticker: data[ticker].dropna(how='all') for ticker in tickers}
+        informe = informe_qualitat(dades, interval)
+        print(f"\n=== {interval} ===")
+        print(informe.round(2).to_string())
+        print(resum_prompt(informe))
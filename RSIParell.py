@@ -1,14 +1,17 @@
 import yfinance as yf
 import matplotlib.pyplot as plt
+from Alineacio import alinea
 
 par = "BNB-USD"
 
 # Descarregar dades de BTC i ETH
-data = yf.download(["BTC-USD", par], period="1y").dropna()
+data = yf.download(["BTC-USD", par], period="1y")
 
-# Crear sèries de tancament
-btc_close = data["Close"]["BTC-USD"]
-par_close = data["Close"][par]
+# Crear sèries de tancament (calendari del BTC; si el parell no cotitza el cap de setmana
+# es manté el seu darrer tancament)
+close = alinea(data["Close"], mode='asof', referencia="BTC-USD", tolerancia='4D').dropna()
+btc_close = close["BTC-USD"]
+par_close = close[par]
 
 # Normalitzar per comparar (punt de partida = 100)
 btc_norm = btc_close / btc_close.iloc[0] * 100
@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from Planificador import Planificador, proper_tancament, reintent, MARGE_PUBLICACIO, DURADA_INTERVAL
+from Descarrega import _desplacament_periode
+from Alineacio import retorns_log
+from Trade_Calcul_Beta import betes_asimetriques
+
+# ----------------------------------------------------------------------
+# --- SERVEI LOCAL D'INDICADORS (HTTP / JSON) ---
+# ----------------------------------------------------------------------
+# Manté en memòria les candeles i els indicadors de cada (ticker, interval)
+# (un Planificador: només es descarreguen les barres noves) i els serveix per
+# HTTP als altres consumidors (bot d'informes, notebooks, gràfics):
+#   GET /indicadors?ticker=BTC-USD&interval=1d&columnes=Close,RSI&files=100
+#   GET /beta?univers=ETH-USD,SOL-USD&referencia=BTC-USD&periode=90d
+#   GET /estat
+# Les dades d'una clau són vigents fins al proper tancament de candela; un fil
+# en segon pla les refresca en aquell moment (i, si la candela encara no s'ha
+# publicat, torna a provar-ho al cap de poc: Planificador.reintent). Les peticions simultànies d'una
+# mateixa clau comparteixen un sol càlcul (coalescència amb un Future per clau).
+
+PORT_DEFECTE = 8765
+
+class Coalescedor:
+    """Executa un sol càlcul per clau alhora: les crides concurrents n'esperen el resultat."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curs = {}  # clau -> Future
+
+    def executa(self, clau, calcul):
+        with self._lock:
+            futur = self._en_curs.get(clau)
+            propietari = futur is None
+            if propietari:
+                futur = self._en_curs[clau] = Future()
+        if propietari:
+            try:
+                futur.set_result(calcul())
+            except Exception as e:
+                futur.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._en_curs[clau]
+        return futur.result()
+
+
+class ServeiIndicadors:
+    """
+    Candeles i indicadors calents en memòria per a qualsevol (ticker, interval).
+
+    Les claus es carreguen la primera vegada que es demanen (o amb escalfa()) i
+    després es mantenen al dia al tancament de cada candela.
+    """
+
+    def __init__(self):
+        self.planificador = Planificador()
+        self.vigencia = {}  # (ticker, interval) -> datetime UTC fins a la qual les dades són vigents
+        self.reintents = {}  # (ticker, interval) -> refrescos seguits sense candela nova
+        self.coalescedor = Coalescedor()
+        self.peticions = 0
+
+    # --- Dades ---
+
+    def _refresca(self, ticker, interval):
+        clau = (ticker, interval)
+        self.planificador.registra(ticker, interval)
+        nova = self.planificador.actualitza(ticker, interval)
+        if clau in self.planificador.candeles:
+            # Sense dades (descàrrega fallida) no es marca com a vigent: la propera petició ho torna a provar
+            ara = datetime.now(timezone.utc)
+            if nova:
+                self.vigencia[clau] = proper_tancament(ticker, interval, ara) + MARGE_PUBLICACIO
+                self.reintents[clau] = 0
+            else:
+                self.vigencia[clau], self.reintents[clau] = \
+                    reintent(ticker, interval, ara, self.reintents.get(clau, 0))
+
+    def _al_dia(self, ticker, interval):
+        clau = (ticker, interval)
+        if interval not in DURADA_INTERVAL:
+            raise ValueError(f"Interval no disponible: {interval} (opcions: {', '.join(DURADA_INTERVAL)})")
+        if clau not in self.vigencia or self.vigencia[clau] <= datetime.now(timezone.utc):
+            self.coalescedor.executa(('dades',) + clau, lambda: self._refresca(ticker, interval))
+
+    def candeles(self, ticker, interval='1d'):
+        """Candeles tancades (OHLCV) de (ticker, interval), al dia."""
+        self._al_dia(ticker, interval)
+        return self.planificador.candeles.get((ticker, interval))
+
+    def indicadors(self, ticker, interval='1d', columnes=None, files=None):
+        """Sortida de dades_diaries de (ticker, interval), al dia. None si no hi ha dades."""
+        self._al_dia(ticker, interval)
+        if (ticker, interval) not in self.planificador.candeles:
+            return None  # la descàrrega ha fallat: no es torna a provar fins a la propera petició
+        df = self.planificador.indicadors(ticker, interval)
+        if columnes:
+            desconegudes = [c for c in columnes if c not in df.columns]
+            if desconegudes:
+                raise ValueError(f"Columnes desconegudes: {', '.join(desconegudes)}")
+            df = df[columnes]
+        return df.iloc[-files:] if files else df
+
+    def betes(self, univers, referencia='BTC-USD', interval='1d', periode='90d'):
+        """
+        Betes asimètriques de cada ticker de l'univers respecte a 'referencia'
+        (Trade_Calcul_Beta), sobre els retorns de les sessions comunes del període.
+        """
+        tickers = [referencia] + [t for t in univers if t != referencia]
+        preus = {}
+        for ticker in tickers:
+            df = self.candeles(ticker, interval)
+            if df is not None and not df.empty:
+                tancaments = df['Close']
+                if interval == '1d' and tancaments.index.tz is not None:
+                    # Les sessions diàries es comparen per data local (cripto i borsa tenen zones diferents)
+                    tancaments = tancaments.tz_localize(None)
+                preus[ticker] = tancaments
+        if referencia not in preus:
+            raise LookupError(f"No hi ha dades de la referència {referencia}")
+
+        desplacament = _desplacament_periode(periode)
+        if desplacament is not None:
+            inici = preus[referencia].index[-1].normalize() - desplacament
+            preus = {ticker: s[s.index >= inici] for ticker, s in preus.items()}
+        retorns = retorns_log(preus, mode='comu')
+        return retorns, betes_asimetriques(retorns, nom_rei=referencia)
+
+    def escalfa(self, tickers, intervals=('1d',)):
+        """Carrega per endavant les claus que es demanaran."""
+        for ticker in tickers:
+            for interval in intervals:
+                self._al_dia(ticker, interval)
+
+    # --- Refresc en segon pla ---
+
+    def _bucle_refresc(self):
+        while True:
+            ara = datetime.now(timezone.utc)
+            vencudes = [clau for clau, vigencia in list(self.vigencia.items()) if vigencia <= ara]
+            for ticker, interval in vencudes:
+                try:
+                    self._al_dia(ticker, interval)
+                except Exception as e:
+                    print(f"❌ ERROR refrescant {ticker} {interval}: {e}")
+            proper = min(self.vigencia.values(), default=None)
+            espera = 60 if proper is None else (proper - datetime.now(timezone.utc)).total_seconds()
+            time.sleep(min(max(espera, 1), 60))
+
+    def inicia_refresc(self):
+        fil = threading.Thread(target=self._bucle_refresc, name='refresc', daemon=True)
+        fil.start()
+        return fil
+
+    def estat(self):
+        return {'peticions': self.peticions,
+                'claus': [{'ticker': t, 'interval': i,
+                           'barres': len(self.planificador.candeles.get((t, i), ())),
+                           'vigent_fins': v.isoformat()}
+                          for (t, i), v in sorted(self.vigencia.items())]}
+
+
+# --- HTTP ---
+
+def _llista(parametres, nom):
+    valor = parametres.get(nom, [''])[0]
+    return [v.strip() for v in valor.split(',') if v.strip()]
+
+def _json_taula(df):
+    """DataFrame -> dict JSON ('orient=split'; NaN -> null, dates en ISO)."""
+    return json.loads(df.to_json(orient='split', date_format='iso'))
+
+
+class GestorPeticions(BaseHTTPRequestHandler):
+    servei = None  # ServeiIndicadors compartit (vegeu serveix)
+
+    def _respon(self, codi, cos):
+        dades = json.dumps(cos, ensure_ascii=False, allow_nan=False).encode('utf-8')
+        self.send_response(codi)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dades)))
+        self.end_headers()
+        self.wfile.write(dades)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parametres = parse_qs(url.query)
+        self.servei.peticions += 1
+        inici = time.perf_counter()
+        try:
+            if url.path == '/indicadors':
+                ticker = parametres.get('ticker', [None])[0]
+                if not ticker:
+                    return self._respon(400, {'error': "Falta el paràmetre 'ticker'"})
+                interval = parametres.get('interval', ['1d'])[0]
+                files = int(parametres['files'][0]) if 'files' in parametres else None
+                df = self.servei.indicadors(ticker, interval, _llista(parametres, 'columnes'), files)
+                if df is None:
+                    return self._respon(502, {'error': f"No s'han pogut obtenir dades de {ticker} {interval}"})
+                cos = {'ticker': ticker, 'interval': interval, **_json_taula(df)}
+            elif url.path == '/beta':
+                univers = _llista(parametres, 'univers')
+                if not univers:
+                    return self._respon(400, {'error': "Falta el paràmetre 'univers'"})
+                referencia = parametres.get('referencia', ['BTC-USD'])[0]
+                interval = parametres.get('interval', ['1d'])[0]
+                periode = parametres.get('periode', ['90d'])[0]
+                retorns, betes = self.servei.betes(univers, referencia, interval, periode)
+                betes = betes.astype(object).where(betes.notna(), None)
+                cos = {'referencia': referencia, 'interval': interval, 'periode': periode,
+                       'sessions': len(retorns), 'betes': betes.to_dict(orient='index')}
+            elif url.path == '/estat':
+                cos = self.servei.estat()
+            else:
+                return self._respon(404, {'error': f"Ruta desconeguda: {url.path} (/indicadors, /beta, /estat)"})
+        except (ValueError, KeyError) as e:
+            return self._respon(400, {'error': str(e)})
+        except LookupError as e:
+            return self._respon(502, {'error': str(e)})
+        except Exception as e:
+            return self._respon(500, {'error': f"{type(e).__name__}: {e}"})
+        cos['ms'] = round(1000 * (time.perf_counter() - inici), 1)
+        self._respon(200, cos)
+
+    def log_message(self, format, *args):
+        pass  # Sense una línia per petició a la consola
+
+
+def serveix(host='127.0.0.1', port=PORT_DEFECTE, servei=None, escalfa=None):
+    """
+    Arrenca el servei HTTP (bloquejant). Cada petició s'atén en un fil propi.
+
+    Args:
+        escalfa (list): Tuples (ticker, interval) a carregar abans d'acceptar peticions.
+    """
+    servei = servei or ServeiIndicadors()
+    for ticker, interval in escalfa or []:
+        servei.escalfa([ticker], [interval])
+    servei.inicia_refresc()
+    gestor = type('Gestor', (GestorPeticions,), {'servei': servei})
+    servidor = ThreadingHTTPServer((host, port), gestor)
+    print(f"Servei d'indicadors a http://{host}:{port} (/indicadors, /beta, /estat)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    serveix(escalfa=[(ticker, interval) for ticker in ("BTC-USD", "ETH-USD", "^IBEX")
+                     for interval in ('1d', '4h', '1h')])
@@ -9,24 +9,31 @@ warnings.filterwarnings('ignore')
 import requests
 
 class WyckoffAnalyzer:
-    def __init__(self, symbol, period="6mo"):
+    def __init__(self, symbol, period="6mo", piramide=None):
         """
         Inicialitza l'analitzador Wyckoff
         
         Args:
             symbol (str): Símbol del stock o parell de divises (ex: "AAPL", "EURUSD=X")
             period (str): Període de temps (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+            piramide (PiramideCandeles): Si es dona, les candeles diàries es llegeixen de la
+                piràmide local (només cobreix la història de la resolució base).
         """
         self.symbol = symbol
         self.period = period
+        self.piramide = piramide
         self.data = None
         self.load_data()
         
     def load_data(self):
         """Carrega les dades del símbol especificat"""
         try:
-            ticker = yf.Ticker(self.symbol)
-            self.data = ticker.history(period=self.period)
+            if self.piramide is not None:
+                self.piramide.actualitza(self.symbol)
+                self.data = self.piramide.obte(self.symbol, '1d', periode=self.period)
+            else:
+                ticker = yf.Ticker(self.symbol)
+                self.data = ticker.history(period=self.period)
             if self.data.empty:
                 raise ValueError(f"No s'han trobat dades per al símbol {self.symbol}")
             print(f"✅ Dades carregades per {self.symbol}: {len(self.data)} registres")
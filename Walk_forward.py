@@ -0,0 +1,145 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import os
+import Dades_actiu_aux as aux
+from Descarrega import normalitza_columnes
+from Backtest import backtest_condicions, ESTRATEGIES
+from Escombrat import graella, comparteix_ohlcv, executa_en_pool, _DADES
+
+# Configuració de Pandas
+pd.set_option('display.max_rows', None)
+pd.set_option('display.max_columns', None)
+
+# ----------------------------------------------------------------------
+# --- WALK-FORWARD DEL SISTEMA DE LLINDARS PER QUANTILS ---
+# ----------------------------------------------------------------------
+# Per a cada plec: s'escullen els paràmetres amb les dades d'entrenament i
+# s'avaluen sobre el bloc següent. Els indicadors de cada plec es calculen
+# només amb les barres del mateix plec (mai amb dades posteriors al bloc de test)
+# i, per defecte, amb la normalització expansiva de min_max_scale_log, de manera
+# que cada barra només depèn de les anteriors.
+
+def plecs(n, entrenament, test, pas=None, ancorat=False):
+    """
+    Posicions (inici_entrenament, inici_test, fi_test) de cada plec.
+
+    Args:
+        n (int): Nombre de barres.
+        entrenament (int): Barres d'entrenament.
+        test (int): Barres del bloc fora de mostra.
+        pas (int): Desplaçament entre plecs (per defecte 'test', blocs de test consecutius).
+        ancorat (bool): Si és cert, l'entrenament comença sempre a la barra 0 (finestra expansiva).
+    """
+    pas = pas or test
+    resultat = []
+    inici_test = entrenament
+    while inici_test + test <= n:
+        inici = 0 if ancorat else inici_test - entrenament
+        resultat.append((inici, inici_test, inici_test + test))
+        inici_test += pas
+    return resultat
+
+def _metriques(df, parametres, estrategies, cache=None, des_de=None):
+    """Indicadors amb 'parametres' i mètriques de les estratègies (només des de 'des_de')."""
+    interval_type, _, comissio, interval, ticker = _DADES['config']
+    dades = aux.dades_diaries(df, interval_type, parametres, cache)
+    if des_de is not None:
+        dades = dades[dades.index >= des_de]
+    if dades.empty:
+        return None
+    return backtest_condicions(dades, estrategies, comissio, interval, ticker)[0]
+
+def _executa_plec(tasca):
+    """Ajusta els paràmetres sobre l'entrenament d'un plec i els avalua al bloc de test."""
+    n_plec, (inici, inici_test, fi_test), punts, metrica = tasca
+    _, estrategies, _, _, _ = _DADES['config']
+    df = _DADES['df']
+    entrenament = df.iloc[inici:inici_test]
+
+    # 1. Ajust: tota la graella sobre l'entrenament, amb una cache compartida pels punts
+    cache = {}
+    puntuacions = []
+    for parametres in punts:
+        m = _metriques(entrenament, parametres, estrategies, cache)
+        puntuacions.append(m[metrica] if m is not None else pd.Series(np.nan, index=list(estrategies)))
+    puntuacions = pd.DataFrame(puntuacions).reset_index(drop=True)
+    millors = puntuacions.fillna(-np.inf).idxmax()
+
+    # 2. Test: mateixes barres del plec fins al final del bloc, mètriques només del bloc de test.
+    #    Les estratègies que han triat el mateix punt s'avaluen juntes.
+    files = []
+    for i_punt, noms in millors.groupby(millors).groups.items():
+        parametres = punts[i_punt]
+        m = _metriques(df.iloc[inici:fi_test], parametres,
+                       {nom: estrategies[nom] for nom in noms}, des_de=df.index[inici_test])
+        for nom in noms:
+            fila = {
+                'Plec': n_plec,
+                'Inici_Entrenament': df.index[inici],
+                'Inici_Test': df.index[inici_test],
+                'Fi_Test': df.index[fi_test - 1],
+                'Estrategia': nom,
+                **parametres,
+                f'{metrica}_Entrenament': puntuacions.loc[i_punt, nom],
+            }
+            if m is not None:
+                fila.update(m.loc[nom].to_dict())
+            files.append(fila)
+    return files
+
+def walk_forward(df, punts, entrenament, test, pas=None, ancorat=False, estrategies=ESTRATEGIES,
+                 metrica='Sharpe', interval='1h', interval_type=None, comissio=0.001, processos=None,
+                 normalitzacio='expansiva', ticker=None):
+    """
+    Avaluació walk-forward: cada plec escull el millor punt de la graella per a cada
+    estratègia (segons 'metrica' a l'entrenament) i el mesura al bloc de test següent.
+
+    Els plecs s'executen en paral·lel; l'OHLCV es publica un sol cop en memòria compartida.
+    'normalitzacio' s'aplica als punts que no indiquen el seu propi mode i 'ticker'
+    anualitza amb el calendari del seu mercat (vegeu Backtest.barres_any).
+
+    Returns:
+        pd.DataFrame: Una fila per (plec, estratègia) amb els paràmetres escollits,
+                      la mètrica d'entrenament i les mètriques fora de mostra.
+    """
+    df = normalitza_columnes(df)
+    interval_type = interval_type or ('diari' if interval == '1d' else interval)
+    punts = [{'normalitzacio': normalitzacio, **p} for p in punts]
+
+    memoria, forma, index = comparteix_ohlcv(df)
+    try:
+        tasques = [(i, plec, punts, metrica)
+                   for i, plec in enumerate(plecs(forma[0], entrenament, test, pas, ancorat))]
+        processos = min(processos or os.cpu_count() or 1, max(len(tasques), 1))
+        initargs = (memoria.name, forma, index, interval_type, estrategies, comissio, interval, ticker)
+        resultats = executa_en_pool(_executa_plec, tasques, initargs, processos)
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+    return pd.DataFrame([fila for files in resultats for fila in files])
+
+def resum(taula):
+    """Resum fora de mostra per estratègia (mitjanes dels plecs i rendiment encadenat)."""
+    return taula.groupby('Estrategia', sort=False).agg(
+        Plecs=('Plec', 'count'),
+        Rendiment_Encadenat_pct=('Rendiment_%', lambda r: (np.prod(1 + r / 100) - 1) * 100),
+        Sharpe_Mitja=('Sharpe', 'mean'),
+        Max_Drawdown_pct=('Max_Drawdown_%', 'min'),
+        Plecs_Positius_pct=('Rendiment_%', lambda r: (r > 0).mean() * 100),
+    )
+
+
+if __name__ == "__main__":
+    ticker = "BTC-USD"
+    df = yf.download(ticker, period='730d', interval='1h', progress=False)
+
+    punts = graella(periode=[14, 21],
+                    span_ema21=[13, 21, 34],
+                    finestra_quantil=[144, 288])
+
+    # 6 mesos d'entrenament i 1 mes de test (barres d'1h, cripto 24/7)
+    taula = walk_forward(df, punts, entrenament=24 * 180, test=24 * 30, interval='1h', ticker=ticker)
+    print(taula.round(2).to_string())
+    print(resum(taula).round(2).to_string())
@@ -0,0 +1,140 @@
+import pandas as pd
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import Dades_actiu_aux as aux
+from Descarrega import descarrega_lot
+from Planificador import candela_oberta
+from Qualitat_dades import informe_qualitat, resum_prompt
+
+# ----------------------------------------------------------------------
+# --- EXECUCIÓ DE L'ANÀLISI DADES_ACTIU PER A TOTA UNA WATCHLIST ---
+# ----------------------------------------------------------------------
+
+TIPUS_INTERVAL = {'1d': 'diari', '4h': '4h', '1h': '1h'}
+PERIODES = {'1d': '2y', '4h': '3mo', '1h': '3mo'}
+FILES_GRAFICA = {'1d': 90, '4h': 72, '1h': 72}
+
+def carrega_config(cami='watchlist.json'):
+    """Llegeix la configuració (tickers, intervals, sortides) d'un fitxer JSON."""
+    with open(cami, encoding='utf-8') as f:
+        config = json.load(f)
+    config.setdefault('intervals', ['1d', '4h', '1h'])
+    config.setdefault('periodes', PERIODES)
+    config.setdefault('directori_sortida', 'sortida_watchlist')
+    config.setdefault('grafiques', True)
+    config.setdefault('informe_ia', False)
+    config.setdefault('processos', None)
+    config.setdefault('compacte', True)
+    config.setdefault('alertes', False)
+    config.setdefault('regles', None)
+    return config
+
+def processa_ticker(ticker, dades, config):
+    """
+    Treball de CPU d'un ticker (s'executa en un procés del pool): indicadors,
+    exportació de df_net i gràfiques. Retorna els indicadors per interval.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+    directori = config['directori_sortida']
+    nom = ticker.replace('^', '').replace('=', '_')
+    indicadors = {}
+
+    for interval, df in dades.items():
+        indicadors[interval] = aux.dades_diaries(df, interval_type=TIPUS_INTERVAL[interval],
+                                                 compacte=config['compacte'])
+        if config['grafiques']:
+            aux.grafica(indicadors[interval].tail(FILES_GRAFICA[interval]), ticker,
+                        fitxer=os.path.join(directori, f'{nom}_{interval}.png'))
+
+    if all(interval in indicadors for interval in ('1d', '4h', '1h')):
+        aux.exporta_dades(os.path.join(directori, f'{nom}_dades.txt'),
+                          indicadors['1d'], indicadors['4h'], indicadors['1h'])
+    return indicadors
+
+def executa_watchlist(config):
+    """
+    Executa el pipeline per a tots els tickers. Un error en un ticker no atura la resta.
+
+    Returns:
+        pd.DataFrame: Resum amb l'estat de cada ticker.
+    """
+    tickers = config['tickers']
+    os.makedirs(config['directori_sortida'], exist_ok=True)
+    resum = {ticker: {'Estat': 'OK', 'Missatge': ''} for ticker in tickers}
+
+    # 1. Descàrrega (E/S): una petició per interval per a tota la watchlist
+    descarregues = descarrega_lot((ticker, interval, config['periodes'][interval])
+                                  for interval in config['intervals'] for ticker in tickers)
+    dades = {ticker: {} for ticker in tickers}
+    qualitat = []
+    for interval in config['intervals']:
+        per_ticker = {t: descarregues[(t, interval)] for t in tickers if (t, interval) in descarregues}
+        if per_ticker:
+            qualitat.append(informe_qualitat(per_ticker, interval))
+        for ticker in tickers:
+            if ticker in per_ticker:
+                dades[ticker][interval] = per_ticker[ticker]
+            else:
+                resum[ticker] = {'Estat': 'ERROR', 'Missatge': f'Sense dades {interval}'}
+
+    # Informe de qualitat de les dades en brut (forats, duplicats, volum zero...)
+    if qualitat:
+        qualitat = pd.concat(qualitat).rename_axis('Ticker')
+        qualitat.to_csv(os.path.join(config['directori_sortida'], 'qualitat.csv'))
+
+    # 2. Càlcul (CPU): un procés per ticker
+    pendents = [t for t in tickers if resum[t]['Estat'] == 'OK']
+    resultats = {}
+    with ProcessPoolExecutor(max_workers=config['processos']) as pool:
+        futurs = {t: pool.submit(processa_ticker, t, dades[t], config) for t in pendents}
+        for ticker, futur in futurs.items():
+            try:
+                resultats[ticker] = futur.result()
+                resum[ticker]['Files'] = {i: len(df) for i, df in resultats[ticker].items()}
+            except Exception as e:
+                resum[ticker] = {'Estat': 'ERROR', 'Missatge': str(e)}
+
+    # 3. Alertes de tot l'univers (opcional): un sol resum per Telegram
+    if config.get('alertes'):
+        from Alertes import MotorAlertes, carrega_regles
+        motor = MotorAlertes(carrega_regles(config['regles']) if config.get('regles') else None,
+                             os.path.join(config['directori_sortida'], 'estat_alertes.json'))
+        # Només candeles tancades: la darrera barra descarregada pot estar encara oberta
+        tancades = {}
+        for ticker, indicadors in resultats.items():
+            for interval, df in indicadors.items():
+                if len(df) and candela_oberta(ticker, interval, df.index[-1]):
+                    df = df.iloc[:-1]
+                tancades[(ticker, interval)] = df
+        alertes = motor.avalua(tancades)
+        alertes.to_csv(os.path.join(config['directori_sortida'], 'alertes.csv'), index=False)
+        motor.envia(alertes)
+
+    # 4. Informe IA (E/S, opcional)
+    if config['informe_ia']:
+        import Dades_actiu_ia as ia
+        for ticker, indicadors in resultats.items():
+            try:
+                resum_qualitat = None
+                if len(qualitat):
+                    resum_qualitat = resum_prompt(qualitat.loc[[ticker]].set_index('Interval'))
+                if ia.genera_informe(indicadors['1d'], indicadors['4h'], indicadors['1h'],
+                                     resum_qualitat) is None:
+                    resum[ticker]['Missatge'] = "No s'ha pogut generar l'informe"
+            except Exception as e:
+                resum[ticker]['Missatge'] = f'Informe: {e}'
+
+    return pd.DataFrame.from_dict(resum, orient='index')
+
+
+if __name__ == "__main__":
+    cami_config = sys.argv[1] if len(sys.argv) > 1 else 'watchlist.json'
+    resum = executa_watchlist(carrega_config(cami_config))
+
+    print(resum.to_string())
+    correctes = (resum['Estat'] == 'OK').sum()
+    print(f"\n{correctes}/{len(resum)} tickers processats correctament.")
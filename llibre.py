@@ -1,30 +1,36 @@
 import matplotlib.pyplot as plt
-import requests
-import pandas as pd
+import numpy as np
+from Llibre_ordres import descarrega_llibre, parseja_instantani
+from Analitica_llibre import AnaliticaLlibre
 
-url = "https://api.binance.com/api/v3/depth"
-params = {"symbol": "POL_USDT", "limit": 10000}
-data = requests.get(url, params=params).json()
+data = descarrega_llibre("POL_USDT", limit=10000)
 
-# Convertim a DataFrame i assegurem columnes correctes
-bids = pd.DataFrame(data['bids'], columns=['price', 'quantity'], dtype=float)
-asks = pd.DataFrame(data['asks'], columns=['price', 'quantity'], dtype=float)
+# Convertim directament a arrays (n, 2) de [preu, quantitat] en float64
+bids, asks, _ = parseja_instantani(data)
 
-# Ara sí, podem calcular murs
-mur_bids = bids[bids['quantity'] > bids['quantity'].mean() * 100]
-mur_asks = asks[asks['quantity'] > asks['quantity'].mean() * 100]
+# Murs (quantitat > 100x la mitjana), desequilibri i profunditat per bandes del 0.5%
+banda_pct = 0.5
+analitica = AnaliticaLlibre(factor_mur=100, banda_pct=banda_pct, n_cubetes=40)
+resultat = analitica.processa(bids, asks)
 
 print("\nMurs de compra:")
-print(mur_bids)
+print(resultat['murs_bids'][['preu', 'quantitat']])
 
 print("\nMurs de venda:")
-print(mur_asks)
+print(resultat['murs_asks'][['preu', 'quantitat']])
 
+print(f"\nDesequilibri top: {resultat['desequilibri_top']:.3f}  "
+      f"Microprice: {resultat['microprice']:.6f}")
+for banda in analitica.bandes_desequilibri:
+    print(f"Desequilibri {banda}%: {resultat[f'desequilibri_{banda}%']:.3f}")
 
+
+mid = resultat['mid']
+distancia = (np.arange(analitica.n_cubetes) + 1) * banda_pct
 plt.figure(figsize=(8,4))
-plt.plot(bids['price'], bids['quantity'].cumsum(), label='Bids (compres)', color='green')
-plt.plot(asks['price'], asks['quantity'].cumsum(), label='Asks (vendes)', color='red')
-plt.axvline(x=(bids['price'].max()+asks['price'].min())/2, color='blue', linestyle='--', label='Mid Price')
+plt.step(mid * (1 - distancia / 100), np.cumsum(resultat['cubetes_bids']), label='Bids (compres)', color='green')
+plt.step(mid * (1 + distancia / 100), np.cumsum(resultat['cubetes_asks']), label='Asks (vendes)', color='red')
+plt.axvline(x=mid, color='blue', linestyle='--', label='Mid Price')
 
 plt.xlabel("Preu (USDT)")
 plt.ylabel("Volum acumulat")
@@ -2,6 +2,7 @@
 import yfinance as yf
 import mplfinance as mpf
 import pandas as pd
+from PuntFigura import calcular_tamany_caixa
 
 def pnf(par):
     btc_data = yf.download(par, period='1y', interval='1d').dropna()
@@ -12,18 +13,6 @@ def pnf(par):
 
     darrer_preu_tancament = float(btc_data['Close'].iloc[-1])
 
-    def calcular_tamany_caixa(preu):
-        if preu < 0.25: return 0.0625
-        elif preu < 1.00: return 0.125
-        elif preu < 5.00: return 0.25
-        elif preu < 20.00: return 0.50
-        elif preu < 100: return 1
-        elif preu < 200: return 2
-        elif preu < 500: return 4
-        elif preu < 1000: return 5
-        elif preu < 25000: return 50
-        else: return 500
-
     # box = calcular_tamany_caixa(darrer_preu_tancament)
     box = 0.01
     revers = 5
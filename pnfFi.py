@@ -1,6 +1,6 @@
 import yfinance as yf
-import pandas as pd
-from pypnf import PointFigureChart
+import numpy as np
+from PuntFigura import construeix, grafica_punt_figura
 
 # Descarregar dades del ticker
 periode = "1y"
@@ -13,21 +13,17 @@ data = yf.Ticker(symbol)
 ts = data.history(period=periode, interval=interval)
 # ts = data.history(period="1y")
 
-# Preparar les dades
-ts.reset_index(level=0, inplace=True)
-ts['Date'] = ts['Date'].dt.strftime('%Y-%m-%d')
-ts = ts[['Date', 'Open', 'High', 'Low', 'Close']]
-ts = ts.to_dict('list')
+# Preparar les dades (arrays de NumPy, sense passar per dict de llistes)
+close = ts['Close'].to_numpy(dtype=np.float64)
 
 # # Crear el gràfic P&F
-box = round((pd.Series(ts['Close']).mean()*caixa), 5) # Un 2% del preu mitja de tancament de la serie
-# box = round((ts['Close'][-1] * 0.02), 3) # Un 2% del preu de tancament ultim
+box = round((close.mean()*caixa), 5) # Un 2% del preu mitja de tancament de la serie
+# box = round((close[-1] * 0.02), 3) # Un 2% del preu de tancament ultim
 # box = 0.0001
 revers = 3
-pnf = PointFigureChart(ts=ts, method='cl', reversal=revers, boxsize=box, scaling='abs', title=symbol)
-pnf.get_trendlines()
+pnf = construeix(close=close, caixa=box, revers=revers, escala='abs')
 
 # Mostrar el gràfic
 # print(box)
-# print(round((pd.Series(ts['Close']).mean() * 0.02), 3))
-pnf.show()
+# print(pnf.columnes())
+grafica_punt_figura(pnf, titol=f'{symbol} - Box/Rev ({box}/{revers})', preu_actual=close[-1])
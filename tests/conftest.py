@@ -0,0 +1,24 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Els mòduls del projecte són a l'arrel del repositori
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def ohlcv_sintetic(barres=600, llavor=0, freq='D'):
+    """Candeles OHLCV d'un passeig aleatori (reproduïble)."""
+    rng = np.random.default_rng(llavor)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, barres)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, barres))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, barres))
+    volume = rng.lognormal(10, 0.5, barres)
+    index = pd.date_range('2023-01-01', periods=barres, freq=freq, tz='UTC')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                        index=index)
+
+@pytest.fixture
+def ohlcv():
+    return ohlcv_sintetic()
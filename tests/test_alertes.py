@@ -0,0 +1,20 @@
+import pandas as pd
+from Alertes import MotorAlertes, MAX_MISSATGE
+
+def _alertes(n):
+    return pd.DataFrame({'Regla': [f'Regla {i % 3}' for i in range(n)],
+                         'Ticker': [f'T{i:04d}' for i in range(n)], 'Interval': '1h',
+                         'Data': pd.Timestamp('2026-01-01'), 'Detall': 'ADX 25.3, ADX[-1] 24.1'})
+
+def test_resum_llarg_es_parteix_sense_perdre_alertes():
+    missatges = MotorAlertes.resum(_alertes(1500))
+    assert len(missatges) > 1
+    assert all(len(text) <= MAX_MISSATGE for text in missatges)
+    text = '\n'.join(missatges)
+    assert all(f'• T{i:04d} 1h' in text for i in range(1500))
+    assert missatges[-1].endswith(f'({len(missatges)}/{len(missatges)})')
+
+def test_resum_curt_en_un_sol_missatge():
+    missatges = MotorAlertes.resum(_alertes(3))
+    assert len(missatges) == 1
+    assert missatges[0].startswith('🔔 ALERTES (3)')
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Alineacio import alinea
+
+def _preus():
+    index = pd.date_range('2024-01-01', periods=10, freq='D', tz='UTC')
+    preus = pd.DataFrame({'BTC-USD': np.arange(10.0), 'ETH-USD': np.arange(10.0) * 2,
+                          'DESLISTAT': np.nan}, index=index)
+    preus.loc[index[[5, 6]], 'ETH-USD'] = np.nan  # cap de setmana de l'altre mercat
+    return preus
+
+@pytest.mark.parametrize('mode, referencia', [('asof', 'BTC-USD'), ('unio', None)])
+def test_serie_buida_queda_tota_nan(mode, referencia):
+    alineats = alinea(_preus(), mode=mode, referencia=referencia, tolerancia='2D')
+    assert len(alineats) == 10
+    assert alineats['DESLISTAT'].isna().all()
+    np.testing.assert_array_equal(alineats['BTC-USD'], np.arange(10.0))
+    assert alineats['ETH-USD'].iloc[6] == 8.0  # arrossegat des del 5
+
+def test_serie_buida_en_mode_comu_no_deixa_sessions():
+    alineats = alinea(_preus(), mode='comu')
+    assert alineats.empty
+    assert list(alineats.columns) == ['BTC-USD', 'ETH-USD', 'DESLISTAT']
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Dades_actiu_aux import dades_diaries, COLUMNES_COMPACTES
+
+MODES = ['global', 'expansiva', 'mobil', 'rang']
+
+@pytest.mark.parametrize('compacte', [False, True])
+def test_cache_compartida_entre_normalitzacions(ohlcv, compacte):
+    # La neteja de NaNs depèn de la normalització: la cache no pot barrejar files d'entrada diferents
+    cache = {}
+    for mode in MODES:
+        parametres = {'normalitzacio': mode, 'finestra_normalitzacio': 50}
+        amb_cache = dades_diaries(ohlcv.copy(), parametres=parametres, cache=cache, compacte=compacte)
+        sense_cache = dades_diaries(ohlcv.copy(), parametres=parametres, compacte=compacte)
+        pd.testing.assert_frame_equal(amb_cache, sense_cache)
+
+def test_cache_amb_entrada_mes_curta(ohlcv):
+    cache = {}
+    dades_diaries(ohlcv.copy(), cache=cache)
+    retallat = ohlcv.iloc[10:].copy()
+    pd.testing.assert_frame_equal(dades_diaries(retallat.copy(), cache=cache), dades_diaries(retallat))
+
+@pytest.mark.parametrize('mode', MODES)
+def test_compacte_igual_que_complet(ohlcv, mode):
+    # Amb forats al mig (files que la versió completa elimina) i al principi
+    ohlcv = ohlcv.copy()
+    ohlcv.iloc[2:4] = np.nan
+    ohlcv.iloc[300, 3] = np.nan
+    ohlcv.iloc[420, 4] = np.nan
+    parametres = {'normalitzacio': mode, 'finestra_normalitzacio': 50}
+    complet = dades_diaries(ohlcv.copy(), parametres=parametres)
+    compacte = dades_diaries(ohlcv.copy(), parametres=parametres, compacte=True)
+    pd.testing.assert_frame_equal(compacte, complet[COLUMNES_COMPACTES].astype(np.float32))
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from PuntFigura import (PuntFigura, construeix, senyals, SENYAL_DOBLE_SOSTRE,
+                        SENYAL_TRENCA_RESISTENCIA)
+from conftest import ohlcv_sintetic
+
+def _barra_a_barra(caixa, escala, **preus):
+    pf = PuntFigura(caixa, 3, escala)
+    for i in range(len(next(iter(preus.values())))):
+        pf.afegeix(**{nom: serie[i:i + 1] for nom, serie in preus.items()})
+    return pf
+
+def _iguals(a, b):
+    ca, cb = a.columnes(), b.columnes()
+    assert a.n_columnes == b.n_columnes
+    for nom in ca:
+        np.testing.assert_array_equal(ca[nom], cb[nom])
+
+@pytest.mark.parametrize('caixa, escala', [(1, 'abs'), (0.01, 'pct')])
+def test_high_low_barra_a_barra_igual_que_lot(caixa, escala):
+    df = ohlcv_sintetic(3000, llavor=1)
+    high, low = df['High'].to_numpy(), df['Low'].to_numpy()
+    lot = construeix(high=high, low=low, caixa=caixa, escala=escala)
+    _iguals(_barra_a_barra(caixa, escala, high=high, low=low), lot)
+
+def test_high_low_barra_repetida_pot_girar():
+    # La segona barra, idèntica, ja no estén la X i el seu low arriba a 3 caixes del màxim
+    pf = construeix(high=np.array([10.0, 14.0, 14.0]), low=np.array([10.0, 10.5, 10.5]), caixa=1)
+    np.testing.assert_array_equal(pf.columnes()['direccio'], [1, -1])
+
+@pytest.mark.parametrize('caixa, escala', [(1, 'abs'), (0.01, 'pct')])
+def test_tancament_barra_a_barra_igual_que_lot(caixa, escala):
+    close = ohlcv_sintetic(3000, llavor=2)['Close'].to_numpy()
+    _iguals(_barra_a_barra(caixa, escala, close=close), construeix(close=close, caixa=caixa, escala=escala))
+
+def _senyals(tancaments):
+    s = senyals(construeix(close=np.array(tancaments, dtype=float), caixa=1))
+    return list(zip(s['columna'].tolist(), s['senyal'].tolist()))
+
+def test_trencament_de_resistencia_sense_doble_sostre():
+    # Columnes de X amb màxims 20, 17, 17, 17: la línia baixa des de 21 i la X de la
+    # columna 6 la supera sense passar del màxim de la X anterior
+    assert _senyals([10, 20, 10, 17, 13, 17, 13, 17]) == [(6, SENYAL_TRENCA_RESISTENCIA)]
+
+def test_doble_sostre_sense_trencament_de_resistencia():
+    # Màxims 20, 14, 15: la X de la columna 4 fa doble sostre però la línia des de 21 és a 18
+    assert _senyals([10, 20, 10, 14, 11, 15]) == [(4, SENYAL_DOBLE_SOSTRE)]
+
+def test_la_linia_no_s_ancora_a_la_x_anterior():
+    # Igualar el màxim de la X anterior (14) no trenca la línia ancorada al màxim dominant (20)
+    assert _senyals([10, 20, 10, 14, 11, 14]) == []